@@ -0,0 +1,187 @@
+import hashlib
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+from app.core.logger import logger
+from app.core.hosts_parallel import parse_document
+
+_READ_BLOCK = 1 << 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS backups (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    action TEXT NOT NULL,
+    ts REAL NOT NULL,
+    doc_id INTEGER NOT NULL REFERENCES documents(id)
+);
+CREATE INDEX IF NOT EXISTS backups_doc ON backups(doc_id, ts);
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    host_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (host_id, doc_id)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True)
+class HostSightings:
+    host: str
+    count: int
+    first_seen: Optional[float]
+    last_seen: Optional[float]
+
+
+class BackupSearchIndex:
+    """Inverted index of hostnames -> backups, stored in SQLite.
+
+    Backups with identical content share one document (keyed by SHA-256), so
+    the usual long run of unchanged snapshots costs one row per backup and
+    hostnames are only tokenized once per distinct content. Lookups go
+    through the hosts/postings primary keys and stay in the millisecond range
+    regardless of how many backups exist.
+
+    Every call opens its own connection, so the index may be used from any
+    thread; writers are serialized by a lock and the database runs in WAL
+    mode so readers are never blocked by background indexing.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._write_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- Writing ---
+
+    @staticmethod
+    def _digest(path: Path) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_READ_BLOCK), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    @staticmethod
+    def _add_document(conn: sqlite3.Connection, digest: str, path: Path) -> int:
+        """The document id for digest; the backup is only read if its content is new. Raises OSError."""
+        row = conn.execute("SELECT id FROM documents WHERE digest = ?", (digest,)).fetchone()
+        if row:
+            return row[0]
+        names = [(name,) for name in parse_document(Path(path).read_bytes()).hosts]
+        doc_id = conn.execute("INSERT INTO documents(digest) VALUES (?)", (digest,)).lastrowid
+        conn.executemany("INSERT OR IGNORE INTO hosts(name) VALUES (?)", names)
+        conn.executemany(
+            "INSERT OR IGNORE INTO postings(host_id, doc_id) SELECT id, ? FROM hosts WHERE name = ?",
+            ((doc_id, name) for (name,) in names),
+        )
+        return doc_id
+
+    def add(self, info) -> bool:
+        """Index a single backup (anything with path/action/timestamp). Returns False on failure."""
+        return self.sync_entries([info], prune=False) >= 0
+
+    def sync_entries(self, backups: Iterable, prune: bool = True) -> int:
+        """Bring the index in line with the given backups.
+
+        Only backups not yet indexed are read. With prune=True, rows for
+        backups that are no longer present are dropped. Returns the number of
+        newly indexed backups, or -1 if the index could not be updated.
+        """
+        with self._write_lock:
+            try:
+                with closing(self._connect()) as conn:
+                    known = {name for (name,) in conn.execute("SELECT name FROM backups")}
+                    present = set()
+                    added = 0
+                    for info in backups:
+                        name = Path(info.path).name
+                        present.add(name)
+                        if name in known:
+                            continue
+                        try:
+                            digest = self._digest(info.path)
+                            with conn:
+                                doc_id = self._add_document(conn, digest, info.path)
+                                conn.execute(
+                                    "INSERT OR REPLACE INTO backups(name, path, action, ts, doc_id) VALUES (?, ?, ?, ?, ?)",
+                                    (name, str(info.path), info.action, info.timestamp, doc_id),
+                                )
+                        except OSError as e:
+                            logger.debug("Skipping unreadable backup %s: %s", info.path, e)
+                            continue
+                        known.add(name)
+                        added += 1
+                    if prune:
+                        stale = known - present
+                        if stale:
+                            with conn:
+                                conn.executemany("DELETE FROM backups WHERE name = ?", ((n,) for n in stale))
+                                conn.execute("DELETE FROM postings WHERE doc_id NOT IN (SELECT doc_id FROM backups)")
+                                conn.execute("DELETE FROM documents WHERE id NOT IN (SELECT doc_id FROM backups)")
+                    return added
+            except sqlite3.Error as e:
+                logger.error("Backup index update failed: %s", e)
+                return -1
+
+    # --- Queries ---
+
+    @staticmethod
+    def _normalize(host: str) -> str:
+        return host.strip().lower().rstrip(".")
+
+    def find(self, host: str) -> list[tuple[str, str, float]]:
+        """Backups whose content maps `host`, as (path, action, timestamp), oldest first."""
+        host = self._normalize(host)
+        if not host:
+            return []
+        try:
+            with closing(self._connect()) as conn:
+                return conn.execute(
+                    "SELECT b.path, b.action, b.ts FROM hosts h"
+                    " JOIN postings p ON p.host_id = h.id"
+                    " JOIN backups b ON b.doc_id = p.doc_id"
+                    " WHERE h.name = ? ORDER BY b.ts",
+                    (host,),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Backup index query failed: %s", e)
+            return []
+
+    def sightings(self, host: str) -> HostSightings:
+        """How many backups contain `host` and when it was first and last seen."""
+        host = self._normalize(host)
+        try:
+            with closing(self._connect()) as conn:
+                count, first, last = conn.execute(
+                    "SELECT COUNT(*), MIN(b.ts), MAX(b.ts) FROM hosts h"
+                    " JOIN postings p ON p.host_id = h.id"
+                    " JOIN backups b ON b.doc_id = p.doc_id"
+                    " WHERE h.name = ?",
+                    (host,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Backup index query failed: %s", e)
+            count, first, last = 0, None, None
+        return HostSightings(host, count, first, last)
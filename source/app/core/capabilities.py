@@ -0,0 +1,169 @@
+import os
+import sys
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from app.core.logger import logger
+
+# Preference order matters: the first available entry is tried first.
+_LINUX_LAUNCHERS = ("pkexec", "sudo", "gksudo", "kdesudo")
+_MACOS_LAUNCHERS = ("osascript", "sudo")
+_LINUX_EDITORS = (
+    "gnome-text-editor", "gedit", "xed", "pluma", "mousepad",
+    "geany", "kate", "kwrite", "featherpad", "leafpad",
+)
+
+_NSCD_SOCKETS = ("/run/nscd/socket", "/var/run/nscd/socket")
+_DNSMASQ_PIDFILES = ("/run/dnsmasq/dnsmasq.pid", "/var/run/dnsmasq/dnsmasq.pid", "/run/dnsmasq.pid")
+
+
+@dataclass(frozen=True)
+class Capabilities:
+    """What this machine offers for elevation, editing hosts and flushing DNS.
+
+    launchers/editors map tool names to absolute paths, in preference order.
+    resolvers lists the caching resolvers that are actually running, and
+    flush_commands pairs each of them with the argv that flushes it.
+    """
+    launchers: tuple[tuple[str, str], ...] = ()
+    editors: tuple[tuple[str, str], ...] = ()
+    resolvers: tuple[str, ...] = ()
+    flush_commands: tuple[tuple[str, tuple[str, ...]], ...] = ()
+
+    def launcher(self, name: str) -> Optional[str]:
+        return dict(self.launchers).get(name)
+
+    def has_resolver(self, name: str) -> bool:
+        return name in self.resolvers
+
+
+def _which_all(names: tuple[str, ...]) -> tuple[tuple[str, str], ...]:
+    found = []
+    for name in names:
+        path = shutil.which(name)
+        if path:
+            found.append((name, path))
+    return tuple(found)
+
+
+def _dnsmasq_running() -> bool:
+    if any(os.path.exists(p) for p in _DNSMASQ_PIDFILES):
+        return True
+    try:
+        with os.scandir("/proc") as it:
+            for entry in it:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(f"/proc/{entry.name}/comm", "rb") as f:
+                        if f.read().strip() == b"dnsmasq":
+                            return True
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return False
+
+
+def _probe_linux_resolvers() -> tuple[tuple[str, ...], tuple[tuple[str, tuple[str, ...]], ...]]:
+    resolvers = []
+    commands = []
+    if os.path.isdir("/run/systemd/resolve"):
+        resolvers.append("systemd-resolved")
+        tool = shutil.which("resolvectl")
+        if tool:
+            commands.append(("systemd-resolved", (tool, "flush-caches")))
+        else:
+            tool = shutil.which("systemd-resolve")
+            if tool:
+                commands.append(("systemd-resolved", (tool, "--flush-caches")))
+    if any(os.path.exists(p) for p in _NSCD_SOCKETS):
+        resolvers.append("nscd")
+        tool = shutil.which("nscd")
+        if tool:
+            # Invalidate just the hosts table instead of restarting the daemon.
+            commands.append(("nscd", (tool, "-i", "hosts")))
+        elif os.path.exists("/etc/init.d/nscd"):
+            commands.append(("nscd", ("/etc/init.d/nscd", "restart")))
+    if _dnsmasq_running():
+        resolvers.append("dnsmasq")
+        tool = shutil.which("killall") or shutil.which("pkill")
+        if tool:
+            commands.append(("dnsmasq", (tool, "-HUP", "dnsmasq")))
+    return tuple(resolvers), tuple(commands)
+
+
+def probe() -> Capabilities:
+    """Inspect the system. Costs a few dozen PATH lookups; use get_capabilities() instead."""
+    if sys.platform == "win32":
+        return Capabilities(resolvers=("dnscache",), flush_commands=(("dnscache", ("ipconfig", "/flushdns")),))
+    if sys.platform == "darwin":
+        commands = []
+        for argv in (("dscacheutil", "-flushcache"), ("killall", "-HUP", "mDNSResponder")):
+            tool = shutil.which(argv[0])
+            if tool:
+                commands.append(("mDNSResponder", (tool, *argv[1:])))
+        return Capabilities(
+            launchers=_which_all(_MACOS_LAUNCHERS),
+            resolvers=("mDNSResponder",),
+            flush_commands=tuple(commands),
+        )
+    resolvers, commands = _probe_linux_resolvers()
+    return Capabilities(
+        launchers=_which_all(_LINUX_LAUNCHERS),
+        editors=_which_all(_LINUX_EDITORS),
+        resolvers=resolvers,
+        flush_commands=commands,
+    )
+
+
+_lock = threading.Lock()
+_cached: Optional[Capabilities] = None
+_probe_thread: Optional[threading.Thread] = None
+
+
+def _run_probe():
+    global _cached
+    try:
+        caps = probe()
+    except Exception as e:
+        logger.error("Capability probe failed: %s", e)
+        caps = Capabilities()
+    with _lock:
+        if _cached is None:
+            _cached = caps
+    logger.debug("Capabilities: %s", caps)
+
+
+def start_background_probe():
+    """Kick off the probe at startup so the first hosts action finds it ready."""
+    global _probe_thread
+    with _lock:
+        if _cached is not None or _probe_thread is not None:
+            return
+        _probe_thread = threading.Thread(target=_run_probe, name="capability-probe", daemon=True)
+        _probe_thread.start()
+
+
+def get_capabilities() -> Capabilities:
+    """The session's capabilities, probing (or waiting for the background probe) on first use."""
+    with _lock:
+        if _cached is not None:
+            return _cached
+        thread = _probe_thread
+    if thread is not None:
+        thread.join()
+    else:
+        _run_probe()
+    with _lock:
+        return _cached
+
+
+def refresh_capabilities() -> Capabilities:
+    """Forget the cached result and probe again (e.g. after installing an editor)."""
+    global _cached, _probe_thread
+    with _lock:
+        _cached = None
+        _probe_thread = None
+    return get_capabilities()
@@ -49,6 +49,9 @@ HOSTS_PATH = Path(r"C:\Windows\System32\drivers\etc\hosts") if sys.platform == "
 HOSTS_BACKUP_DIR = _get_backup_dir()
 HOSTS_BACKUP_PREFIX = "hosts_backup_"
 SETTINGS_PATH = _get_settings_path()
+HOSTS_BACKUP_INDEX_PATH = SETTINGS_PATH.parent / "backup-index.sqlite3"
+HOSTS_JOURNAL_DIR = SETTINGS_PATH.parent / "journal"
+HOSTS_FINGERPRINT_PATH = SETTINGS_PATH.parent / "hosts-fingerprint.json"
 
 GITHUB_RELEASES_API_URL = "https://api.github.com/repos/AvenCores/Goida-AI-Unlocker/releases/latest"
 GITHUB_RELEASES_PAGE_URL = "https://github.com/AvenCores/Goida-AI-Unlocker/releases/latest"
@@ -0,0 +1,303 @@
+import os
+import socket
+import struct
+from dataclasses import dataclass, field
+from typing import Optional
+
+SYSTEM_BUS_ADDRESS = "unix:path=/var/run/dbus/system_bus_socket"
+
+METHOD_CALL = 1
+METHOD_RETURN = 2
+ERROR = 3
+SIGNAL = 4
+
+# Header field codes
+FIELD_PATH = 1
+FIELD_INTERFACE = 2
+FIELD_MEMBER = 3
+FIELD_ERROR_NAME = 4
+FIELD_REPLY_SERIAL = 5
+FIELD_DESTINATION = 6
+FIELD_SENDER = 7
+FIELD_SIGNATURE = 8
+
+_FIELD_TYPES = {
+    FIELD_PATH: "o", FIELD_INTERFACE: "s", FIELD_MEMBER: "s", FIELD_ERROR_NAME: "s",
+    FIELD_REPLY_SERIAL: "u", FIELD_DESTINATION: "s", FIELD_SENDER: "s", FIELD_SIGNATURE: "g",
+}
+
+_FLAG_NO_AUTO_START = 0x2
+
+_BYTE_ORDERS = {b"l": "<", b"B": ">"}
+
+
+class DBusError(Exception):
+    pass
+
+
+@dataclass
+class DBusMessage:
+    type: int
+    serial: int = 0
+    fields: dict = field(default_factory=dict)
+    signature: str = ""
+    args: tuple = ()
+
+    @property
+    def member(self) -> Optional[str]:
+        return self.fields.get(FIELD_MEMBER)
+
+    @property
+    def error_name(self) -> Optional[str]:
+        return self.fields.get(FIELD_ERROR_NAME)
+
+    @property
+    def reply_serial(self) -> Optional[int]:
+        return self.fields.get(FIELD_REPLY_SERIAL)
+
+
+# --- Marshalling (only the basic types we need: y b u s o g). Messages are
+# sent little endian; received ones may use either byte order. ---
+
+class _Writer:
+    def __init__(self):
+        self.buf = bytearray()
+
+    def align(self, n: int):
+        self.buf += b"\0" * (-len(self.buf) % n)
+
+    def byte(self, v: int):
+        self.buf.append(v)
+
+    def uint32(self, v: int):
+        self.align(4)
+        self.buf += struct.pack("<I", v)
+
+    def string(self, v: str):
+        data = v.encode("utf-8")
+        self.uint32(len(data))
+        self.buf += data + b"\0"
+
+    def signature(self, v: str):
+        data = v.encode("ascii")
+        self.buf.append(len(data))
+        self.buf += data + b"\0"
+
+    def value(self, sig: str, v):
+        if sig == "y":
+            self.byte(v)
+        elif sig in ("u", "b"):
+            self.uint32(int(v))
+        elif sig in ("s", "o"):
+            self.string(v)
+        elif sig == "g":
+            self.signature(v)
+        else:
+            raise DBusError(f"Unsupported type {sig!r}")
+
+
+class _Reader:
+    def __init__(self, data: bytes, pos: int = 0, order: str = "<"):
+        self.data = data
+        self.pos = pos
+        self._uint32 = struct.Struct(order + "I")
+
+    def align(self, n: int):
+        self.pos += -self.pos % n
+
+    def byte(self) -> int:
+        v = self.data[self.pos]
+        self.pos += 1
+        return v
+
+    def uint32(self) -> int:
+        self.align(4)
+        (v,) = self._uint32.unpack_from(self.data, self.pos)
+        self.pos += 4
+        return v
+
+    def string(self) -> str:
+        size = self.uint32()
+        v = self.data[self.pos:self.pos + size].decode("utf-8", errors="replace")
+        self.pos += size + 1
+        return v
+
+    def signature(self) -> str:
+        size = self.byte()
+        v = self.data[self.pos:self.pos + size].decode("ascii", errors="replace")
+        self.pos += size + 1
+        return v
+
+    def value(self, sig: str):
+        if sig == "y":
+            return self.byte()
+        if sig == "u":
+            return self.uint32()
+        if sig == "b":
+            return bool(self.uint32())
+        if sig in ("s", "o"):
+            return self.string()
+        if sig == "g":
+            return self.signature()
+        raise DBusError(f"Unsupported type {sig!r}")
+
+
+def marshal(msg: DBusMessage, flags: int = 0) -> bytes:
+    body = _Writer()
+    for sig, arg in zip(msg.signature, msg.args):
+        body.value(sig, arg)
+    fields = dict(msg.fields)
+    if msg.signature:
+        fields[FIELD_SIGNATURE] = msg.signature
+
+    header = _Writer()
+    header.buf += struct.pack("<BBBBIII", ord("l"), msg.type, flags, 1, len(body.buf), msg.serial, 0)
+    for code, v in fields.items():
+        header.align(8)
+        header.byte(code)
+        header.signature(_FIELD_TYPES[code])
+        header.value(_FIELD_TYPES[code], v)
+    struct.pack_into("<I", header.buf, 12, len(header.buf) - 16)
+    header.align(8)
+    return bytes(header.buf + body.buf)
+
+
+def _parse_address(address: str) -> tuple[int, object]:
+    for entry in address.split(";"):
+        transport, _, params = entry.partition(":")
+        if transport != "unix":
+            continue
+        kv = dict(p.split("=", 1) for p in params.split(",") if "=" in p)
+        if "path" in kv:
+            return socket.AF_UNIX, kv["path"]
+        if "abstract" in kv:
+            return socket.AF_UNIX, "\0" + kv["abstract"]
+    raise DBusError(f"Unsupported D-Bus address: {address}")
+
+
+class DBusConnection:
+    """Minimal synchronous D-Bus client over a Unix socket (EXTERNAL auth).
+
+    Only what the app needs: method calls with basic-type arguments and
+    reading replies. Used to talk to systemd-resolved without spawning
+    resolvectl; any address can be passed so it can run against a private
+    bus.
+    """
+
+    def __init__(self, address: str = SYSTEM_BUS_ADDRESS, timeout: float = 2.0):
+        family, target = _parse_address(address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._buf = b""
+        self._serial = 0
+        self.unique_name = ""
+        try:
+            self._sock.connect(target)
+            self._authenticate()
+            self.unique_name = self.call(
+                "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "Hello"
+            ).args[0]
+        except (OSError, DBusError):
+            self.close()
+            raise
+
+    def _authenticate(self):
+        uid_hex = str(os.getuid()).encode("ascii").hex().encode("ascii")
+        self._sock.sendall(b"\0AUTH EXTERNAL " + uid_hex + b"\r\n")
+        line = self._read_line()
+        if not line.startswith(b"OK"):
+            raise DBusError(f"D-Bus authentication rejected: {line!r}")
+        self._sock.sendall(b"BEGIN\r\n")
+
+    def _read_line(self) -> bytes:
+        while b"\r\n" not in self._buf:
+            chunk = self._sock.recv(4096)
+            if not chunk:
+                raise DBusError("Connection closed during authentication")
+            self._buf += chunk
+        line, _, self._buf = self._buf.partition(b"\r\n")
+        return line
+
+    def _read_exact(self, size: int) -> bytes:
+        while len(self._buf) < size:
+            chunk = self._sock.recv(max(4096, size - len(self._buf)))
+            if not chunk:
+                raise DBusError("Connection closed")
+            self._buf += chunk
+        data, self._buf = self._buf[:size], self._buf[size:]
+        return data
+
+    def next_serial(self) -> int:
+        self._serial += 1
+        return self._serial
+
+    def send(self, msg: DBusMessage, flags: int = 0) -> int:
+        if not msg.serial:
+            msg.serial = self.next_serial()
+        self._sock.sendall(marshal(msg, flags))
+        return msg.serial
+
+    def receive(self) -> DBusMessage:
+        fixed = self._read_exact(16)
+        order = _BYTE_ORDERS.get(fixed[:1])
+        if order is None:
+            raise DBusError(f"Invalid byte order mark {fixed[:1]!r}")
+        msg_type, _flags, _version, body_len, serial, array_len = struct.unpack_from(order + "BBBIII", fixed, 1)
+        header_len = 16 + array_len
+        header_len += -header_len % 8
+        data = fixed + self._read_exact(header_len - 16 + body_len)
+
+        reader = _Reader(data, 16, order)
+        fields = {}
+        while reader.pos < 16 + array_len:
+            reader.align(8)
+            code = reader.byte()
+            sig = reader.signature()
+            fields[code] = reader.value(sig)
+        signature = fields.get(FIELD_SIGNATURE, "")
+        reader.pos = header_len
+        args = []
+        try:
+            for sig in signature:
+                args.append(reader.value(sig))
+        except DBusError:
+            args = []  # Body uses types we do not decode; callers only need the header.
+        return DBusMessage(msg_type, serial, fields, signature, tuple(args))
+
+    def call(self, destination: str, path: str, interface: str, member: str,
+             signature: str = "", args: tuple = ()) -> DBusMessage:
+        """Call a method and wait for its reply; raises DBusError on an error reply."""
+        serial = self.send(DBusMessage(METHOD_CALL, fields={
+            FIELD_PATH: path, FIELD_INTERFACE: interface, FIELD_MEMBER: member,
+            FIELD_DESTINATION: destination,
+        }, signature=signature, args=args), flags=_FLAG_NO_AUTO_START)
+        while True:
+            reply = self.receive()
+            if reply.reply_serial != serial:
+                continue
+            if reply.type == ERROR:
+                detail = reply.args[0] if reply.args else ""
+                raise DBusError(f"{reply.error_name}: {detail}".rstrip(": "))
+            return reply
+
+    def reply(self, call: DBusMessage, signature: str = "", args: tuple = ()):
+        """Send a method return for an incoming call (used by stand-in services)."""
+        self.send(DBusMessage(METHOD_RETURN, fields={
+            FIELD_REPLY_SERIAL: call.serial, FIELD_DESTINATION: call.fields.get(FIELD_SENDER, ""),
+        }, signature=signature, args=args))
+
+    def close(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def system_bus_address() -> str:
+    return os.environ.get("DBUS_SYSTEM_BUS_ADDRESS", SYSTEM_BUS_ADDRESS)
@@ -0,0 +1,66 @@
+import sys
+import shlex
+import subprocess
+from typing import Optional
+from app.core.logger import logger
+from app.core.capabilities import get_capabilities
+from app.core.orchestrator import Step, run_steps
+from app.core.dbus_client import DBusConnection, DBusError, system_bus_address
+
+RESOLVED_BUS_NAME = "org.freedesktop.resolve1"
+RESOLVED_OBJECT_PATH = "/org/freedesktop/resolve1"
+RESOLVED_MANAGER_INTERFACE = "org.freedesktop.resolve1.Manager"
+
+
+def resolved_flush_caches(address: Optional[str] = None) -> bool:
+    """Call systemd-resolved's Manager.FlushCaches over D-Bus: one IPC round trip, no process.
+
+    `address` defaults to the system bus. Returns False when the bus or the
+    service is unavailable or the call is refused (e.g. by polkit).
+    """
+    try:
+        with DBusConnection(address or system_bus_address()) as bus:
+            bus.call(RESOLVED_BUS_NAME, RESOLVED_OBJECT_PATH, RESOLVED_MANAGER_INTERFACE, "FlushCaches")
+        return True
+    except (OSError, DBusError) as e:
+        logger.debug("D-Bus FlushCaches failed: %s", e)
+        return False
+
+
+def flush_shell_command() -> str:
+    """Shell snippet that flushes the detected resolvers (for elevated scripts); always succeeds."""
+    commands = get_capabilities().flush_commands
+    if not commands:
+        return "true"
+    parts = "; ".join(f"{shlex.join(argv)} >/dev/null 2>&1" for _resolver, argv in commands)
+    return f"{{ {parts}; true; }}"
+
+
+def flush_dns():
+    """Flush the local DNS cache on macOS/Linux.
+
+    Only resolvers the capability probe found are touched, all at once.
+    systemd-resolved is flushed over D-Bus; its resolvectl command only runs
+    if that call fails. Other resolvers use their argv directly, without a
+    shell.
+    """
+    if sys.platform == "win32":
+        return
+    caps = get_capabilities()
+    steps = []
+    for resolver, argv in caps.flush_commands:
+        if resolver == "systemd-resolved":
+            steps.append(Step(resolver, lambda argv=argv: resolved_flush_caches() or _run_flush(argv)))
+        else:
+            steps.append(Step(f"{resolver}:{argv[0]}", argv, timeout=10))
+    if caps.has_resolver("systemd-resolved") and not any(s.name == "systemd-resolved" for s in steps):
+        steps.append(Step("systemd-resolved", resolved_flush_caches))
+    run_steps(steps, deadline=15)
+
+
+def _run_flush(argv: tuple[str, ...]) -> bool:
+    try:
+        return subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10).returncode == 0
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug("DNS flush via %s failed: %s", argv[0], e)
+        return False
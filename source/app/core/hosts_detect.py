@@ -0,0 +1,275 @@
+import os
+import re as _re
+import mmap
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from app.core.logger import logger
+
+GEOHIDE_MARKER = b"dns.geohide.ru"
+MALW_MARKER = b"dns.malw.link"
+
+# Provider lists name their DNS in the comment block at the top, so a hit
+# there answers without touching the rest of the file.
+HEADER_REGION = 64 << 10
+
+
+@dataclass(frozen=True)
+class ProviderSignature:
+    name: str
+    markers: tuple[bytes, ...]
+
+
+@dataclass
+class ProviderMatch:
+    """Where a provider's markers occur; lines are 1-based."""
+    name: str
+    hits: int
+    first_line: int
+    last_line: int
+
+
+@dataclass
+class SignatureReport:
+    """Every registered provider found in one scan, in registry (priority) order.
+
+    conflicts lists pairs of providers whose line ranges overlap, i.e. lists
+    that were merged into each other rather than sitting side by side.
+    """
+    matches: dict[str, ProviderMatch] = field(default_factory=dict)
+    conflicts: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def providers(self) -> list[str]:
+        return list(self.matches)
+
+    @property
+    def primary(self) -> Optional[str]:
+        return next(iter(self.matches), None)
+
+
+def _trie_pattern(markers: Iterable[bytes]) -> bytes:
+    """A regex matching any marker, with shared prefixes factored out like a trie."""
+    trie: dict = {}
+    for marker in markers:
+        node = trie
+        for byte in marker:
+            node = node.setdefault(byte, {})
+        node[None] = True
+
+    def emit(node: dict) -> bytes:
+        alts = [_re.escape(bytes([b])) + emit(child) for b, child in sorted(
+            (k, v) for k, v in node.items() if k is not None)]
+        if not alts:
+            return b""
+        body = alts[0] if len(alts) == 1 else b"(?:" + b"|".join(alts) + b")"
+        if None in node:
+            return b"(?:" + body + b")?"
+        return body
+
+    return emit(trie)
+
+
+class SignatureRegistry:
+    """Provider signatures, matched together against the hosts bytes.
+
+    Up to FIND_LIMIT distinct markers are located with C-level finds, one pass
+    over the data per marker; for a handful of markers that still beats a
+    combined matcher. Past the limit the markers compile into one trie-shaped
+    pattern that the regex engine runs over the data once, so the cost stops
+    growing with the number of providers and feeds registered.
+    Earlier registrations take precedence when several providers are present;
+    generation changes on every (un)registration so memoized scans can tell.
+    """
+
+    FIND_LIMIT = 12
+
+    def __init__(self, signatures: Iterable[ProviderSignature] = ()):
+        self._signatures: list[ProviderSignature] = []
+        self._compiled = None
+        self.generation = 0
+        for sig in signatures:
+            self.register(sig.name, *sig.markers)
+
+    @property
+    def signatures(self) -> tuple[ProviderSignature, ...]:
+        return tuple(self._signatures)
+
+    def register(self, name: str, *markers: bytes):
+        if not markers or not all(markers):
+            raise ValueError(f"Provider {name!r} needs at least one non-empty marker")
+        self._signatures = [s for s in self._signatures if s.name != name]
+        self._signatures.append(ProviderSignature(name, tuple(markers)))
+        self._compiled = None
+        self.generation += 1
+
+    def unregister(self, name: str):
+        self._signatures = [s for s in self._signatures if s.name != name]
+        self._compiled = None
+        self.generation += 1
+
+    def owners(self) -> dict[bytes, tuple[str, ...]]:
+        """Marker -> names of the providers it identifies."""
+        owners: dict[bytes, tuple[str, ...]] = {}
+        for sig in self._signatures:
+            for marker in sig.markers:
+                if sig.name not in owners.get(marker, ()):
+                    owners[marker] = owners.get(marker, ()) + (sig.name,)
+        return owners
+
+    def _automaton(self):
+        if self._compiled is None:
+            owners = self.owners()
+            # The longest marker starting at a position also implies every
+            # marker that is a prefix of it.
+            pattern = _re.compile(_trie_pattern(owners)) if owners else None
+            prefixes = {m: tuple(p for p in owners if m.startswith(p)) for m in owners}
+            self._compiled = (owners, pattern, prefixes)
+        return self._compiled
+
+    def _occurrences(self, data) -> Iterator[tuple[int, bytes]]:
+        owners, pattern, prefixes = self._automaton()
+        if not owners:
+            return
+        if len(owners) <= self.FIND_LIMIT:
+            hits = []
+            for marker in owners:
+                pos = data.find(marker)
+                while pos != -1:
+                    hits.append((pos, marker))
+                    pos = data.find(marker, pos + 1)
+            hits.sort()
+            yield from hits
+            return
+        for m in pattern.finditer(data):
+            # finditer resumes after a match, so markers starting inside it
+            # (overlaps) are looked for at those positions explicitly.
+            inner = [m] + [pattern.match(data, k) for k in range(m.start() + 1, m.end())]
+            for hit in inner:
+                if hit is not None:
+                    for marker in prefixes[hit.group()]:
+                        yield hit.start(), marker
+
+    def scan(self, data) -> SignatureReport:
+        """Report the providers in data (bytes or mmap), with line spans and overlaps."""
+        owners = self._automaton()[0]
+        found: dict[str, list[int]] = {}
+        line = 1
+        last = 0
+        for pos, marker in self._occurrences(data):
+            if pos > last:
+                line += data[last:pos].count(b"\n")
+                last = pos
+            for name in owners[marker]:
+                span = found.get(name)
+                if span is None:
+                    found[name] = [1, line, line]
+                else:
+                    span[0] += 1
+                    span[2] = line
+
+        report = SignatureReport()
+        for sig in self._signatures:
+            if sig.name in found:
+                hits, first, last_line = found[sig.name]
+                report.matches[sig.name] = ProviderMatch(sig.name, hits, first, last_line)
+        present = list(report.matches.values())
+        for i, a in enumerate(present):
+            for b in present[i + 1:]:
+                if a.first_line <= b.last_line and b.first_line <= a.last_line:
+                    report.conflicts.append((a.name, b.name))
+        return report
+
+
+provider_signatures = SignatureRegistry([
+    ProviderSignature("geohide", (GEOHIDE_MARKER,)),
+    ProviderSignature("dns.malw.link", (MALW_MARKER,)),
+])
+
+
+@dataclass
+class ScanMemo:
+    """Answers from earlier scans of the same file state."""
+    found: dict[bytes, bool] = field(default_factory=dict)
+    report: Optional[SignatureReport] = None
+
+
+class MarkerScan:
+    """Raw-bytes provider lookups in a file, header region first, then the whole file.
+
+    The file is memory-mapped, so nothing is decoded and the full pass runs
+    over the mapping. If the file cannot be mapped (e.g. locked by another
+    process on Windows) it is read into memory for that pass instead. Results
+    go into `memo`, which callers may keep between scans as long as
+    `signature` ((inode, size, mtime_ns) of the open file) matches.
+    """
+
+    def __init__(self, path: str | Path, registry: Optional[SignatureRegistry] = None,
+                 memo: Optional[ScanMemo] = None):
+        self.path = Path(path)
+        self.registry = registry if registry is not None else provider_signatures
+        self.memo = memo if memo is not None else ScanMemo()
+        self._file = open(self.path, "rb")
+        self._mm: Optional[mmap.mmap] = None
+        st = os.fstat(self._file.fileno())
+        self.size = st.st_size
+        self.signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if self.size:
+            try:
+                self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                logger.debug("mmap of %s failed, scanning in chunks: %s", self.path, e)
+
+    def in_header(self, marker: bytes) -> bool:
+        if self.memo.found.get(marker) is False:
+            return False
+        if self._mm is not None:
+            return self._mm.find(marker, 0, HEADER_REGION) != -1
+        self._file.seek(0)
+        return marker in self._file.read(HEADER_REGION)
+
+    def report(self) -> SignatureReport:
+        """Every registered provider present, from one scan of the whole file."""
+        if self.memo.report is None:
+            if not self.size:
+                data = b""
+            elif self._mm is not None:
+                data = self._mm
+            else:
+                self._file.seek(0)
+                data = self._file.read()
+            report = self.registry.scan(data)
+            for marker, names in self.registry.owners().items():
+                self.memo.found[marker] = any(name in report.matches for name in names)
+            self.memo.report = report
+        return self.memo.report
+
+    def provider(self) -> Optional[str]:
+        """The highest-priority provider present.
+
+        A header hit for the top provider answers at once; anything else has
+        to rule out the providers ranked above it, which takes the full pass.
+        """
+        signatures = self.registry.signatures
+        if self.memo.report is None and signatures:
+            if any(self.in_header(m) for m in signatures[0].markers):
+                return signatures[0].name
+        return self.report().primary
+
+    def any_provider(self) -> bool:
+        if self.memo.report is None:
+            if any(self.in_header(m) for sig in self.registry.signatures for m in sig.markers):
+                return True
+        return bool(self.report().matches)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,351 @@
+import bisect
+from difflib import SequenceMatcher
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+# Windows without a unique anchor line are handed to SequenceMatcher only
+# while it stays cheap; larger ones are reported as a single replace block.
+_SEQUENCE_MATCHER_LIMIT = 4_000_000
+
+# Side-by-side column width for the left-hand text.
+_SIDE_WIDTH = 48
+
+
+def read_line_ids(path: str | Path, start: int, interner: dict[bytes, int]) -> list[int]:
+    """Read a file as a list of line ids.
+
+    Each distinct line (without its line ending) gets a small integer id from
+    `interner`, which is shared between both sides of a diff so that equal
+    lines compare as equal ints.
+    """
+    ids = []
+    append = ids.append
+    setdefault = interner.setdefault
+    with open(path, "rb") as f:
+        f.seek(start)
+        for raw in f:
+            line = raw.rstrip(b"\r\n")
+            append(setdefault(line, len(interner)))
+    return ids
+
+
+def _unique_anchors(a: list[int], b: list[int], alo: int, ahi: int, blo: int, bhi: int) -> list[tuple[int, int]]:
+    """Patience anchors: lines unique in both windows, longest increasing run by position."""
+    count_a: dict[int, int] = {}
+    pos_a: dict[int, int] = {}
+    for i in range(alo, ahi):
+        v = a[i]
+        count_a[v] = count_a.get(v, 0) + 1
+        pos_a[v] = i
+    count_b: dict[int, int] = {}
+    pos_b: dict[int, int] = {}
+    for j in range(blo, bhi):
+        v = b[j]
+        if v in count_a:
+            count_b[v] = count_b.get(v, 0) + 1
+            pos_b[v] = j
+
+    pairs = sorted(
+        (pos_a[v], pos_b[v]) for v, c in count_b.items() if c == 1 and count_a[v] == 1
+    )
+    if not pairs:
+        return []
+
+    # Longest increasing subsequence over b positions (patience sorting).
+    tails: list[int] = []
+    tail_idx: list[int] = []
+    prev = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = k
+        prev[k] = tail_idx[pos - 1] if pos else -1
+    result = []
+    k = tail_idx[-1]
+    while k != -1:
+        result.append(pairs[k])
+        k = prev[k]
+    result.reverse()
+    return result
+
+
+def matching_blocks(a: list[int], b: list[int]) -> list[tuple[int, int, int]]:
+    """Return (i, j, n) runs where a[i:i+n] == b[j:j+n], in order.
+
+    Patience-style diff: strip the common prefix/suffix, anchor on lines that
+    are unique on both sides and recurse between anchors. Uses an explicit
+    stack, so deep recursion is never an issue.
+    """
+    blocks: list[tuple[int, int, int]] = []
+    stack: list[tuple] = [(0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if len(item) == 3:
+            blocks.append(item)
+            continue
+        alo, ahi, blo, bhi = item
+
+        n = 0
+        while alo + n < ahi and blo + n < bhi and a[alo + n] == b[blo + n]:
+            n += 1
+        if n:
+            blocks.append((alo, blo, n))
+            alo += n
+            blo += n
+
+        m = 0
+        while ahi - m > alo and bhi - m > blo and a[ahi - m - 1] == b[bhi - m - 1]:
+            m += 1
+        ahi -= m
+        bhi -= m
+        tail = (ahi, bhi, m) if m else None
+
+        work: list[tuple] = []
+        if alo < ahi and blo < bhi:
+            anchors = _unique_anchors(a, b, alo, ahi, blo, bhi)
+            if anchors:
+                pa, pb = alo, blo
+                for i, j in anchors:
+                    work.append((pa, i, pb, j))
+                    work.append((i, j, 1))
+                    pa, pb = i + 1, j + 1
+                work.append((pa, ahi, pb, bhi))
+            elif (ahi - alo) * (bhi - blo) <= _SEQUENCE_MATCHER_LIMIT:
+                sm = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+                for i, j, size in sm.get_matching_blocks():
+                    if size:
+                        work.append((alo + i, blo + j, size))
+        if tail:
+            work.append(tail)
+        stack.extend(reversed(work))
+
+    merged: list[tuple[int, int, int]] = []
+    for i, j, n in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            pi, pj, pn = merged[-1]
+            merged[-1] = (pi, pj, pn + n)
+        else:
+            merged.append((i, j, n))
+    return merged
+
+
+def diff_opcodes(a: list[int], b: list[int]) -> list[tuple[str, int, int, int, int]]:
+    """difflib-style opcodes ("equal", "replace", "delete", "insert") for two id lists."""
+    opcodes = []
+    i = j = 0
+    for bi, bj, n in matching_blocks(a, b) + [(len(a), len(b), 0)]:
+        if i < bi and j < bj:
+            opcodes.append(("replace", i, bi, j, bj))
+        elif i < bi:
+            opcodes.append(("delete", i, bi, j, j))
+        elif j < bj:
+            opcodes.append(("insert", i, i, j, bj))
+        if n:
+            opcodes.append(("equal", bi, bi + n, bj, bj + n))
+        i, j = bi + n, bj + n
+    return opcodes
+
+
+@dataclass
+class HostsDiff:
+    """Line diff between two files plus their line sources for rendering.
+
+    `old` and `new` are objects with lines(start, count), e.g. MappedTextFile.
+    """
+    opcodes: list[tuple[str, int, int, int, int]]
+    old: object
+    new: object
+    added: int = field(init=False, default=0)
+    removed: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.added = sum(j2 - j1 for tag, _, _, j1, j2 in self.opcodes if tag in ("insert", "replace"))
+        self.removed = sum(i2 - i1 for tag, i1, i2, _, _ in self.opcodes if tag in ("delete", "replace"))
+
+    def is_identical(self) -> bool:
+        return self.added == 0 and self.removed == 0
+
+    def close(self):
+        for source in (self.old, self.new):
+            close = getattr(source, "close", None)
+            if close:
+                close()
+
+
+class _DiffRows:
+    """Lazily rendered diff rows; subclasses describe runs of rows.
+
+    A run is (kind, a_start, a_count, b_start, b_count, rows). Rows are only
+    turned into text when lines()/line_kinds() ask for them.
+    """
+
+    line_numbers = False
+
+    def __init__(self, diff: HostsDiff, context: int = 3):
+        self.diff = diff
+        self.context = context
+        self._runs: list[tuple] = []
+        self._offsets: list[int] = []
+        self._total = 0
+        self._build()
+
+    def _add(self, kind: str, a_start: int, a_count: int, b_start: int, b_count: int, rows: int):
+        if rows <= 0:
+            return
+        self._offsets.append(self._total)
+        self._runs.append((kind, a_start, a_count, b_start, b_count, rows))
+        self._total += rows
+
+    def _grouped_opcodes(self):
+        # Same grouping as difflib.SequenceMatcher.get_grouped_opcodes().
+        n = self.context
+        codes = list(self.diff.opcodes)
+        if not codes:
+            return
+        if codes[0][0] == "equal":
+            tag, i1, i2, j1, j2 = codes[0]
+            codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+        if codes[-1][0] == "equal":
+            tag, i1, i2, j1, j2 = codes[-1]
+            codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+        group = []
+        for tag, i1, i2, j1, j2 in codes:
+            if tag == "equal" and i2 - i1 > n * 2:
+                group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+                yield group
+                group = []
+                i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+            group.append((tag, i1, i2, j1, j2))
+        if group and not (len(group) == 1 and group[0][0] == "equal"):
+            yield group
+
+    def _build(self):
+        raise NotImplementedError
+
+    def line_count(self) -> int:
+        return self._total
+
+    def _iter_rows(self, start: int, count: int):
+        if count <= 0 or start >= self._total:
+            return
+        end = min(self._total, start + count)
+        k = bisect.bisect_right(self._offsets, start) - 1
+        row = start
+        while row < end and k < len(self._runs):
+            run = self._runs[k]
+            first = row - self._offsets[k]
+            n = min(run[5] - first, end - row)
+            yield run, first, n
+            row += n
+            k += 1
+
+    def lines(self, start: int, count: int) -> list[str]:
+        out = []
+        for run, first, n in self._iter_rows(start, count):
+            out.extend(self._render(run, first, n))
+        return out
+
+    def line_kinds(self, start: int, count: int) -> list[str]:
+        out = []
+        for run, first, n in self._iter_rows(start, count):
+            out.extend(self._kinds(run, first, n))
+        return out
+
+    def _render(self, run: tuple, first: int, n: int) -> list[str]:
+        raise NotImplementedError
+
+    def _kinds(self, run: tuple, first: int, n: int) -> list[str]:
+        return [run[0]] * n
+
+
+class UnifiedDiffRows(_DiffRows):
+    """Unified diff with `context` lines around each change and hunk headers."""
+
+    def _build(self):
+        for group in self._grouped_opcodes():
+            a1, a2, b1, b2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+            self._add("@", a1, a2 - a1, b1, b2 - b1, 1)
+            for tag, i1, i2, j1, j2 in group:
+                if tag == "equal":
+                    self._add(" ", i1, i2 - i1, j1, j2 - j1, i2 - i1)
+                    continue
+                self._add("-", i1, i2 - i1, j1, 0, i2 - i1)
+                self._add("+", i2, 0, j1, j2 - j1, j2 - j1)
+
+    def _render(self, run: tuple, first: int, n: int) -> list[str]:
+        kind, a_start, _a_count, b_start, _b_count, _rows = run
+        if kind == "@":
+            return [f"@@ -{a_start + 1},{run[2]} +{b_start + 1},{run[4]} @@"]
+        if kind == "-":
+            return [f"{a_start + first + k + 1:>7} {'':>7} - {t}"
+                    for k, t in enumerate(self.diff.old.lines(a_start + first, n))]
+        if kind == "+":
+            return [f"{'':>7} {b_start + first + k + 1:>7} + {t}"
+                    for k, t in enumerate(self.diff.new.lines(b_start + first, n))]
+        return [f"{a_start + first + k + 1:>7} {b_start + first + k + 1:>7}   {t}"
+                for k, t in enumerate(self.diff.old.lines(a_start + first, n))]
+
+
+class SideBySideDiffRows(_DiffRows):
+    """Old and new text in two columns; changed blocks are padded to equal height."""
+
+    _KINDS = {"equal": " ", "delete": "-", "insert": "+", "replace": "~"}
+
+    def _build(self):
+        for group in self._grouped_opcodes():
+            a1, a2, b1, b2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+            self._add("@", a1, a2 - a1, b1, b2 - b1, 1)
+            for tag, i1, i2, j1, j2 in group:
+                self._add(self._KINDS[tag], i1, i2 - i1, j1, j2 - j1, max(i2 - i1, j2 - j1))
+
+    def _render(self, run: tuple, first: int, n: int) -> list[str]:
+        kind, a_start, a_count, b_start, b_count, _rows = run
+        if kind == "@":
+            return [f"@@ -{a_start + 1},{a_count} +{b_start + 1},{b_count} @@"]
+        a_n = max(0, min(n, a_count - first))
+        b_n = max(0, min(n, b_count - first))
+        left = self.diff.old.lines(a_start + first, a_n) if a_n else []
+        right = self.diff.new.lines(b_start + first, b_n) if b_n else []
+        out = []
+        for k in range(n):
+            if k < len(left):
+                lt = left[k].expandtabs(4)
+                lt = lt if len(lt) <= _SIDE_WIDTH else lt[:_SIDE_WIDTH - 1] + "…"
+                lcol = f"{a_start + first + k + 1:>7} {lt:<{_SIDE_WIDTH}}"
+            else:
+                lcol = " " * (8 + _SIDE_WIDTH)
+            if k < len(right):
+                rcol = f"{b_start + first + k + 1:>7} {right[k]}"
+            else:
+                rcol = ""
+            out.append(f"{lcol} │ {rcol}")
+        return out
+
+    def _kinds(self, run: tuple, first: int, n: int) -> list[str]:
+        kind, _a_start, a_count, _b_start, b_count, _rows = run
+        if kind != "~":
+            return [kind] * n
+        # Rows past the shorter side of a replace are pure deletions/insertions.
+        out = []
+        for k in range(first, first + n):
+            if k < a_count and k < b_count:
+                out.append("~")
+            else:
+                out.append("-" if k < a_count else "+")
+        return out
+
+
+def compute_diff(old_path: str | Path, new_path: str | Path,
+                 old_start: int = 0, new_start: int = 0,
+                 old_source: Optional[object] = None, new_source: Optional[object] = None) -> HostsDiff:
+    """Diff two files line by line. Meant to be called from a worker thread."""
+    interner: dict[bytes, int] = {}
+    a = read_line_ids(old_path, old_start, interner)
+    b = read_line_ids(new_path, new_start, interner)
+    interner.clear()
+    return HostsDiff(diff_opcodes(a, b), old_source, new_source)
@@ -0,0 +1,227 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+from app.core.hosts_diff import matching_blocks
+from app.core.logger import logger
+from app.utils.file_ops import atomic_write
+
+_READ_CHUNK = 1 << 20
+
+# Chunks end at a line end whose crc32 has the low bits clear: about every
+# 2048 lines, bounded to [MIN_CHUNK, MAX_CHUNK] bytes. Cutting at content
+# rather than fixed offsets keeps chunks after an edit aligned with the old ones.
+_BOUNDARY_MASK = 0x7FF
+MIN_CHUNK = 16 << 10
+MAX_CHUNK = 256 << 10
+
+
+@dataclass(frozen=True)
+class Chunk:
+    offset: int
+    length: int
+    digest: str
+
+
+@dataclass
+class Fingerprint:
+    """Content-defined chunk hashes of a file plus a root hash over them.
+
+    signature is (inode, size, mtime_ns) at hashing time, so an unchanged
+    file is recognised from a stat alone.
+    """
+    signature: Optional[tuple[int, int, int]]
+    chunks: list[Chunk] = field(default_factory=list)
+    root: str = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "signature": list(self.signature) if self.signature else None,
+            "chunks": [[c.offset, c.length, c.digest] for c in self.chunks],
+            "root": self.root,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Fingerprint":
+        signature = tuple(data["signature"]) if data.get("signature") else None
+        return cls(signature, [Chunk(*c) for c in data.get("chunks", [])], data.get("root", ""))
+
+
+def stat_signature(path: str | Path) -> Optional[tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _chunk_data(blocks: Iterable[bytes]) -> Iterable[bytes]:
+    """Re-cut a byte stream into content-defined chunks ending at line ends.
+
+    Each byte is looked at once. A run of MAX_CHUNK bytes without a line end
+    is cut at MAX_CHUNK, so no chunk is larger than that.
+    """
+    crc32 = zlib.crc32
+    pending = bytearray()
+    pos = 0  # start of the first line not looked at yet
+    for block in blocks:
+        pending += block
+        start = 0
+        while True:
+            end = pending.find(b"\n", pos, start + MAX_CHUNK)
+            if end == -1:
+                if len(pending) - start < MAX_CHUNK:
+                    break
+                yield bytes(pending[start:start + MAX_CHUNK])
+                start = pos = start + MAX_CHUNK
+                continue
+            line_start, pos = pos, end + 1
+            size = pos - start
+            if size >= MAX_CHUNK or (size >= MIN_CHUNK and not crc32(pending[line_start:end]) & _BOUNDARY_MASK):
+                yield bytes(pending[start:pos])
+                start = pos
+        del pending[:start]
+        pos -= start
+    if pending:
+        yield bytes(pending)
+
+
+def fingerprint_blocks(blocks: Iterable[bytes], signature=None) -> Fingerprint:
+    fp = Fingerprint(signature)
+    root = hashlib.blake2b(digest_size=16)
+    offset = 0
+    for data in _chunk_data(blocks):
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        fp.chunks.append(Chunk(offset, len(data), digest))
+        root.update(bytes.fromhex(digest))
+        offset += len(data)
+    fp.root = root.hexdigest()
+    return fp
+
+
+def fingerprint_file(path: str | Path) -> Fingerprint:
+    """Hash a file into content-defined chunks with one sequential read. Raises OSError."""
+    signature = stat_signature(path)
+
+    def blocks():
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(_READ_CHUNK)
+                if not block:
+                    return
+                yield block
+
+    return fingerprint_blocks(blocks(), signature)
+
+
+def changed_ranges(old: Fingerprint, new: Fingerprint) -> list[tuple[int, int, int, int]]:
+    """Byte ranges that differ, as (old_start, old_end, new_start, new_end).
+
+    Chunks are matched by digest with the same patience alignment the diff
+    view uses, so an insertion only marks the chunks around it as changed.
+    """
+    interner: dict[str, int] = {}
+    a = [interner.setdefault(c.digest, len(interner)) for c in old.chunks]
+    b = [interner.setdefault(c.digest, len(interner)) for c in new.chunks]
+
+    def span(chunks: list[Chunk], lo: int, hi: int) -> tuple[int, int]:
+        if lo < hi:
+            return chunks[lo].offset, chunks[hi - 1].offset + chunks[hi - 1].length
+        edge = chunks[lo].offset if lo < len(chunks) else (chunks[-1].offset + chunks[-1].length if chunks else 0)
+        return edge, edge
+
+    ranges = []
+    i = j = 0
+    for bi, bj, n in matching_blocks(a, b) + [(len(a), len(b), 0)]:
+        if i < bi or j < bj:
+            ranges.append(span(old.chunks, i, bi) + span(new.chunks, j, bj))
+        i, j = bi + n, bj + n
+    return ranges
+
+
+class FingerprintStore:
+    """The last fingerprint taken of a file, persisted as JSON next to the settings.
+
+    Safe to use from several threads. forget() starts a new generation; a
+    save() that names an older generation is dropped, so a fingerprint taken
+    before a write cannot replace the one taken after it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._cached: Optional[Fingerprint] = None
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def load(self) -> Optional[Fingerprint]:
+        with self._lock:
+            return self._load_locked()
+
+    def _load_locked(self) -> Optional[Fingerprint]:
+        if self._cached is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._cached = Fingerprint.from_dict(json.load(f))
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logger.error("Failed to read fingerprint %s: %s", self.path, e)
+                return None
+        return self._cached
+
+    def save(self, fp: Fingerprint, generation: Optional[int] = None) -> bool:
+        """Store fp; with a generation, only if forget() was not called since. Returns whether it was stored."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write(self.path, json.dumps(fp.to_dict()).encode("utf-8"))
+                self._cached = fp
+                return True
+            except OSError as e:
+                logger.error("Failed to save fingerprint %s: %s", self.path, e)
+                return False
+
+    def is_current(self, path: str | Path) -> bool:
+        """True if the file is unchanged since the stored fingerprint, judged by stat alone."""
+        fp = self.load()
+        return fp is not None and fp.signature is not None and fp.signature == stat_signature(path)
+
+    def changes(self, path: str | Path) -> Optional[list[tuple[int, int, int, int]]]:
+        """Byte ranges that changed since the stored fingerprint ([] if none, None if no fingerprint).
+
+        A file whose stat still matches costs nothing; otherwise it is read
+        once and only chunk digests are compared. The stored fingerprint is
+        kept as the reference, only its signature is refreshed when the
+        content turns out to be unchanged (e.g. after a touch).
+        """
+        with self._lock:
+            old = self._load_locked()
+            generation = self.generation
+        if old is None:
+            return None
+        if old.signature is not None and old.signature == stat_signature(path):
+            return []
+        new = fingerprint_file(path)
+        if new.root == old.root:
+            self.save(new, generation)
+            return []
+        return changed_ranges(old, new)
+
+    def forget(self) -> int:
+        """Drop the stored fingerprint and return the new generation."""
+        with self._lock:
+            self.generation += 1
+            self._cached = None
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error("Failed to remove fingerprint %s: %s", self.path, e)
+            return self.generation
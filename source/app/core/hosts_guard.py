@@ -0,0 +1,130 @@
+import os
+import time as _time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+from app.core.constants import HOSTS_PATH
+from app.core.hosts_detect import MarkerScan
+from app.core.logger import logger
+
+if TYPE_CHECKING:
+    from app.core.hosts_manager import HostsManager
+
+
+@dataclass(frozen=True)
+class GuardResult:
+    """Outcome of one guard check.
+
+    status is one of "ok", "not_installed", "throttled", "busy", "healed",
+    "failed" or "gave_up". "busy" means another hosts write was in progress.
+    """
+    status: str
+    detail: str = ""
+
+
+class HostsGuard:
+    """Opt-in watchdog that puts the provider list back when something reverts hosts.
+
+    The reference is the content the app last meant to write (the journal's
+    applied copy), so healing needs no download. hosts counts as reverted
+    when that copy carries a provider's marker and hosts lost it, or when
+    hosts shrank below `min_size_ratio` of it. Checks closer together than
+    `min_interval` are skipped, and after `max_heals` heals within `window`
+    seconds the guard gives up until reset(), so it does not fight a tool
+    that keeps restoring its own hosts.
+    """
+
+    def __init__(
+        self,
+        manager: "HostsManager",
+        max_heals: int = 3,
+        window: float = 600.0,
+        min_interval: float = 5.0,
+        min_size_ratio: float = 0.9,
+        clock: Callable[[], float] = _time.monotonic,
+    ):
+        self.manager = manager
+        self.max_heals = max_heals
+        self.window = window
+        self.min_interval = min_interval
+        self.min_size_ratio = min_size_ratio
+        self._clock = clock
+        self._heals: list[float] = []
+        self._last_check: Optional[float] = None
+        self._gave_up = False
+        self._provider_cache: Optional[tuple[tuple, Optional[str]]] = None
+
+    @property
+    def gave_up(self) -> bool:
+        return self._gave_up
+
+    def reset(self):
+        """Re-arm after giving up, e.g. once the user installed again."""
+        self._heals.clear()
+        self._last_check = None
+        self._gave_up = False
+
+    def _artifact_provider(self, path: str, st: os.stat_result) -> Optional[str]:
+        key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if self._provider_cache and self._provider_cache[0] == key:
+            return self._provider_cache[1]
+        with MarkerScan(path) as scan:
+            provider = scan.provider()
+        self._provider_cache = (key, provider)
+        return provider
+
+    def reverted(self) -> Optional[str]:
+        """Why hosts no longer holds the installed provider list, or None if it still does."""
+        artifact = str(self.manager.journal.applied_path)
+        try:
+            artifact_st = os.stat(artifact)
+            provider = self._artifact_provider(artifact, artifact_st)
+        except OSError:
+            return None
+        if provider is None:
+            return None
+        try:
+            size = os.stat(HOSTS_PATH).st_size
+        except OSError:
+            return "hosts file is missing"
+        if not self.manager.is_installed(provider):
+            return f"{provider} entries are gone"
+        if size < artifact_st.st_size * self.min_size_ratio:
+            return f"hosts shrank to {size} of {artifact_st.st_size} bytes"
+        return None
+
+    def check(self) -> GuardResult:
+        """Heal hosts if it was reverted. Blocking; run it off the GUI thread."""
+        if self._gave_up:
+            return GuardResult("gave_up")
+        now = self._clock()
+        if self._last_check is not None and now - self._last_check < self.min_interval:
+            return GuardResult("throttled")
+        # Never queue behind (or race) a write the user started; check later.
+        if not self.manager.write_lock.acquire(blocking=False):
+            return GuardResult("busy")
+        try:
+            return self._check_locked(now)
+        finally:
+            self.manager.write_lock.release()
+
+    def _check_locked(self, now: float) -> GuardResult:
+        self._last_check = now
+        reason = self.reverted()
+        if reason is None:
+            return GuardResult("ok" if self.manager.journal.applied_path.exists() else "not_installed")
+
+        self._heals = [t for t in self._heals if now - t < self.window]
+        if len(self._heals) >= self.max_heals:
+            self._gave_up = True
+            logger.warning("hosts keeps being reverted (%s); guard stops re-applying", reason)
+            return GuardResult("gave_up", reason)
+        self._heals.append(now)
+
+        logger.warning("hosts was reverted (%s); re-applying", reason)
+        try:
+            # Unattended: a direct write or a running helper, never a prompt.
+            self.manager.reapply_last("guard", interactive=False)
+        except (PermissionError, RuntimeError) as e:
+            logger.error("Guard could not re-apply hosts: %s", e)
+            return GuardResult("failed", str(e))
+        return GuardResult("healed", reason)
@@ -0,0 +1,182 @@
+import os
+import json
+import threading
+import time as _time
+import uuid
+from dataclasses import dataclass, asdict, replace
+from pathlib import Path
+from typing import Optional
+from app.core.logger import logger
+from app.utils.file_ops import atomic_write, clone_file, normalized_file_digest
+from app.utils.helpers import safe_remove
+
+_TXN_PREFIX = "txn-"
+_PREV_PREFIX = "prev-"
+_HISTORY_FILE = "history.json"
+_APPLIED_FILE = "applied.hosts"
+
+
+@dataclass(frozen=True)
+class JournalEntry:
+    """One hosts transaction.
+
+    prev_digest/new_digest are NormalizedDigest values of hosts before and
+    after; prev_copy holds the previous content (None when there was no hosts
+    file). It is either the journal's own clone or, when owns_prev_copy is
+    False, a backup file the journal must not delete. temp_files and
+    dns_stopped record side effects that recovery has to clean up if the
+    process dies mid-write.
+    """
+    id: str
+    action: str
+    timestamp: float
+    prev_digest: Optional[str]
+    new_digest: str
+    prev_copy: Optional[str] = None
+    temp_files: tuple[str, ...] = ()
+    dns_stopped: bool = False
+    undoes: Optional[str] = None
+    owns_prev_copy: bool = True
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "JournalEntry":
+        data = dict(data)
+        data["temp_files"] = tuple(data.get("temp_files", ()))
+        names = cls.__dataclass_fields__.keys()
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+class HostsJournal:
+    """Write-ahead journal for hosts writes.
+
+    begin() durably records the intent (txn-<id>.json) before anything
+    touches hosts, pointing at a copy of the current content: the backup the
+    caller just made when there is one, otherwise a clone next to the
+    journal. commit() moves the entry into history.json once the new content
+    verified, abort() drops it. Entries still in flight after a crash are
+    returned by pending(). history.json keeps the last `keep` commits with
+    their previous content, so undoing the latest change is a lookup rather
+    than a backup scan.
+    """
+
+    def __init__(self, directory: Path, keep: int = 10):
+        self.directory = Path(directory)
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def _txn_path(self, txn_id: str) -> Path:
+        return self.directory / f"{_TXN_PREFIX}{txn_id}.json"
+
+    def _write_json(self, path: Path, data):
+        atomic_write(path, json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    def _load_history(self) -> list[JournalEntry]:
+        try:
+            with open(self.directory / _HISTORY_FILE, "r", encoding="utf-8") as f:
+                return [JournalEntry.from_dict(e) for e in json.load(f)]
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error("Failed to read hosts journal history: %s", e)
+            return []
+
+    def _store_history(self, entries: list[JournalEntry]):
+        self._write_json(self.directory / _HISTORY_FILE, [asdict(e) for e in entries])
+
+    def begin(self, action: str, hosts_path: Path, new_digest: str,
+              backup: Optional[Path] = None) -> JournalEntry:
+        """Record the intent to replace hosts_path with content of new_digest. Raises OSError.
+
+        `backup` is a file already holding the current content; it is
+        referenced instead of cloned and left in place by commit and abort.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        txn_id = f"{_time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        prev_copy = prev_digest = None
+        owns_prev_copy = backup is None
+        if os.path.exists(hosts_path):
+            if backup is not None:
+                prev_copy = str(backup)
+            else:
+                prev_copy = str(self.directory / f"{_PREV_PREFIX}{txn_id}.hosts")
+                clone_file(hosts_path, prev_copy)
+            prev_digest = normalized_file_digest(prev_copy)
+        entry = JournalEntry(
+            txn_id, action, _time.time(), prev_digest, new_digest, prev_copy, owns_prev_copy=owns_prev_copy,
+        )
+        self._write_json(self._txn_path(txn_id), asdict(entry))
+        return entry
+
+    @staticmethod
+    def _drop_prev_copy(entry: JournalEntry):
+        if entry.prev_copy and entry.owns_prev_copy:
+            safe_remove(entry.prev_copy)
+
+    def note(self, entry: JournalEntry, **changes) -> JournalEntry:
+        """Durably add side effects (temp_files, dns_stopped) to an in-flight entry."""
+        entry = replace(entry, **changes)
+        try:
+            self._write_json(self._txn_path(entry.id), asdict(entry))
+        except OSError as e:
+            logger.debug("Failed to update hosts journal entry %s: %s", entry.id, e)
+        return entry
+
+    def commit(self, entry: JournalEntry):
+        """Mark the entry applied. An undo entry removes the entry it undid instead of adding itself."""
+        with self._lock:
+            history = self._load_history()
+            if entry.undoes:
+                dropped = [e for e in history if e.id == entry.undoes]
+                history = [e for e in history if e.id != entry.undoes]
+                self._drop_prev_copy(entry)
+            else:
+                history.append(replace(entry, temp_files=(), dns_stopped=False))
+                dropped = history[:-self.keep] if len(history) > self.keep else []
+                history = history[-self.keep:]
+            self._store_history(history)
+            for old in dropped:
+                self._drop_prev_copy(old)
+            safe_remove(str(self._txn_path(entry.id)))
+
+    def abort(self, entry: JournalEntry):
+        """Forget an entry whose write did not happen."""
+        self._drop_prev_copy(entry)
+        safe_remove(str(self._txn_path(entry.id)))
+
+    def pending(self) -> list[JournalEntry]:
+        """Entries that were begun but neither committed nor aborted, oldest first."""
+        entries = []
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.startswith(_TXN_PREFIX))
+        except OSError:
+            return []
+        for name in names:
+            try:
+                with open(self.directory / name, "r", encoding="utf-8") as f:
+                    entries.append(JournalEntry.from_dict(json.load(f)))
+            except Exception as e:
+                logger.error("Unreadable hosts journal entry %s: %s", name, e)
+        return entries
+
+    @property
+    def applied_path(self) -> Path:
+        """Copy of the hosts content the app last wrote; the base for a three-way merge."""
+        return self.directory / _APPLIED_FILE
+
+    def record_applied(self, source: Path | str | bytes):
+        """Remember the content the app meant to write (a file or bytes), before any merge."""
+        tmp = self.directory / f"{_APPLIED_FILE}.tmp"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if isinstance(source, bytes):
+                atomic_write(self.applied_path, source)
+                return
+            clone_file(source, tmp)
+            os.replace(tmp, self.applied_path)
+        except OSError as e:
+            logger.error("Failed to keep a copy of the applied hosts: %s", e)
+            safe_remove(str(tmp))
+
+    def last_committed(self) -> Optional[JournalEntry]:
+        history = self._load_history()
+        return history[-1] if history else None
@@ -1,40 +1,156 @@
 import os
 import sys
+import errno
+import json
 import threading
 import tempfile
 import subprocess
-import shutil
 import time as _time
 import re as _re
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable, Iterator, Optional
 from app.core.logger import logger
 from app.core.constants import (
-    HOSTS_PATH, HOSTS_BACKUP_DIR, HOSTS_BACKUP_PREFIX
+    HOSTS_PATH, HOSTS_BACKUP_DIR, HOSTS_BACKUP_PREFIX, HOSTS_BACKUP_INDEX_PATH,
+    HOSTS_JOURNAL_DIR, HOSTS_FINGERPRINT_PATH,
 )
 from app.core.http_client import HttpClient
 from app.utils.helpers import (
     is_windows_admin, safe_remove, sanitize_backup_action,
     extract_update_line
 )
+from app.utils.file_ops import (
+    clone_file, atomic_write, atomic_install, NormalizedDigest, normalized_file_digest
+)
+from app.core.backup_index import BackupSearchIndex
+from app.core.hosts_parser import looks_like_hosts
+from app.core.hosts_pipeline import convert_newlines, stream_to_file
+from app.core.dns_flush import flush_dns, flush_shell_command
+from app.core.privileged_helper import PrivilegedHelperClient, HelperError
+from app.core.settings import get_setting
+from app.core.capabilities import get_capabilities
+from app.core.waits import wait_until
+from app.core.orchestrator import Step, run_steps
+from app.core.hosts_merge import MergeConflict, MergeResult, merge3
+from app.core.hosts_transaction import HostsTransaction
+from app.core.hosts_journal import HostsJournal, JournalEntry
+from app.core.hosts_detect import MarkerScan, ScanMemo, SignatureReport, provider_signatures
+from app.core.hosts_fingerprint import FingerprintStore, fingerprint_file, stat_signature
+from app.core.write_strategies import WriteStrategy, StrategyMemory, run_strategies
 
 # Pre-compile regex for performance
 _IP_RE = _re.compile(r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$")
 
+# Write errors worth retrying: the file is briefly held open by an antivirus
+# scanner, indexer or editor. Access denied and the like fail at once.
+_TRANSIENT_WINERRORS = (32, 33)  # ERROR_SHARING_VIOLATION, ERROR_LOCK_VIOLATION
+_TRANSIENT_ERRNOS = (errno.EBUSY, errno.ETXTBSY, errno.EAGAIN, errno.EINTR)
+
+
+def _is_transient_write_error(e: OSError) -> bool:
+    if getattr(e, "winerror", None) is not None:
+        return e.winerror in _TRANSIENT_WINERRORS
+    return e.errno in _TRANSIENT_ERRNOS
+
+
+_LEGACY_BACKUP_HEADER = "# Goida AI Unlocker hosts backup"
+_DEFAULT_BACKUP_CONTENT = b"# Initial hosts file\n127.0.0.1       localhost\n::1             localhost\n"
+
+_BACKUP_NAME_RE = _re.compile(
+    r"^" + _re.escape(HOSTS_BACKUP_PREFIX) + r"(?P<action>.+)_(?P<stamp>\d{8}_\d{6})_(?P<usec>\d{6})\.txt$",
+    _re.IGNORECASE,
+)
+
 @dataclass(frozen=True)
 class HostsStatusResult:
     key: str
     color: str
     date: str
 
+@dataclass(frozen=True)
+class BackupInfo:
+    path: Path
+    action: str
+    timestamp: float
+
+    @property
+    def sort_key(self) -> tuple[float, str]:
+        """Backups list newest first by this key, descending; the name breaks timestamp ties."""
+        return (self.timestamp, self.path.name)
+
+@dataclass
+class _InstallJob:
+    """State shared by the write strategies of one _install() call."""
+    expected_digest: str
+    data: Optional[bytes] = None
+    staged_path: Optional[str] = None
+    temp_path: Optional[str] = None
+    ps_script_path: Optional[str] = None
+    dns_stopped: bool = False
+    elevated: bool = False
+    uac_denied: bool = False
+    interactive: bool = True
+    journal: Optional[HostsJournal] = None
+    entry: Optional[JournalEntry] = None
+
+    def note(self, **changes):
+        """Record a side effect in the journal so recovery can undo it after a crash."""
+        if self.journal is not None and self.entry is not None:
+            self.entry = self.journal.note(self.entry, **changes)
+
+    def add_temp_file(self, path: str):
+        self.note(temp_files=(self.entry.temp_files if self.entry else ()) + (path,))
+
+    def write(self) -> str:
+        target = HOSTS_PATH.resolve()
+        if self.data is not None:
+            return atomic_write(target, self.data)
+        return atomic_install(self.staged_path, target)
+
+    def source(self) -> str:
+        """A file holding the content, for methods that run in another (elevated) process."""
+        if self.data is None:
+            return self.staged_path
+        if self.temp_path is None:
+            fd, self.temp_path = tempfile.mkstemp()
+            self.add_temp_file(self.temp_path)
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.data)
+        return self.temp_path
+
+    def content(self) -> bytes:
+        return self.data if self.data is not None else Path(self.staged_path).read_bytes()
+
 class HostsManager:
     def __init__(self):
         self._cache: Optional[tuple[float, str]] = None
+        self._cache_generation = 0
         self._lock = threading.Lock()
+        # Serializes hosts writes: held by _install() and, for a whole action
+        # (backup, merge, write), by HostsWorker; the guard only tries it.
+        self.write_lock = threading.RLock()
         self.backup_failed: bool = False
+        self.backup_index = BackupSearchIndex(HOSTS_BACKUP_INDEX_PATH)
+        self._helper: Optional[PrivilegedHelperClient] = None
+        self.write_strategy_memory = StrategyMemory("hosts_write_strategy")
+        self.journal = HostsJournal(HOSTS_JOURNAL_DIR)
+        self.last_merge_conflicts: list[MergeConflict] = []
+        self.last_merge_kept: int = 0
+        self._watched = False
+        self._last_written_digest: Optional[str] = None
+        self.fingerprints = FingerprintStore(HOSTS_FINGERPRINT_PATH)
+        self._markers: Optional[tuple[tuple, ScanMemo]] = None
+        self._last_backup_stamp = 0
+        # (path, hosts stat signature) of the last backup; the next journal entry reuses it.
+        self._fresh_backup: Optional[tuple[Path, Optional[tuple]]] = None
 
     def read(self) -> str:
+        with self._lock:
+            # A file watcher invalidates the cache on change, so no stat is needed.
+            if self._watched and self._cache is not None:
+                return self._cache[1]
+            generation = self._cache_generation
         if not HOSTS_PATH.exists():
             return ""
         try:
@@ -45,7 +161,10 @@ class HostsManager:
             
             content = HOSTS_PATH.read_text(encoding="utf-8", errors="ignore")
             with self._lock:
-                self._cache = (mtime, content)
+                # An invalidation during the read means content may already be
+                # stale; with a watcher nothing would re-check it, so don't keep it.
+                if generation == self._cache_generation:
+                    self._cache = (mtime, content)
             return content
         except Exception as e:
             logger.error("Failed to read hosts: %s", e)
@@ -54,23 +173,107 @@ class HostsManager:
     def invalidate_cache(self):
         with self._lock:
             self._cache = None
+            self._cache_generation += 1
+
+    def set_watched(self, watched: bool):
+        """Tell read() a file watcher calls invalidate_cache() on every change."""
+        with self._lock:
+            self._watched = watched
+            self._cache = None
+            self._cache_generation += 1
+
+    def is_external_change(self) -> bool:
+        """True unless hosts still holds exactly what this app last wrote."""
+        ranges = self.changed_regions()
+        if ranges is not None:
+            return bool(ranges)
+        if self._last_written_digest is None:
+            return True
+        return not self._verify_applied_digest(self._last_written_digest)
+
+    def changed_regions(self) -> Optional[list[tuple[int, int, int, int]]]:
+        """Byte ranges of hosts that differ from the app's last write, or None if unknown.
+
+        Ranges are (old_start, old_end, new_start, new_end). Our own write
+        echoing back through the watcher is recognised from a stat alone.
+        """
+        try:
+            ranges = self.fingerprints.changes(HOSTS_PATH)
+        except OSError as e:
+            logger.error("Failed to fingerprint hosts: %s", e)
+            return None
+        if ranges:
+            logger.info(
+                "Hosts changed outside the app: %d region(s), %d bytes",
+                len(ranges), sum(new_end - new_start for _, _, new_start, new_end in ranges),
+            )
+        return ranges
+
+    def _refresh_fingerprint(self):
+        """Fingerprint what was just written, in the background so the write returns at once."""
+        generation = self.fingerprints.forget()
+
+        def run():
+            try:
+                # Dropped if a newer write has started its own fingerprint meanwhile.
+                self.fingerprints.save(fingerprint_file(HOSTS_PATH), generation)
+            except OSError as e:
+                logger.error("Failed to fingerprint hosts: %s", e)
+
+        threading.Thread(target=run, name="hosts-fingerprint", daemon=True).start()
+
+    def _marker_scan(self) -> MarkerScan:
+        """A MarkerScan of hosts that reuses earlier answers while the file is unchanged."""
+        scan = MarkerScan(HOSTS_PATH, provider_signatures)
+        key = (scan.signature, provider_signatures.generation)
+        with self._lock:
+            if self._markers is not None and self._markers[0] == key:
+                scan.memo = self._markers[1]
+            else:
+                self._markers = (key, scan.memo)
+        return scan
 
     def is_installed(self, provider: str = "") -> bool:
-        content = self.read()
-        if provider == "geohide":
-            return "dns.geohide.ru" in content
-        elif provider == "dns.malw.link":
-            return "dns.malw.link" in content and "dns.geohide.ru" not in content
-        else:
-            return "dns.malw.link" in content or "dns.geohide.ru" in content
+        """Whether provider's list is in hosts and no higher-priority provider's is.
+
+        With no provider, whether any registered provider's list is there.
+        """
+        try:
+            with self._marker_scan() as scan:
+                if not provider:
+                    return scan.any_provider()
+                return scan.provider() == provider
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.error("Failed to read hosts: %s", e)
+            return False
+
+    def provider_report(self) -> Optional[SignatureReport]:
+        """Every registered provider in hosts with its line range and overlaps, None on error."""
+        try:
+            with self._marker_scan() as scan:
+                return scan.report()
+        except FileNotFoundError:
+            return SignatureReport()
+        except OSError as e:
+            logger.error("Failed to read hosts: %s", e)
+            return None
+
+    def detect_provider(self) -> str:
+        """The provider whose list is in hosts, "dns.malw.link" if neither is."""
+        try:
+            with self._marker_scan() as scan:
+                return scan.provider() or "dns.malw.link"
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error("Failed to read hosts: %s", e)
+        return "dns.malw.link"
 
     @staticmethod
-    def validate_content(content: str) -> bool:
-        if "localhost" in content:
-            return True
-        if _re.search(r"^\s*\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\s+\S+", content, _re.MULTILINE):
-            return True
-        return False
+    def validate_content(content: str | bytes) -> bool:
+        return looks_like_hosts(content)
 
     def _get_backup_dirs(self) -> list[Path]:
         dirs = []
@@ -100,121 +303,251 @@ class HostsManager:
             pass
         return dirs
 
-    def backup(self, action: str) -> Optional[Path]:
-        data = None
-        if HOSTS_PATH.exists():
-            try:
-                data = HOSTS_PATH.read_bytes()
-            except Exception as e:
-                logger.error("Backup read bytes error: %s", e)
-                try:
-                    data = HOSTS_PATH.read_text(encoding="utf-8", errors="ignore").encode("utf-8")
-                except Exception as e2:
-                    logger.error("Backup read text error: %s", e2)
+    @staticmethod
+    def backup_metadata_path(backup_path: Path) -> Path:
+        return backup_path.with_suffix(".json")
 
-        if data is None:
-            if HOSTS_PATH.exists():
+    def backup(self, action: str) -> Optional[Path]:
+        helper_data: Optional[bytes] = None
+        if HOSTS_PATH.exists() and not os.access(HOSTS_PATH, os.R_OK):
+            helper_data = self._read_hosts_via_helper()
+            if helper_data is None:
                 # hosts exists but is unreadable — do NOT substitute a fake file,
                 # otherwise restore() would overwrite the user's real hosts with a stub.
                 logger.error("Cannot backup: hosts file exists but is unreadable")
                 return None
-            # hosts genuinely missing — backup a minimal default so restore() has something
-            data = b"# Initial hosts file\n127.0.0.1       localhost\n::1             localhost\n"
 
+        stamp = self._next_backup_stamp()
+        secs, usec = divmod(stamp, 1_000_000)
+        ts = _time.strftime("%Y%m%d_%H%M%S", _time.localtime(secs))
         dirs_to_try = self._get_backup_dirs()
         last_error = None
         for backup_dir in dirs_to_try:
+            path = None
             try:
                 backup_dir.mkdir(parents=True, exist_ok=True)
                 tag = sanitize_backup_action(action)
-                ts = _time.strftime("%Y%m%d_%H%M%S")
-                try:
-                    ns = _time.time_ns() % 1_000_000
-                except (AttributeError, NotImplementedError):
-                    ns = int((_time.time() * 1_000_000) % 1_000_000)
-
-                name = f"{HOSTS_BACKUP_PREFIX}{tag}_{ts}_{ns:06d}.txt"
+                name = f"{HOSTS_BACKUP_PREFIX}{tag}_{ts}_{usec:06d}.txt"
                 path = backup_dir / name
-                created = _time.strftime("%Y-%m-%d %H:%M:%S")
-                header = (
-                    f"# Goida AI Unlocker hosts backup\n"
-                    f"# action {tag}\n"
-                    f"# created_at {created}\n"
-                    f"# source {HOSTS_PATH}\n\n"
-                ).encode("utf-8")
-                path.write_bytes(header + data)
+                if helper_data is not None:
+                    path.write_bytes(helper_data)
+                    method = "helper"
+                elif HOSTS_PATH.exists():
+                    # Clone instead of read+write: reflink/copy_file_range keep the
+                    # data in the kernel, so large hosts files cost next to nothing.
+                    method = clone_file(HOSTS_PATH, path)
+                else:
+                    # hosts genuinely missing — backup a minimal default so restore() has something
+                    path.write_bytes(_DEFAULT_BACKUP_CONTENT)
+                    method = "default"
+
+                meta = {
+                    "action": tag,
+                    "created_at": _time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "source": str(HOSTS_PATH),
+                    "size": path.stat().st_size,
+                    "method": method,
+                }
+                try:
+                    self.backup_metadata_path(path).write_text(
+                        json.dumps(meta, ensure_ascii=False), encoding="utf-8"
+                    )
+                except Exception as e:
+                    logger.warning("Failed to write backup metadata for %s: %s", path, e)
+                self._index_backup_async(BackupInfo(path, tag, stamp / 1_000_000))
+                if method != "default":
+                    self._fresh_backup = (path, stat_signature(HOSTS_PATH))
                 return path
             except Exception as e:
                 logger.error("Backup attempt failed for %s: %s", backup_dir, e)
                 last_error = e
+                if path is not None:
+                    safe_remove(str(path))
 
         if last_error:
             logger.error("All backup attempts failed: %s", last_error)
         return None
 
-    def get_backups_list(self) -> list[Path]:
-        dirs_to_check = self._get_backup_dirs()
-        all_files = []
+    def _next_backup_stamp(self) -> int:
+        """Microseconds since the epoch for a new backup name, strictly increasing.
+
+        Names are the only ordering list_backups() has, so two backups taken
+        within the same microsecond (or across a clock step back) still sort
+        in the order they were made.
+        """
+        with self._lock:
+            stamp = max(_time.time_ns() // 1000, self._last_backup_stamp + 1)
+            self._last_backup_stamp = stamp
+        return stamp
+
+    def _index_backup_async(self, info: "BackupInfo"):
+        """Add a fresh backup to the search index without delaying the caller."""
+        threading.Thread(target=self.backup_index.add, args=(info,), daemon=True).start()
+
+    def sync_backup_index(self) -> int:
+        """Index backups the search index has not seen yet and drop deleted ones."""
+        return self.backup_index.sync_entries(self.iter_backups())
+
+    def read_backup_metadata(self, backup_path: Path) -> dict:
+        """Return the sidecar metadata of a backup, or {} for legacy/missing records."""
+        try:
+            return json.loads(self.backup_metadata_path(backup_path).read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    @classmethod
+    def backup_content_offset(cls, backup_path: Path) -> int:
+        """Byte offset at which hosts content starts inside a backup file (skips the legacy header)."""
+        try:
+            with open(backup_path, "rb") as f:
+                head = f.read(1024)
+        except OSError:
+            return 0
+        return cls._legacy_header_end(head)
+
+    @staticmethod
+    def _legacy_header_end(head: bytes) -> int:
+        if not head.startswith(_LEGACY_BACKUP_HEADER.encode("utf-8")):
+            return 0
+        pos = 0
+        for _ in range(5):
+            nl = head.find(b"\n", pos)
+            if nl == -1:
+                return 0
+            pos = nl + 1
+        return pos
+
+    @classmethod
+    def read_backup_content(cls, backup_path: Path) -> bytes:
+        """Return the raw hosts bytes stored in a backup.
+
+        Older backups carry an inline 5-line header; it is stripped here so
+        callers always get the original hosts content.
+        """
+        data = backup_path.read_bytes()
+        offset = cls._legacy_header_end(data[:1024])
+        return data[offset:] if offset else data
+
+    def iter_backups(self):
+        """Yield BackupInfo for every backup file, unsorted.
+
+        Uses os.scandir and takes the timestamp from the file name, so no
+        per-file stat is needed except for foreign-named files.
+        """
         seen_names = set()
-        for backup_dir in dirs_to_check:
-            if backup_dir.is_dir():
-                try:
-                    for f in backup_dir.iterdir():
+        for backup_dir in self._get_backup_dirs():
+            try:
+                with os.scandir(backup_dir) as it:
+                    for entry in it:
+                        name = entry.name
+                        lower = name.lower()
                         if (
-                            f.is_file()
-                            and f.name.lower().startswith(HOSTS_BACKUP_PREFIX)
-                            and f.name.lower().endswith(".txt")
-                            and f.name not in seen_names
+                            not lower.startswith(HOSTS_BACKUP_PREFIX)
+                            or not lower.endswith(".txt")
+                            or name in seen_names
+                            or not entry.is_file()
                         ):
-                            seen_names.add(f.name)
-                            all_files.append(f)
-                except Exception as e:
-                    logger.debug("Failed to list backups in %s: %s", backup_dir, e)
+                            continue
+                        seen_names.add(name)
+                        info = self._parse_backup_entry(entry)
+                        if info is not None:
+                            yield info
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.debug("Failed to list backups in %s: %s", backup_dir, e)
 
-        all_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-        return all_files
+    @staticmethod
+    def _parse_backup_entry(entry: os.DirEntry) -> Optional["BackupInfo"]:
+        m = _BACKUP_NAME_RE.match(entry.name)
+        if m:
+            try:
+                ts = _time.mktime(_time.strptime(m.group("stamp"), "%Y%m%d_%H%M%S"))
+                ts += int(m.group("usec")) / 1_000_000
+                return BackupInfo(Path(entry.path), m.group("action").lower(), ts)
+            except (ValueError, OverflowError):
+                pass
+        try:
+            return BackupInfo(Path(entry.path), "manual", entry.stat().st_mtime)
+        except OSError:
+            return None
+
+    def list_backups(self) -> list["BackupInfo"]:
+        """Return all backups, newest first (by name on equal timestamps, e.g. legacy backups)."""
+        return sorted(self.iter_backups(), key=lambda b: b.sort_key, reverse=True)
+
+    def get_backups_list(self) -> list[Path]:
+        return [b.path for b in self.list_backups()]
 
     def get_latest_backup(self) -> Optional[Path]:
         files = self.get_backups_list()
         return files[0] if files else None
 
-    @staticmethod
-    def _normalize_hosts_content(text: str) -> str:
-        return text.replace("\r\n", "\n").replace("\r", "\n").rstrip()
+    def _verify_applied_digest(self, expected_digest: str) -> bool:
+        """Check hosts against the NormalizedDigest of the content we meant to write.
 
-    def _verify_applied_content(self, expected_content: str) -> bool:
+        One sequential chunked read with constant memory; line endings and
+        trailing whitespace are ignored, so shell fallbacks that rewrite
+        newlines still verify.
+        """
         try:
-            actual_content = HOSTS_PATH.read_text(encoding="utf-8", errors="ignore")
+            return normalized_file_digest(HOSTS_PATH) == expected_digest
         except Exception as e:
             logger.error("Failed to read hosts for verification: %s", e)
             return False
-        return self._normalize_hosts_content(actual_content) == self._normalize_hosts_content(expected_content)
 
-    def _try_direct_copy(self, temp_path: str, content: str, retries: int = 3) -> bool:
-        """Try direct file copy with retries. Returns True on success, raises on final failure."""
+    def _await_applied(self, expected_digest: str, stage: str, timeout: float = 1.0) -> bool:
+        """Wait until hosts holds the expected content, polling with backoff.
+
+        Succeeds on the first check when the write has already landed, so the
+        common case costs no extra wait; a write that never lands gives up
+        after `timeout` seconds.
+        """
+        self.invalidate_cache()
+        return wait_until(lambda: self._verify_applied_digest(expected_digest), timeout, stage)
+
+    def _try_direct_write(self, write: Callable[[], str], expected_digest: str, timeout: float = 1.5) -> bool:
+        """Try an atomic write of hosts until it sticks or `timeout` passes. Raises on final failure.
+
+        `write` performs the write (atomic_write/atomic_install) and returns the method used.
+        A transient lock (antivirus, indexer) is retried with a short, growing interval
+        instead of a fixed pause; any other OSError, e.g. access denied, is raised at
+        once since retrying cannot fix it. DNS is flushed once, after the content verified.
+        """
         last_err = None
-        for attempt in range(retries):
+
+        def attempt() -> bool:
+            nonlocal last_err
             try:
-                shutil.copy(temp_path, HOSTS_PATH)
-                if sys.platform == "win32":
-                    subprocess.run(["ipconfig", "/flushdns"], creationflags=subprocess.CREATE_NO_WINDOW, timeout=10)
-                else:
-                    self._flush_dns()
-                self.invalidate_cache()
-                if self._verify_applied_content(content):
-                    return True
-                last_err = RuntimeError("Verification failed: content mismatch after write")
-                logger.debug("Direct copy attempt %d: verification failed", attempt + 1)
-            except (PermissionError, OSError) as e:
+                method = write()
+                logger.debug("Hosts written (%s)", method)
+            except OSError as e:
+                logger.debug("Direct write failed: %s", e)
+                if not _is_transient_write_error(e):
+                    raise
                 last_err = e
-                logger.debug("Direct copy attempt %d failed: %s", attempt + 1, e)
-            if attempt < retries - 1:
-                _time.sleep(0.5)
+                return False
+            if self._verify_applied_digest(expected_digest):
+                return True
+            last_err = RuntimeError("Verification failed: content mismatch after write")
+            logger.debug("Direct write: verification failed")
+            return False
+
+        try:
+            ok = wait_until(attempt, timeout, "direct_write", initial=0.05, max_interval=0.5)
+        finally:
+            self.invalidate_cache()
+        if ok:
+            if sys.platform == "win32":
+                subprocess.run(["ipconfig", "/flushdns"], creationflags=subprocess.CREATE_NO_WINDOW, timeout=10)
+            else:
+                self._flush_dns()
+            return True
         if last_err:
             raise last_err
         return False
 
-    def _try_cmd_copy(self, temp_path: str, content: str) -> bool:
+    def _try_cmd_copy(self, temp_path: str, expected_digest: str) -> bool:
         """Fallback: use cmd /c copy on Windows."""
         try:
             r = subprocess.run(
@@ -223,16 +556,13 @@ class HostsManager:
                 timeout=30,
                 capture_output=True,
             )
-            if r.returncode == 0:
-                _time.sleep(0.2)
-                self.invalidate_cache()
-                if self._verify_applied_content(content):
-                    return True
+            if r.returncode == 0 and self._await_applied(expected_digest, "cmd_copy"):
+                return True
         except Exception:
             pass
         return False
 
-    def _try_cmd_type(self, temp_path: str, content: str) -> bool:
+    def _try_cmd_type(self, temp_path: str, expected_digest: str) -> bool:
         """Fallback: use cmd /c type to overwrite hosts (bypasses some copy locks)."""
         try:
             r = subprocess.run(
@@ -242,48 +572,33 @@ class HostsManager:
                 capture_output=True,
                 shell=True,
             )
-            if r.returncode == 0:
-                _time.sleep(0.2)
-                self.invalidate_cache()
-                if self._verify_applied_content(content):
-                    return True
+            if r.returncode == 0 and self._await_applied(expected_digest, "cmd_type"):
+                return True
         except Exception:
             pass
         return False
 
     def _unlock_hosts_windows(self) -> bool:
-        """Aggressively unlock hosts file: stop DNS cache, take ownership, grant full control."""
+        """Aggressively unlock hosts file: stop DNS cache, take ownership, grant full control.
+
+        Independent steps run concurrently; only the ACL changes wait for takeown.
+        """
         hosts_str = str(HOSTS_PATH)
         steps = [
             # Stop DNS Client service (it holds a lock on hosts)
-            ["net", "stop", "dnscache", "/y"],
+            Step("dnscache", ["net", "stop", "dnscache", "/y"]),
             # Take ownership of the file
-            ["takeown", "/f", hosts_str],
+            Step("takeown", ["takeown", "/f", hosts_str]),
             # Grant Administrators full control
-            ["icacls", hosts_str, "/grant", "*S-1-5-32-544:F", "/c"],
+            Step("icacls_admins", ["icacls", hosts_str, "/grant", "*S-1-5-32-544:F", "/c"], after=("takeown",)),
             # Also grant current user full control
-            ["icacls", hosts_str, "/grant", "*S-1-1-0:F", "/c"],
+            Step("icacls_everyone", ["icacls", hosts_str, "/grant", "*S-1-1-0:F", "/c"], after=("icacls_admins",)),
             # Remove read-only attribute via attrib
-            ["attrib", "-R", hosts_str],
+            Step("attrib", ["attrib", "-R", hosts_str]),
             # Also try PowerShell to remove read-only (sometimes more reliable)
-            ["powershell", "-NoProfile", "-Command", f"Set-ItemProperty -Path '{hosts_str}' -Name IsReadOnly -Value $false -ErrorAction SilentlyContinue"],
+            Step("powershell", ["powershell", "-NoProfile", "-Command", f"Set-ItemProperty -Path '{hosts_str}' -Name IsReadOnly -Value $false -ErrorAction SilentlyContinue"]),
         ]
-        any_success = False
-        for cmd in steps:
-            try:
-                r = subprocess.run(
-                    cmd,
-                    creationflags=subprocess.CREATE_NO_WINDOW,
-                    timeout=15,
-                    capture_output=True,
-                )
-                if r.returncode == 0:
-                    any_success = True
-                else:
-                    logger.debug("Unlock step %s returned %d: %s", cmd[0], r.returncode, r.stderr.decode(errors="ignore")[:200])
-            except Exception as e:
-                logger.debug("Unlock step %s failed: %s", cmd[0], e)
-        return any_success
+        return run_steps(steps, deadline=30).any_ok
 
     def _restore_dns_service_windows(self):
         """Restart DNS Client service after hosts modification."""
@@ -297,7 +612,7 @@ class HostsManager:
         except Exception:
             pass
 
-    def _try_winapi_write(self, content: str) -> bool:
+    def _try_winapi_write(self, data: bytes, expected_digest: str) -> bool:
         """Ultimate fallback: write hosts file directly via Windows API (CreateFileW + WriteFile).
         This bypasses most file system filter drivers and sharing violations."""
         if sys.platform != "win32":
@@ -344,7 +659,6 @@ class HostsManager:
                 return False
 
             try:
-                data = content.encode("utf-8")
                 written = wintypes.DWORD(0)
 
                 kernel32.WriteFile.argtypes = [
@@ -369,184 +683,445 @@ class HostsManager:
             finally:
                 kernel32.CloseHandle(handle)
 
-            _time.sleep(0.2)
-            self.invalidate_cache()
-            if self._verify_applied_content(content):
+            if self._await_applied(expected_digest, "winapi_write"):
                 return True
         except Exception as e:
             logger.debug("WinAPI write failed: %s", e)
         return False
 
-    def apply(self, content: str) -> bool:
-        """Apply content to hosts file. Returns True on success, raises RuntimeError on failure."""
-        temp_path: Optional[str] = None
-        ps_script_path: Optional[str] = None
-        dns_stopped = False
+    def apply(self, content: str | bytes, action: str = "apply", base: str | bytes | None = None) -> bool:
+        """Apply content to hosts file. Returns True on success, raises RuntimeError on failure.
+
+        Bytes are not decoded; str is encoded as UTF-8. Either way the content
+        is written with the line endings hosts already uses (the platform's if
+        it has none yet). `base` is the hosts content `content` was derived
+        from (e.g. what the editor loaded); if hosts changed since, those
+        changes are merged in rather than overwritten, see last_merge_conflicts.
+        """
+        if not self.validate_content(content):
+            raise RuntimeError("Hosts content validation failed")
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        data = convert_newlines(data, self._hosts_newline())
+        self.last_merge_conflicts, self.last_merge_kept = [], 0
+        if base is not None:
+            merged = self._merge_external(data, base.encode("utf-8") if isinstance(base, str) else base)
+            if merged is not None:
+                merged_data = merged.to_bytes()
+                return self._install(NormalizedDigest(merged_data).hexdigest(), action, data=merged_data, intended=data)
+        # Computed once; every attempt verifies against it with a single streaming read.
+        return self._install(NormalizedDigest(data).hexdigest(), action, data=data)
 
+    @staticmethod
+    def _hosts_newline() -> bytes:
+        """The line ending of the current hosts file, judged by its first line."""
         try:
-            if not self.validate_content(content):
-                raise RuntimeError("Hosts content validation failed")
+            with open(HOSTS_PATH, "rb") as f:
+                head = f.read(64 << 10)
+        except OSError:
+            return os.linesep.encode("ascii")
+        nl = head.find(b"\n")
+        if nl == -1:
+            return os.linesep.encode("ascii")
+        return b"\r\n" if head[nl - 1:nl] == b"\r" else b"\n"
+
+    def apply_staged(self, staged_path: str, expected_digest: str, action: str = "apply") -> bool:
+        """Install an already written and validated file as hosts without reading it into memory.
+
+        The file is renamed into place when it sits next to hosts, so the
+        caller must treat it as consumed. expected_digest is its
+        NormalizedDigest. Raises like apply().
+        """
+        return self._install(expected_digest, action, staged_path=staged_path, owns_source=True)
+
+    def _merge_external(self, target: str | bytes, base: str | bytes) -> Optional[MergeResult]:
+        """Three-way merge target with external edits made to hosts since base was written.
+
+        target/base are file paths or bytes. Returns None when hosts still
+        matches base (nothing to merge) or cannot be read.
+        """
+        try:
+            base_digest = normalized_file_digest(base) if isinstance(base, str) else NormalizedDigest(base).hexdigest()
+            if not HOSTS_PATH.exists() or self._verify_applied_digest(base_digest):
+                return None
+            result = merge3(base, HOSTS_PATH, target)
+        except OSError as e:
+            logger.debug("Three-way merge skipped: %s", e)
+            return None
+        self.last_merge_conflicts = result.conflicts
+        self.last_merge_kept = result.kept_local
+        logger.info(
+            "Hosts changed outside the app: kept %d external change(s), %d conflict(s)",
+            result.kept_local, len(result.conflicts),
+        )
+        return result
+
+    def can_undo(self) -> bool:
+        """Whether undo_last_change() has an earlier content to go back to."""
+        entry = self.journal.last_committed()
+        return entry is not None and entry.prev_copy is not None and os.path.exists(entry.prev_copy)
+
+    def undo_last_change(self) -> bool:
+        """Put back the hosts content from before the last journaled write.
+
+        Repeated calls step further back through the journal history. Raises
+        RuntimeError when there is nothing to undo or hosts was changed by
+        someone else since, and like apply() when the write fails.
+        """
+        entry = self.journal.last_committed()
+        if entry is None or entry.prev_copy is None or not os.path.exists(entry.prev_copy):
+            raise RuntimeError("Nothing to undo")
+        if not self._verify_applied_digest(entry.new_digest):
+            raise RuntimeError("Hosts file was changed after the last write; undo would discard those changes")
+        return self._install(entry.prev_digest, "undo", staged_path=entry.prev_copy, undoes=entry.id)
+
+    def reapply_last(self, action: str = "reapply", interactive: bool = True) -> bool:
+        """Write again what the app last meant to write, overwriting whatever is there now.
+
+        The current content is backed up first. Raises RuntimeError when
+        nothing was written yet, and like apply() when the write fails. With
+        interactive=False no elevation prompt is shown (see _install()).
+        """
+        with self.write_lock:
+            applied = self.journal.applied_path
+            if not applied.exists():
+                raise RuntimeError("No previously applied hosts content")
+            self.backup_failed = not self.backup(action)
+            return self._install(
+                normalized_file_digest(applied), action, staged_path=str(applied), interactive=interactive,
+            )
 
+    def recover_journal(self) -> int:
+        """Finish or roll back writes interrupted by a crash. Returns how many were resolved.
+
+        Meant for startup: only direct writes are attempted, so it never
+        prompts for elevation. Entries it cannot resolve stay for next time.
+        """
+        resolved = 0
+        for entry in self.journal.pending():
+            logger.warning("Recovering interrupted hosts %s (%s)", entry.action, entry.id)
+            if self._settle_journal_entry(entry):
+                resolved += 1
+        return resolved
+
+    def _settle_journal_entry(self, entry: JournalEntry) -> bool:
+        """Clean up an unfinished entry's side effects, then commit, abort or roll it back.
+
+        Returns False if hosts holds neither the old nor the new content and
+        the old content could not be written back.
+        """
+        for path in entry.temp_files:
+            safe_remove(path)
+        if entry.dns_stopped and sys.platform == "win32":
+            self._restore_dns_service_windows()
+        self.invalidate_cache()
+        try:
+            current = normalized_file_digest(HOSTS_PATH) if HOSTS_PATH.exists() else None
+        except OSError as e:
+            logger.error("Failed to read hosts while settling journal entry: %s", e)
+            return False
+        if current == entry.new_digest:
+            self.journal.commit(entry)
+            self.journal.record_applied(HOSTS_PATH)
+            self._refresh_fingerprint()
+            return True
+        if current == entry.prev_digest or entry.prev_copy is None:
+            self.journal.abort(entry)
+            return True
+        try:
+            atomic_install(entry.prev_copy, HOSTS_PATH.resolve())
+        except OSError as e:
+            logger.warning("Could not roll back hosts to %s: %s", entry.prev_digest, e)
+            return False
+        if not self._verify_applied_digest(entry.prev_digest):
+            return False
+        logger.info("Rolled back interrupted hosts %s", entry.action)
+        self.journal.abort(entry)
+        return True
+
+    def _take_fresh_backup(self) -> Optional[Path]:
+        """The backup made right before this write, if hosts has not changed since."""
+        fresh, self._fresh_backup = self._fresh_backup, None
+        if fresh is None or fresh[1] is None or stat_signature(HOSTS_PATH) != fresh[1]:
+            return None
+        return fresh[0] if fresh[0].exists() else None
+
+    def _journal_begin(self, action: str, expected_digest: str, undoes: Optional[str]) -> Optional[JournalEntry]:
+        # A broken journal must not block writing hosts; it only costs crash recovery.
+        try:
+            entry = self.journal.begin(action, HOSTS_PATH, expected_digest, backup=self._take_fresh_backup())
+        except OSError as e:
+            logger.error("Failed to journal hosts %s: %s", action, e)
+            return None
+        return self.journal.note(entry, undoes=undoes) if undoes else entry
+
+    def _install(
+        self,
+        expected_digest: str,
+        action: str,
+        data: Optional[bytes] = None,
+        staged_path: Optional[str] = None,
+        owns_source: bool = False,
+        undoes: Optional[str] = None,
+        intended: str | bytes | None = None,
+        interactive: bool = True,
+    ) -> bool:
+        """Write hosts through the strategy chain under a journal entry.
+
+        `intended` is the content (path or bytes) the caller meant to write
+        before merging in external edits; it is kept as the next merge base.
+        With interactive=False only methods that cannot prompt are tried: a
+        direct write, or an already running privileged helper.
+        """
+        with self.write_lock:
+            return self._install_locked(
+                expected_digest, action, data, staged_path, owns_source, undoes, intended, interactive,
+            )
+
+    def _install_locked(
+        self,
+        expected_digest: str,
+        action: str,
+        data: Optional[bytes],
+        staged_path: Optional[str],
+        owns_source: bool,
+        undoes: Optional[str],
+        intended: str | bytes | None,
+        interactive: bool,
+    ) -> bool:
+        job = _InstallJob(expected_digest, data, staged_path, interactive=interactive)
+        job.entry = self._journal_begin(action, expected_digest, undoes)
+        if job.entry is not None:
+            job.journal = self.journal
+            if owns_source:
+                job.add_temp_file(staged_path)
+        try:
             # Try to remove Read-Only attribute if hosts file exists
-            if HOSTS_PATH.exists():
+            if sys.platform == "win32" and HOSTS_PATH.exists():
                 try:
                     import stat
                     os.chmod(HOSTS_PATH, stat.S_IWRITE)
                 except Exception as e:
                     logger.debug("Failed to remove read-only attribute: %s", e)
 
-            fd, temp_path = tempfile.mkstemp()
-            os.close(fd)
-            Path(temp_path).write_text(content, encoding="utf-8")
-
-            # --- Attempt 1: Direct copy with retries ---
-            try:
-                if self._try_direct_copy(temp_path, content):
-                    return True
-            except (PermissionError, OSError) as e:
-                logger.debug("Direct copy failed: %s", e)
-            except RuntimeError as e:
-                logger.debug("Direct copy verification failed: %s", e)
+            if run_strategies(self._write_strategies(job), self.write_strategy_memory, record_failures=job.interactive):
+                if job.entry is not None:
+                    self.journal.commit(job.entry)
+                    job.entry = None
+                self.journal.record_applied(intended if intended is not None else HOSTS_PATH)
+                self._last_written_digest = expected_digest
+                self._refresh_fingerprint()
+                return True
 
+            if not job.interactive:
+                raise PermissionError("hosts is not writable without elevation; background writes do not prompt")
             if sys.platform == "win32":
-                # --- Attempt 2: Unlock hosts (stop DNS cache, takeown, icacls) + retry ---
-                if is_windows_admin():
-                    logger.info("Attempting aggressive hosts unlock...")
-                    self._unlock_hosts_windows()
-                    dns_stopped = True
-                    try:
-                        if self._try_direct_copy(temp_path, content, retries=2):
-                            self._flush_dns_windows()
-                            return True
-                    except (PermissionError, OSError, RuntimeError) as e:
-                        logger.debug("Post-unlock direct copy failed: %s", e)
-
-                # --- Attempt 3: PowerShell elevated copy ---
-                safe_src = temp_path.replace("'", "''")
-                safe_dst = str(HOSTS_PATH).replace("'", "''")
-                ps = (
-                    "$ErrorActionPreference = 'Stop'\n"
-                    f"$source = '{safe_src}'\n"
-                    f"$dest = '{safe_dst}'\n"
-                    "try {\n"
-                    "    if (Test-Path $dest) {\n"
-                    "        Set-ItemProperty -Path $dest -Name IsReadOnly -Value $false -ErrorAction SilentlyContinue\n"
-                    "    }\n"
-                    "    Copy-Item -LiteralPath $source -Destination $dest -Force\n"
-                    "    try { ipconfig /flushdns | Out-Null } catch {}\n"
-                    "    exit 0\n"
-                    "} catch {\n"
-                    "    exit 1\n"
-                    "}\n"
-                )
-                with tempfile.NamedTemporaryFile("w", delete=False, suffix=".ps1", encoding="utf-8") as f:
-                    f.write(ps)
-                    ps_script_path = f.name
-                safe_script = ps_script_path.replace("'", "''")
-
-                elevated = False
-                uac_denied = False
-                try:
-                    if is_windows_admin():
-                        r = subprocess.run(
-                            [
-                                "powershell", "-WindowStyle", "Hidden", "-NoProfile",
-                                "-ExecutionPolicy", "Bypass", "-File", ps_script_path
-                            ],
-                            creationflags=subprocess.CREATE_NO_WINDOW,
-                            timeout=60,
-                            capture_output=True,
-                        )
-                        if r.returncode != 0:
-                            logger.debug("PowerShell script failed (admin): %s", r.stderr.decode(errors="ignore"))
-                    else:
-                        cmd = [
-                            "powershell", "-WindowStyle", "Hidden", "-NoProfile",
-                            "-ExecutionPolicy", "Bypass", "-Command",
-                            "$ErrorActionPreference = 'Stop'; "
-                            "try { "
-                            f"$p = Start-Process powershell -Verb runAs -WindowStyle Hidden "
-                            f"-ArgumentList '-NoProfile -ExecutionPolicy Bypass -File \"{safe_script}\"' "
-                            "-Wait -PassThru -ErrorAction Stop; "
-                            "if ($null -eq $p) { exit 1 }; "
-                            "exit $p.ExitCode "
-                            "} catch [System.OperationCanceledException] { "
-                            "exit 1223 "  # ERROR_CANCELLED — user clicked No in UAC
-                            "} catch { "
-                            "exit 1 "
-                            "}"
-                        ]
-                        r = subprocess.run(cmd, creationflags=subprocess.CREATE_NO_WINDOW, timeout=90, capture_output=True)
-                        if r.returncode == 1223:
-                            uac_denied = True
-                        elif r.returncode != 0:
-                            logger.debug("PowerShell elevated copy failed: rc=%d stderr=%s", r.returncode, r.stderr.decode(errors="ignore"))
-                    elevated = r.returncode == 0
-                except Exception as e:
-                    logger.debug("PowerShell elevated copy failed: %s", e)
-                    elevated = False
-
-                if elevated:
-                    _time.sleep(0.3)
-                    self.invalidate_cache()
-                    if self._verify_applied_content(content):
-                        self._flush_dns_windows()
-                        return True
-
-                # --- Attempt 4: cmd /c copy ---
-                if self._try_cmd_copy(temp_path, content):
-                    self._flush_dns_windows()
-                    return True
-
-                # --- Attempt 5: cmd /c type (alternative shell write) ---
-                if self._try_cmd_type(temp_path, content):
-                    self._flush_dns_windows()
-                    return True
-
-                # --- Attempt 6: Windows API direct write (ultimate fallback) ---
-                if self._try_winapi_write(content):
-                    self._flush_dns_windows()
-                    return True
-
-                # All attempts exhausted
-                if uac_denied:
+                if job.uac_denied:
                     raise PermissionError("UAC elevation was denied by user")
-                if not elevated and not is_windows_admin():
+                if not job.elevated and not is_windows_admin():
                     raise PermissionError("UAC elevation was denied or PowerShell execution failed")
                 raise RuntimeError(
                     "All write methods failed. The hosts file may be locked by another process "
                     "or protected by security software. Try closing other programs and retrying."
                 )
-
-            elif sys.platform == "darwin":
-                elevated = self._apply_macos_elevated(temp_path)
-                if not elevated:
+            if not job.elevated:
+                if sys.platform == "darwin":
                     raise PermissionError("macOS elevation failed (osascript/sudo)")
-            else:
-                elevated = self._apply_unix_elevated(temp_path)
-                if not elevated:
-                    raise PermissionError("Linux elevation failed (pkexec/sudo)")
-
-            _time.sleep(0.3)
-            self.invalidate_cache()
-            if not self._verify_applied_content(content):
-                raise RuntimeError(
-                    "Hosts file write verification failed: the file may be locked by another process "
-                    "or protected by security software"
-                )
-            return True
+                raise PermissionError("Linux elevation failed (pkexec/sudo)")
+            raise RuntimeError(
+                "Hosts file write verification failed: the file may be locked by another process "
+                "or protected by security software"
+            )
         except (PermissionError, RuntimeError):
             raise
         except Exception as e:
             logger.error("Apply hosts failed: %s", e)
             raise RuntimeError(f"Failed to write hosts file: {e}")
         finally:
-            if dns_stopped:
+            if job.dns_stopped:
                 self._restore_dns_service_windows()
-            if temp_path:
-                safe_remove(temp_path)
-            if ps_script_path:
-                safe_remove(ps_script_path)
+            if job.temp_path:
+                safe_remove(job.temp_path)
+            if job.ps_script_path:
+                safe_remove(job.ps_script_path)
+            if job.entry is not None:
+                self._settle_journal_entry(replace(job.entry, temp_files=(), dns_stopped=False))
+
+    def _write_strategies(self, job: "_InstallJob") -> list[WriteStrategy]:
+        """The platform's write methods in default order; the remembered one is moved first by run_strategies()."""
+        direct = WriteStrategy("direct", lambda: self._strategy_direct(job))
+        if not job.interactive:
+            if sys.platform == "win32":
+                return [direct]
+            return [
+                direct,
+                WriteStrategy("helper", lambda: self._apply_via_helper(job.source(), job.expected_digest, start=False)),
+            ]
+        if sys.platform == "win32":
+            return [
+                direct,
+                WriteStrategy("unlock", lambda: self._strategy_unlock(job)),
+                WriteStrategy("powershell", lambda: self._strategy_powershell(job)),
+                WriteStrategy("cmd_copy", lambda: self._flushed(self._try_cmd_copy(job.source(), job.expected_digest))),
+                WriteStrategy("cmd_type", lambda: self._flushed(self._try_cmd_type(job.source(), job.expected_digest))),
+                WriteStrategy("winapi", lambda: self._flushed(self._try_winapi_write(job.content(), job.expected_digest))),
+            ]
+        return [
+            direct,
+            WriteStrategy("helper", lambda: self._apply_via_helper(job.source(), job.expected_digest)),
+            WriteStrategy("elevated", lambda: self._strategy_elevated(job)),
+        ]
+
+    def _strategy_direct(self, job: "_InstallJob") -> bool:
+        # Atomic write next to hosts, retried while a transient lock clears.
+        try:
+            return self._try_direct_write(job.write, job.expected_digest)
+        except (PermissionError, OSError) as e:
+            logger.debug("Direct write failed: %s", e)
+        except RuntimeError as e:
+            logger.debug("Direct write verification failed: %s", e)
+        return False
+
+    def _strategy_unlock(self, job: "_InstallJob") -> bool:
+        # Unlock hosts (stop DNS cache, takeown, icacls), then write directly.
+        if not is_windows_admin():
+            return False
+        logger.info("Attempting aggressive hosts unlock...")
+        job.note(dns_stopped=True)
+        self._unlock_hosts_windows()
+        job.dns_stopped = True
+        try:
+            if self._try_direct_write(job.write, job.expected_digest, timeout=1.0):
+                self._flush_dns_windows()
+                return True
+        except (PermissionError, OSError, RuntimeError) as e:
+            logger.debug("Post-unlock direct copy failed: %s", e)
+        return False
+
+    def _flushed(self, ok: bool) -> bool:
+        """Flush the Windows DNS cache after a strategy succeeded; passes ok through."""
+        if ok:
+            self._flush_dns_windows()
+        return ok
+
+    def _strategy_powershell(self, job: "_InstallJob") -> bool:
+        # Copy via PowerShell, asking for UAC elevation when not already admin.
+        safe_src = job.source().replace("'", "''")
+        safe_dst = str(HOSTS_PATH).replace("'", "''")
+        ps = (
+            "$ErrorActionPreference = 'Stop'\n"
+            f"$source = '{safe_src}'\n"
+            f"$dest = '{safe_dst}'\n"
+            "try {\n"
+            "    if (Test-Path $dest) {\n"
+            "        Set-ItemProperty -Path $dest -Name IsReadOnly -Value $false -ErrorAction SilentlyContinue\n"
+            "    }\n"
+            "    Copy-Item -LiteralPath $source -Destination $dest -Force\n"
+            "    try { ipconfig /flushdns | Out-Null } catch {}\n"
+            "    exit 0\n"
+            "} catch {\n"
+            "    exit 1\n"
+            "}\n"
+        )
+        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".ps1", encoding="utf-8") as f:
+            f.write(ps)
+            job.ps_script_path = f.name
+        job.add_temp_file(job.ps_script_path)
+        safe_script = job.ps_script_path.replace("'", "''")
+
+        elevated = False
+        try:
+            if is_windows_admin():
+                r = subprocess.run(
+                    [
+                        "powershell", "-WindowStyle", "Hidden", "-NoProfile",
+                        "-ExecutionPolicy", "Bypass", "-File", job.ps_script_path
+                    ],
+                    creationflags=subprocess.CREATE_NO_WINDOW,
+                    timeout=60,
+                    capture_output=True,
+                )
+                if r.returncode != 0:
+                    logger.debug("PowerShell script failed (admin): %s", r.stderr.decode(errors="ignore"))
+            else:
+                cmd = [
+                    "powershell", "-WindowStyle", "Hidden", "-NoProfile",
+                    "-ExecutionPolicy", "Bypass", "-Command",
+                    "$ErrorActionPreference = 'Stop'; "
+                    "try { "
+                    f"$p = Start-Process powershell -Verb runAs -WindowStyle Hidden "
+                    f"-ArgumentList '-NoProfile -ExecutionPolicy Bypass -File \"{safe_script}\"' "
+                    "-Wait -PassThru -ErrorAction Stop; "
+                    "if ($null -eq $p) { exit 1 }; "
+                    "exit $p.ExitCode "
+                    "} catch [System.OperationCanceledException] { "
+                    "exit 1223 "  # ERROR_CANCELLED — user clicked No in UAC
+                    "} catch { "
+                    "exit 1 "
+                    "}"
+                ]
+                r = subprocess.run(cmd, creationflags=subprocess.CREATE_NO_WINDOW, timeout=90, capture_output=True)
+                if r.returncode == 1223:
+                    job.uac_denied = True
+                elif r.returncode != 0:
+                    logger.debug("PowerShell elevated copy failed: rc=%d stderr=%s", r.returncode, r.stderr.decode(errors="ignore"))
+            elevated = r.returncode == 0
+        except Exception as e:
+            logger.debug("PowerShell elevated copy failed: %s", e)
+        job.elevated = job.elevated or elevated
+
+        if elevated and self._await_applied(job.expected_digest, "powershell_elevated"):
+            self._flush_dns_windows()
+            return True
+        return False
+
+    def _strategy_elevated(self, job: "_InstallJob") -> bool:
+        # osascript/sudo on macOS, pkexec/sudo/... elsewhere.
+        if sys.platform == "darwin":
+            elevated = self._apply_macos_elevated(job.source())
+        else:
+            elevated = self._apply_unix_elevated(job.source())
+        job.elevated = job.elevated or elevated
+        return elevated and self._await_applied(job.expected_digest, "elevated_write")
+
+    # --- Privileged helper ---
+
+    def _privileged_helper(self, start: bool = True) -> Optional[PrivilegedHelperClient]:
+        """The session's privileged helper if enabled in settings, starting it on first use."""
+        if sys.platform == "win32" or not get_setting("privileged_helper", False):
+            return None
+        if self._helper is None:
+            self._helper = PrivilegedHelperClient()
+        if self._helper.is_running() or (start and self._helper.start()):
+            return self._helper
+        return None
+
+    def _read_hosts_via_helper(self) -> Optional[bytes]:
+        helper = self._privileged_helper(start=False)
+        if helper is None:
+            return None
+        try:
+            return helper.read_hosts()
+        except HelperError as e:
+            logger.warning("Privileged helper backup failed: %s", e)
+            return None
+
+    def _apply_via_helper(self, source_path: str, expected_digest: str, start: bool = True) -> bool:
+        helper = self._privileged_helper(start=start)
+        if helper is None:
+            return False
+        try:
+            helper.write(source_path, expected_digest)
+            helper.flush()
+        except HelperError as e:
+            logger.warning("Privileged helper write failed, falling back to one-off elevation: %s", e)
+            return False
+        self.invalidate_cache()
+        return self._verify_applied_digest(expected_digest)
+
+    def shutdown_helper(self):
+        if self._helper is not None:
+            self._helper.stop()
+            self._helper = None
 
     def _flush_dns_windows(self):
         """Flush DNS cache on Windows."""
@@ -561,34 +1136,40 @@ class HostsManager:
             pass
 
     def _flush_dns(self):
-        if sys.platform == "darwin":
-            flush = (
-                "dscacheutil -flushcache 2>/dev/null; "
-                "killall -HUP mDNSResponder 2>/dev/null || true"
-            )
-        else:
-            flush = (
-                "resolvectl flush-caches 2>/dev/null || "
-                "systemd-resolve --flush-caches 2>/dev/null || "
-                "/etc/init.d/nscd restart 2>/dev/null || "
-                "killall -HUP dnsmasq 2>/dev/null || true"
-            )
-        subprocess.run(flush, shell=True)
+        flush_dns()
 
-    def _apply_macos_elevated(self, temp_path: str) -> bool:
-        flush = (
-            "dscacheutil -flushcache 2>/dev/null; "
-            "killall -HUP mDNSResponder 2>/dev/null || true"
-        )
+    @staticmethod
+    def _atomic_install_cmd(temp_path: str) -> str:
+        """Shell snippet that installs temp_path as hosts the same way atomic_write() does.
+
+        The content is staged in the hosts directory, synced, and renamed over
+        the target; if the rename is refused (e.g. bind-mounted hosts) it is
+        rewritten in place.
+        """
+        target = HOSTS_PATH.resolve()
         s_src = temp_path.replace("'", "'\\''")
-        s_dst = str(HOSTS_PATH).replace("'", "'\\''")
-        shell_cmd = f"cp '{s_src}' '{s_dst}' && chmod 644 '{s_dst}' && {flush}"
-        applescript = f'do shell script "{shell_cmd}" with administrator privileges'
+        s_dst = str(target).replace("'", "'\\''")
+        s_tmpl = str(target.parent / ".goida-hosts-XXXXXX").replace("'", "'\\''")
+        return (
+            f"tmp=$(mktemp '{s_tmpl}') && "
+            f"{{ cat '{s_src}' > \"$tmp\" && chmod 644 \"$tmp\" && {{ sync \"$tmp\" 2>/dev/null || sync; }} "
+            f"|| {{ rm -f \"$tmp\"; false; }}; }} && "
+            f"{{ mv -f \"$tmp\" '{s_dst}' 2>/dev/null "
+            f"|| {{ cat \"$tmp\" > '{s_dst}'; rc=$?; rm -f \"$tmp\"; [ $rc -eq 0 ]; }}; }}"
+        )
 
-        if shutil.which("osascript"):
+    def _apply_macos_elevated(self, temp_path: str) -> bool:
+        flush = flush_shell_command()
+        shell_cmd = f"{self._atomic_install_cmd(temp_path)} && {flush}"
+        quoted = shell_cmd.replace("\\", "\\\\").replace('"', '\\"')
+        applescript = f'do shell script "{quoted}" with administrator privileges'
+
+        caps = get_capabilities()
+        osascript = caps.launcher("osascript")
+        if osascript:
             try:
                 r = subprocess.run(
-                    ["osascript", "-e", applescript],
+                    [osascript, "-e", applescript],
                     timeout=120,
                     stdout=subprocess.DEVNULL,
                     stderr=subprocess.DEVNULL,
@@ -598,10 +1179,11 @@ class HostsManager:
             except Exception:
                 pass
 
-        if shutil.which("sudo"):
+        sudo = caps.launcher("sudo")
+        if sudo:
             try:
                 r = subprocess.run(
-                    ["sudo", "bash", "-c", shell_cmd],
+                    [sudo, "bash", "-c", shell_cmd],
                     timeout=120,
                 )
                 if r.returncode == 0:
@@ -611,74 +1193,106 @@ class HostsManager:
         return False
 
     def _apply_unix_elevated(self, temp_path: str) -> bool:
-        flush = (
-            "resolvectl flush-caches 2>/dev/null || "
-            "systemd-resolve --flush-caches 2>/dev/null || "
-            "/etc/init.d/nscd restart 2>/dev/null || "
-            "killall -HUP dnsmasq 2>/dev/null || true"
-        )
-        s_src = temp_path.replace("'", "'\\''")
-        s_dst = str(HOSTS_PATH).replace("'", "'\\''")
-        bash_cmd = f"cp '{s_src}' '{s_dst}' && chmod 644 '{s_dst}' && {flush}"
-
-        for launcher, args in (
-            ("pkexec", ["pkexec", "bash", "-c", bash_cmd]),
-            ("sudo", ["sudo", "bash", "-c", bash_cmd]),
-        ):
-            if shutil.which(launcher):
-                try:
-                    r = subprocess.run(args, timeout=120)
-                    if r.returncode == 0:
-                        return True
-                except Exception:
-                    continue
-
-        for su_tool in ("gksudo", "kdesudo"):
-            if shutil.which(su_tool):
-                try:
-                    r = subprocess.run([su_tool, "bash", "-c", bash_cmd], timeout=120)
-                    if r.returncode == 0:
-                        return True
-                except Exception:
-                    continue
+        flush = flush_shell_command()
+        bash_cmd = f"{self._atomic_install_cmd(temp_path)} && {flush}"
+
+        # Only launchers the capability probe found, in preference order.
+        for _name, launcher in get_capabilities().launchers:
+            try:
+                r = subprocess.run([launcher, "bash", "-c", bash_cmd], timeout=120)
+                if r.returncode == 0:
+                    return True
+            except Exception:
+                continue
         return False
 
 
-    def update(self, provider: str = "dns.malw.link") -> bool:
+    @staticmethod
+    def provider_url(provider: str) -> str:
         if provider == "geohide":
-            url = "https://github.com/Internet-Helper/GeoHideDNS/raw/refs/heads/main/hosts/hosts"
-        else:
-            url = "https://raw.githubusercontent.com/ImMALWARE/dns.malw.link/refs/heads/master/hosts"
+            return "https://github.com/Internet-Helper/GeoHideDNS/raw/refs/heads/main/hosts/hosts"
+        return "https://raw.githubusercontent.com/ImMALWARE/dns.malw.link/refs/heads/master/hosts"
+
+    def update(self, provider: str = "dns.malw.link") -> bool:
         self.backup_failed = not self.backup("install")
         if self.backup_failed:
             logger.warning("Failed to create hosts backup before install, proceeding anyway")
+        return self._stage_and_apply(
+            HttpClient.iter_chunks(self.provider_url(provider), bypass_cache=True),
+            "update",
+            source_error="Failed to download hosts file from remote repository",
+            merge=True,
+        )
 
-        content = HttpClient.fetch(url, bypass_cache=True)
-        if not content:
-            raise RuntimeError("Failed to download hosts file from remote repository")
-
-        return self.apply(content)
+    def _stage_and_apply(
+        self,
+        chunks: Iterable[bytes],
+        action: str,
+        transform: Optional[Callable[[Iterable[bytes]], Iterator[bytes]]] = None,
+        source_error: str = "Failed to read hosts content",
+        merge: bool = False,
+    ) -> bool:
+        """Stream content into a staging file and install it with one write.
+
+        Download, line split, the optional transform, line ending conversion
+        (to what hosts already uses), validation, writing and hashing run as
+        one lazy pipeline, so memory stays bounded by the chunk size. Staging
+        next to hosts lets apply_staged() rename it in. With `merge`, edits
+        made to hosts since the app last wrote it are merged into the staged
+        content instead of being overwritten; that step works on the staged
+        file as interned line ids, so it holds one int per line rather than
+        the text.
+        """
+        self.last_merge_conflicts, self.last_merge_kept = [], 0
+        hosts_dir = HOSTS_PATH.resolve().parent
+        staging_dir = str(hosts_dir) if os.access(hosts_dir, os.W_OK) else None
+        fd, staged_path = tempfile.mkstemp(dir=staging_dir, prefix=".goida-hosts-", suffix=".tmp")
+        try:
+            try:
+                with os.fdopen(fd, "wb", buffering=1 << 20) as out:
+                    report = stream_to_file(chunks, out, transform, newline=self._hosts_newline())
+            except Exception as e:
+                logger.error("Reading hosts content for %s failed: %s", action, e)
+                report = None
+            if report is None or not report.size:
+                raise RuntimeError(source_error)
+            if not report.valid:
+                raise RuntimeError("Hosts content validation failed")
+            logger.debug("Staged hosts for %s: %d bytes, %d lines", action, report.size, report.lines)
+            if merge and self.journal.applied_path.exists():
+                merged = self._merge_external(staged_path, str(self.journal.applied_path))
+                if merged is not None:
+                    # The unmerged download stays the base for the next merge,
+                    # so the kept external edits keep counting as external.
+                    fd, merged_path = tempfile.mkstemp(dir=staging_dir, prefix=".goida-hosts-", suffix=".tmp")
+                    try:
+                        with os.fdopen(fd, "wb", buffering=1 << 20) as out:
+                            merged.write(out)
+                        return self._install(
+                            normalized_file_digest(merged_path), action,
+                            staged_path=merged_path, owns_source=True, intended=staged_path,
+                        )
+                    finally:
+                        safe_remove(merged_path)
+            return self.apply_staged(staged_path, report.digest, action)
+        finally:
+            safe_remove(staged_path)
 
-    def restore(self) -> bool:
-        self.backup_failed = not self.backup("uninstall")
-        if self.backup_failed:
-            logger.warning("Failed to create hosts backup before uninstall, proceeding anyway")
+    def transaction(self) -> "HostsTransaction":
+        """Start collecting edits that commit() applies with one backup, one write and one flush."""
+        return HostsTransaction(self)
 
+    def original_content(self) -> bytes:
+        """The hosts file as it was before the app touched it, or the platform default."""
         # Try to find a backup of the original hosts file
         original_content = None
         backups = self.get_backups_list()
-
         for backup_path in backups:
             try:
-                content = backup_path.read_text(encoding="utf-8", errors="ignore")
-                lines = content.splitlines()
-                if len(lines) >= 5 and lines[0].startswith("# Goida AI Unlocker hosts backup"):
-                    actual_hosts = "\n".join(lines[5:])
-                else:
-                    actual_hosts = content
+                actual_hosts = self.read_backup_content(backup_path)
 
                 # If this backup does not contain any bypass entries, it's our original hosts file!
-                if "dns.malw.link" not in actual_hosts and "dns.geohide.ru" not in actual_hosts:
+                if b"dns.malw.link" not in actual_hosts and b"dns.geohide.ru" not in actual_hosts:
                     original_content = actual_hosts
                     logger.info("Found clean original hosts backup: %s", backup_path)
                     break
@@ -708,9 +1322,15 @@ class HostsManager:
                     "# localhost name resolution is handled within DNS itself.\n"
                     "#   127.0.0.1       localhost\n#   ::1             localhost"
                 )
-            original_content = default_hosts
+            original_content = default_hosts.encode("utf-8")
 
-        return self.apply(original_content)
+        return original_content
+
+    def restore(self) -> bool:
+        self.backup_failed = not self.backup("uninstall")
+        if self.backup_failed:
+            logger.warning("Failed to create hosts backup before uninstall, proceeding anyway")
+        return self.apply(self.original_content(), "restore")
 
     def check_status(self, provider: str = "dns.malw.link") -> HostsStatusResult:
         if not HOSTS_PATH.exists():
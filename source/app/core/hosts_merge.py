@@ -0,0 +1,118 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+from app.core.hosts_diff import matching_blocks, read_line_ids
+
+_ENDING_PROBE = 1 << 16
+_WRITE_BATCH = 8192
+
+
+@dataclass(frozen=True)
+class MergeConflict:
+    """A region both sides changed differently; the target's lines were kept.
+
+    base_start/base_end are 0-based line offsets in the base, and `line` is
+    where the kept lines start in the merged result.
+    """
+    base_start: int
+    base_end: int
+    line: int
+    local: tuple[str, ...]
+    target: tuple[str, ...]
+
+
+@dataclass
+class MergeResult:
+    """Merged content as line ids plus what the merge had to decide."""
+    ids: list[int]
+    text: list[bytes]
+    newline: bytes = b"\n"
+    conflicts: list[MergeConflict] = field(default_factory=list)
+    kept_local: int = 0
+
+    def write(self, out: BinaryIO):
+        """Write the merged lines in batches, never joining the whole result."""
+        text, newline, ids = self.text, self.newline, self.ids
+        for start in range(0, len(ids), _WRITE_BATCH):
+            out.write(b"".join(text[i] + newline for i in ids[start:start + _WRITE_BATCH]))
+
+    def to_bytes(self) -> bytes:
+        return b"".join(self.text[i] + self.newline for i in self.ids)
+
+
+def _line_ids(source: str | Path | bytes, interner: dict[bytes, int]) -> list[int]:
+    if isinstance(source, bytes):
+        setdefault = interner.setdefault
+        return [setdefault(line, len(interner)) for line in source.splitlines()]
+    return read_line_ids(source, 0, interner)
+
+
+def _newline_of(source: str | Path | bytes) -> bytes:
+    if isinstance(source, bytes):
+        head = source[:_ENDING_PROBE]
+    else:
+        with open(source, "rb") as f:
+            head = f.read(_ENDING_PROBE)
+    return b"\r\n" if b"\r\n" in head else b"\n"
+
+
+def _sync_regions(base_len: int, local_len: int, target_len: int, ml: list, mt: list) -> list[tuple]:
+    """Base ranges unchanged on both sides, as (z1, z2, l1, l2, t1, t2), ending with an empty sentinel."""
+    regions = []
+    il = it = 0
+    while il < len(ml) and it < len(mt):
+        lbase, lmatch, llen = ml[il]
+        tbase, tmatch, tlen = mt[it]
+        start = max(lbase, tbase)
+        end = min(lbase + llen, tbase + tlen)
+        if start < end:
+            l1 = lmatch + start - lbase
+            t1 = tmatch + start - tbase
+            regions.append((start, end, l1, l1 + end - start, t1, t1 + end - start))
+        if lbase + llen < tbase + tlen:
+            il += 1
+        else:
+            it += 1
+    regions.append((base_len, base_len, local_len, local_len, target_len, target_len))
+    return regions
+
+
+def merge3(base: str | Path | bytes, local: str | Path | bytes, target: str | Path | bytes) -> MergeResult:
+    """Three-way line merge of hosts contents (file paths or bytes).
+
+    `base` is what the app last wrote, `local` what is on disk now and
+    `target` what the app wants to write. Changes only local made (edits by
+    the user, antivirus or other tools) are kept; changes only target made
+    are applied; where both changed the same lines differently the target
+    wins and a MergeConflict is recorded. Lines are interned to ints and
+    aligned with the patience diff from hosts_diff, so large lists stay fast.
+    The result uses the target's line endings.
+    """
+    interner: dict[bytes, int] = {}
+    b = _line_ids(base, interner)
+    lo = _line_ids(local, interner)
+    t = _line_ids(target, interner)
+    text = list(interner)
+    interner.clear()
+    result = MergeResult([], text, _newline_of(target))
+    out = result.ids
+
+    z = i = j = 0
+    for z1, z2, l1, l2, t1, t2 in _sync_regions(len(b), len(lo), len(t), matching_blocks(b, lo), matching_blocks(b, t)):
+        if l1 > i or t1 > j or z1 > z:
+            base_part, local_part, target_part = b[z:z1], lo[i:l1], t[j:t1]
+            if local_part == target_part or local_part == base_part:
+                out.extend(target_part)
+            elif target_part == base_part:
+                out.extend(local_part)
+                result.kept_local += 1
+            else:
+                result.conflicts.append(MergeConflict(
+                    z, z1, len(out),
+                    tuple(text[k].decode("utf-8", errors="replace") for k in local_part),
+                    tuple(text[k].decode("utf-8", errors="replace") for k in target_part),
+                ))
+                out.extend(target_part)
+        out.extend(b[z1:z2])
+        z, i, j = z2, l2, t2
+    return result
@@ -0,0 +1,127 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Optional
+from app.core.hosts_parser import iter_entries
+from app.core.logger import logger
+
+# Below this a single in-process pass beats starting worker processes.
+PARALLEL_THRESHOLD = 32 << 20
+MIN_CHUNK = 8 << 20
+
+
+@dataclass
+class HostsDocument:
+    """Index of a parsed hosts payload.
+
+    hosts maps each lowercased hostname to the first (0-based) line mapping
+    it; addresses counts entry lines per address.
+    """
+    line_count: int = 0
+    entry_count: int = 0
+    hosts: dict[str, int] = field(default_factory=dict)
+    addresses: dict[str, int] = field(default_factory=dict)
+
+
+def _parse_bytes(data: bytes) -> HostsDocument:
+    doc = HostsDocument()
+    hosts = doc.hosts
+    addresses = doc.addresses
+    lines = data.splitlines()
+    doc.line_count = len(lines)
+    for line_no, address, names in iter_entries(lines):
+        doc.entry_count += 1
+        address = address.decode("utf-8", errors="ignore")
+        addresses[address] = addresses.get(address, 0) + 1
+        for name in names:
+            hosts.setdefault(name.decode("utf-8", errors="ignore").lower(), line_no)
+    return doc
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before 3.13 attaching always tracks; spawned workers share the
+        # parent's resource tracker, so that only duplicates its registration.
+        return shared_memory.SharedMemory(name=name)
+
+
+def _parse_shared(name: str, start: int, end: int) -> HostsDocument:
+    """Worker: parse bytes [start, end) of the shared block; line numbers are chunk-local."""
+    shm = _attach(name)
+    try:
+        return _parse_bytes(bytes(shm.buf[start:end]))
+    finally:
+        shm.close()
+
+
+def split_ranges(data: bytes, parts: int) -> list[tuple[int, int]]:
+    """Cut data into up to `parts` ranges that each end just after a newline."""
+    size = len(data)
+    step = max(MIN_CHUNK, -(-size // max(parts, 1)))
+    ranges = []
+    start = 0
+    while start < size:
+        end = data.find(b"\n", min(start + step, size) - 1)
+        end = size if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _merge(docs: list[HostsDocument]) -> HostsDocument:
+    merged = HostsDocument()
+    offset = 0
+    offsets = []
+    for doc in docs:
+        offsets.append(offset)
+        offset += doc.line_count
+        merged.line_count += doc.line_count
+        merged.entry_count += doc.entry_count
+        for address, count in doc.addresses.items():
+            merged.addresses[address] = merged.addresses.get(address, 0) + count
+    # Later chunks go in first so earlier ones overwrite them and the first
+    # occurrence of a hostname wins, leaving the bulk copy to dict.update.
+    for doc, base in reversed(list(zip(docs, offsets))):
+        if base:
+            merged.hosts.update((name, line + base) for name, line in doc.hosts.items())
+        else:
+            merged.hosts.update(doc.hosts)
+    return merged
+
+
+def parse_document(data: bytes, max_workers: Optional[int] = None) -> HostsDocument:
+    """Parse a hosts payload into a HostsDocument, across processes when it is large.
+
+    The payload is copied once into a shared memory block; workers attach to
+    it by name and each parses a newline-aligned range, so only the small
+    per-chunk indexes travel through pickling. Falls back to one in-process
+    pass for small payloads, a single core, or if the pool cannot start.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    if workers < 2 or len(data) < PARALLEL_THRESHOLD:
+        return _parse_bytes(data)
+    ranges = split_ranges(data, workers)
+    if len(ranges) < 2:
+        return _parse_bytes(data)
+
+    shm = None
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        # spawn everywhere: forking a process that runs Qt threads is unsafe.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=ctx) as pool:
+            futures = [pool.submit(_parse_shared, shm.name, start, end) for start, end in ranges]
+            docs = [f.result() for f in futures]
+    except Exception as e:
+        logger.warning("Parallel hosts parse failed, parsing in-process: %s", e)
+        return _parse_bytes(data)
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    return _merge(docs)
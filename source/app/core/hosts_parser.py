@@ -0,0 +1,48 @@
+import re as _re
+from typing import Iterable, Iterator, Optional
+
+_IP_ENTRY_RE = _re.compile(r"^\s*\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\s+\S+", _re.MULTILINE)
+_IP_ENTRY_RE_B = _re.compile(_IP_ENTRY_RE.pattern.encode("ascii"), _re.MULTILINE)
+
+
+def looks_like_hosts(content: str | bytes) -> bool:
+    """Sanity check used before writing: mentions localhost or has an IPv4 entry line.
+
+    Safe to call on any run of complete lines, so streaming callers can
+    check block by block.
+    """
+    if isinstance(content, str):
+        return "localhost" in content or _IP_ENTRY_RE.search(content) is not None
+    return b"localhost" in content or _IP_ENTRY_RE_B.search(content) is not None
+
+
+def parse_entry(line: str | bytes) -> Optional[tuple]:
+    """Split one hosts line into (address, [hostnames]).
+
+    Works on str or bytes. Returns None for blank lines, comments and lines
+    without at least one hostname; trailing "# ..." comments are dropped.
+    """
+    hash_pos = line.find("#" if isinstance(line, str) else b"#")
+    if hash_pos != -1:
+        line = line[:hash_pos]
+    parts = line.split()
+    if len(parts) < 2:
+        return None
+    return parts[0], parts[1:]
+
+
+def iter_entries(lines: Iterable) -> Iterator[tuple[int, object, list]]:
+    """Yield (line_no, address, hostnames) for every entry line, 0-based line numbers."""
+    for line_no, line in enumerate(lines):
+        entry = parse_entry(line)
+        if entry is not None:
+            yield line_no, entry[0], entry[1]
+
+
+def hostnames(data: bytes) -> set[str]:
+    """All hostnames mapped in a hosts file, lowercased."""
+    names = set()
+    for _, _, hosts in iter_entries(data.splitlines()):
+        for host in hosts:
+            names.add(host.decode("utf-8", errors="ignore").lower())
+    return names
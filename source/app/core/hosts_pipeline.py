@@ -0,0 +1,143 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+from app.core.hosts_parser import looks_like_hosts
+from app.utils.file_ops import NormalizedDigest
+
+_DONE = object()
+
+
+@dataclass
+class StreamReport:
+    """What the pipeline learned about the content it streamed."""
+    size: int = 0
+    lines: int = 0
+    valid: bool = False
+    digest: str = ""
+
+
+def prefetch(source: Iterable[bytes], depth: int = 8) -> Iterator[bytes]:
+    """Pull `source` on a background thread, up to `depth` items ahead.
+
+    Lets the network keep receiving while the consumer writes to disk.
+    Exceptions raised by the source are re-raised in the consumer; closing
+    the generator early stops the producer.
+    """
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in source:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name="hosts-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def split_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Re-cut arbitrary chunks into blocks of complete lines.
+
+    Each yielded block ends right after a newline (except possibly the last),
+    so later stages can work line-wise on a block without ever seeing half
+    a line. A block is at most one chunk plus one carried-over line.
+    """
+    tail = b""
+    for chunk in chunks:
+        cut = chunk.rfind(b"\n")
+        if cut == -1:
+            tail += chunk
+            continue
+        yield tail + chunk[:cut + 1]
+        tail = chunk[cut + 1:]
+    if tail:
+        yield tail
+
+
+def convert_newlines(data: bytes, newline: bytes) -> bytes:
+    """data with every line ending (LF or CRLF) turned into `newline`.
+
+    Returns data itself when it already uses `newline` throughout.
+    """
+    if newline == b"\n":
+        return data.replace(b"\r\n", b"\n") if b"\r\n" in data else data
+    if data.count(b"\n") == data.count(b"\r\n"):
+        return data
+    return data.replace(b"\r\n", b"\n").replace(b"\n", newline)
+
+
+def newline_lines(blocks: Iterable[bytes], newline: bytes) -> Iterator[bytes]:
+    """Give every line `newline` as its ending (blocks end at line ends, so CRLF is never split)."""
+    for block in blocks:
+        yield convert_newlines(block, newline)
+
+
+def validate_lines(blocks: Iterable[bytes], report: StreamReport) -> Iterator[bytes]:
+    """Pass blocks through, recording in report.valid whether any looked like hosts content."""
+    for block in blocks:
+        if not report.valid and looks_like_hosts(block):
+            report.valid = True
+        yield block
+
+
+def write_lines(blocks: Iterable[bytes], out: BinaryIO, report: StreamReport) -> StreamReport:
+    """Final stage: write blocks to `out` and hash them for apply verification."""
+    hasher = NormalizedDigest()
+    for block in blocks:
+        out.write(block)
+        hasher.update(block)
+        report.size += len(block)
+        report.lines += block.count(b"\n")
+    report.digest = hasher.hexdigest()
+    return report
+
+
+def stream_to_file(
+    chunks: Iterable[bytes],
+    out: BinaryIO,
+    transform: Optional[Callable[[Iterable[bytes]], Iterator[bytes]]] = None,
+    newline: Optional[bytes] = None,
+) -> StreamReport:
+    """Run chunks -> prefetch -> split_lines -> [transform] -> [newline_lines] -> validate_lines -> write_lines into `out`.
+
+    `transform` sees blocks of complete lines and may edit, drop or add
+    lines. With `newline`, every line is written with that ending. Merging
+    with edits made to hosts outside the app is not a stage here: a
+    three-way merge needs the whole staged result, so HostsManager runs
+    merge3() over the staged file afterwards.
+    """
+    report = StreamReport()
+    blocks = split_lines(prefetch(chunks))
+    if transform is not None:
+        blocks = transform(blocks)
+    if newline is not None:
+        blocks = newline_lines(blocks, newline)
+    return write_lines(validate_lines(blocks, report), out, report)
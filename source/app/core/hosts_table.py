@@ -0,0 +1,172 @@
+import ipaddress
+from typing import Iterable, Optional
+from app.core.hosts_parser import iter_entries
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Hosts analytics need numpy, which is an optional dependency: pip install numpy")
+
+
+class HostnameInterner:
+    """Maps hostnames to dense integer ids. Tables built with one interner share ids."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.names: list[str] = []
+
+    def intern(self, name: str) -> int:
+        host_id = self.ids.get(name)
+        if host_id is None:
+            host_id = len(self.names)
+            self.ids[name] = host_id
+            self.names.append(name)
+        return host_id
+
+
+def _pack_address(text: str) -> Optional[tuple[int, int]]:
+    """An address as the high and low 64 bits of its IPv6 form (IPv4 is ::ffff:a.b.c.d)."""
+    try:
+        ip = ipaddress.ip_address(text.split("%", 1)[0])
+    except ValueError:
+        return None
+    value = int(ip) | 0xFFFF00000000 if ip.version == 4 else int(ip)
+    return value >> 64, value & 0xFFFFFFFFFFFFFFFF
+
+
+def _unpack_address(hi: int, lo: int) -> str:
+    ip = ipaddress.IPv6Address((int(hi) << 64) | int(lo))
+    return str(ip.ipv4_mapped or ip)
+
+
+class HostsTable:
+    """Columnar view of hosts entries for bulk analytics (requires numpy).
+
+    One row per (address, hostname) pair: ip_hi/ip_lo hold the address as two
+    uint64 halves, host the interned hostname id and line the 0-based source
+    line. Reports are vectorized group-bys over these columns, so they stay
+    in the milliseconds on files with millions of entries. Lines whose
+    address is not an IP literal are skipped.
+    """
+
+    def __init__(self, ip_hi, ip_lo, host, line, interner: HostnameInterner):
+        self.ip_hi = ip_hi
+        self.ip_lo = ip_lo
+        self.host = host
+        self.line = line
+        self.interner = interner
+        self._groups = None
+
+    @classmethod
+    def from_lines(cls, lines: Iterable, interner: Optional[HostnameInterner] = None) -> "HostsTable":
+        _require_numpy()
+        interner = interner if interner is not None else HostnameInterner()
+        intern = interner.intern
+        packed: dict = {}
+        hi, lo, host, line = [], [], [], []
+        for line_no, address, names in iter_entries(lines):
+            addr = packed.get(address)
+            if addr is None:
+                text = address.decode("utf-8", errors="ignore") if isinstance(address, bytes) else address
+                addr = packed[address] = _pack_address(text) or ()
+            if not addr:
+                continue
+            for name in names:
+                if isinstance(name, bytes):
+                    name = name.decode("utf-8", errors="ignore")
+                hi.append(addr[0])
+                lo.append(addr[1])
+                host.append(intern(name.lower()))
+                line.append(line_no)
+        return cls(
+            np.array(hi, dtype=np.uint64), np.array(lo, dtype=np.uint64),
+            np.array(host, dtype=np.int64), np.array(line, dtype=np.int64), interner,
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, interner: Optional[HostnameInterner] = None) -> "HostsTable":
+        return cls.from_lines(data.splitlines(), interner)
+
+    def __len__(self) -> int:
+        return len(self.host)
+
+    def _address_groups(self):
+        """Distinct addresses as text, each row's group index and the group sizes.
+
+        The two halves are factorized separately and combined into one int64
+        key, since 1-D unique is far faster than unique over rows.
+        """
+        if self._groups is None:
+            uniq_hi, inv_hi = np.unique(self.ip_hi, return_inverse=True)
+            uniq_lo, inv_lo = np.unique(self.ip_lo, return_inverse=True)
+            keys = inv_hi.astype(np.int64) * len(uniq_lo) + inv_lo
+            uniq, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            labels = [_unpack_address(uniq_hi[k // len(uniq_lo)], uniq_lo[k % len(uniq_lo)]) for k in uniq]
+            self._groups = (labels, inverse.reshape(-1), counts)
+        return self._groups
+
+    def entries_per_address(self) -> dict[str, int]:
+        """Number of hostname entries per address, largest first."""
+        if not len(self):
+            return {}
+        labels, _, counts = self._address_groups()
+        order = np.argsort(-counts, kind="stable")
+        return {labels[i]: int(counts[i]) for i in order}
+
+    def address_share(self) -> dict[str, float]:
+        """Fraction of all entries pointing at each address (e.g. at each proxy)."""
+        total = len(self)
+        return {addr: count / total for addr, count in self.entries_per_address().items()}
+
+    def duplicate_hostnames(self) -> dict[str, int]:
+        """Hostnames listed on more than one entry, with how often they appear."""
+        counts = np.bincount(self.host, minlength=len(self.interner.names))
+        ids = np.flatnonzero(counts > 1)
+        names = self.interner.names
+        return {names[i]: int(counts[i]) for i in ids}
+
+    def conflicting_mappings(self) -> dict[str, list[str]]:
+        """Hostnames mapped to more than one distinct address."""
+        if not len(self):
+            return {}
+        labels, inverse, _ = self._address_groups()
+        pairs = np.unique(self.host * len(labels) + inverse)
+        hosts, groups = pairs // len(labels), pairs % len(labels)
+        per_host = np.bincount(hosts, minlength=len(self.interner.names))
+        conflicted = np.flatnonzero(per_host[hosts] > 1)
+        result: dict[str, list[str]] = {}
+        names = self.interner.names
+        for host_id, group in zip(hosts[conflicted].tolist(), groups[conflicted].tolist()):
+            result.setdefault(names[host_id], []).append(labels[group])
+        return result
+
+    def hostname_mask(self):
+        """Boolean array over interner ids, True for hostnames present in this table."""
+        mask = np.zeros(len(self.interner.names), dtype=bool)
+        mask[self.host] = True
+        return mask
+
+    def difference(self, other: "HostsTable") -> tuple[list[str], list[str]]:
+        """(hostnames only in self, hostnames only in other).
+
+        Both tables must share an interner, e.g. built with
+        HostsTable.compare(), so the sets compare as masks over the same ids.
+        """
+        if other.interner is not self.interner:
+            raise ValueError("Tables must be built with the same HostnameInterner")
+        mine, theirs = self.hostname_mask(), other.hostname_mask()
+        names = self.interner.names
+        only_mine = np.flatnonzero(mine & ~theirs)
+        only_theirs = np.flatnonzero(theirs & ~mine)
+        return [names[i] for i in only_mine], [names[i] for i in only_theirs]
+
+    @classmethod
+    def compare(cls, a: bytes, b: bytes) -> tuple["HostsTable", "HostsTable"]:
+        """Build tables for two payloads (e.g. two providers' lists) that can be diffed."""
+        interner = HostnameInterner()
+        return cls.from_bytes(a, interner), cls.from_bytes(b, interner)
@@ -0,0 +1,185 @@
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional
+from app.core.constants import HOSTS_PATH
+from app.core.http_client import HttpClient
+from app.core.logger import logger
+from app.core.hosts_parser import parse_entry
+
+if TYPE_CHECKING:
+    from app.core.hosts_manager import HostsManager
+
+_READ_CHUNK = 1 << 20
+
+
+def _iter_file(path: Path, offset: int = 0) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _to_bytes(value: str | bytes) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+class HostsTransaction:
+    """Collects several hosts edits and commits them as one target and one write.
+
+    Pick the starting content with at most one of use_provider(),
+    restore_original() or restore_backup() (default: the current hosts file),
+    then layer entry edits on top; they apply in the order given:
+
+        manager.transaction().use_provider("geohide").add_entry("127.0.0.1", "dev.local").commit()
+
+    commit() streams the base through the edits into a staging file, so a
+    large provider list is never held in memory, and then costs a single
+    backup, elevated write and DNS flush. Builder methods return self.
+    """
+
+    def __init__(self, manager: "HostsManager"):
+        self.manager = manager
+        self._base: Optional[Callable[[], Iterable[bytes]]] = None
+        self._base_name = "current hosts"
+        self._removed: set[bytes] = set()
+        self._remap: dict[bytes, bytes] = {}
+        self._added: list[tuple[bytes, list[bytes]]] = []
+        self._merge = False
+
+    # --- Base content ---
+
+    def _set_base(self, name: str, source: Callable[[], Iterable[bytes]]) -> "HostsTransaction":
+        if self._base is not None:
+            raise ValueError(f"Transaction already starts from {self._base_name}")
+        self._base, self._base_name = source, name
+        return self
+
+    def use_provider(self, provider: str) -> "HostsTransaction":
+        """Start from the provider's list (what update() installs), keeping external edits like update()."""
+        url = self.manager.provider_url(provider)
+        self._set_base(f"provider {provider}", lambda: HttpClient.iter_chunks(url, bypass_cache=True))
+        self._merge = True
+        return self
+
+    def restore_original(self) -> "HostsTransaction":
+        """Start from the pre-install hosts (what restore() installs)."""
+        return self._set_base("original hosts", lambda: [self.manager.original_content()])
+
+    def restore_backup(self, backup_path: Path) -> "HostsTransaction":
+        """Start from a backup file, without its legacy metadata header."""
+        backup_path = Path(backup_path)
+        return self._set_base(
+            f"backup {backup_path.name}",
+            lambda: _iter_file(backup_path, self.manager.backup_content_offset(backup_path)),
+        )
+
+    # --- Entry edits ---
+
+    def add_entry(self, address: str | bytes, *hostnames: str | bytes) -> "HostsTransaction":
+        """Map hostnames to address, replacing any mapping they already have."""
+        if not hostnames:
+            raise ValueError("add_entry() needs at least one hostname")
+        names = [_to_bytes(h) for h in hostnames]
+        self.remove_host(*names)
+        self._added.append((_to_bytes(address), names))
+        return self
+
+    def remove_host(self, *hostnames: str | bytes) -> "HostsTransaction":
+        """Drop every mapping of these hostnames; lines left without hostnames go away."""
+        keys = {_to_bytes(h).lower() for h in hostnames}
+        self._removed |= keys
+        added = []
+        for address, names in self._added:
+            names = [n for n in names if n.lower() not in keys]
+            if names:
+                added.append((address, names))
+        self._added = added
+        return self
+
+    def remap_address(self, old: str | bytes, new: str | bytes) -> "HostsTransaction":
+        """Point every entry for address `old` at `new` instead."""
+        old, new = _to_bytes(old), _to_bytes(new)
+        for key, target in self._remap.items():
+            if target == old:
+                self._remap[key] = new
+        self._remap.setdefault(old, new)
+        self._added = [(new if address == old else address, names) for address, names in self._added]
+        return self
+
+    def is_empty(self) -> bool:
+        return self._base is None and not (self._removed or self._remap or self._added)
+
+    # --- Commit ---
+
+    def _edit_line(self, line: bytes) -> Optional[bytes]:
+        entry = parse_entry(line)
+        if entry is None:
+            return line
+        address, names = entry
+        kept = [n for n in names if n.lower() not in self._removed]
+        new_address = self._remap.get(address, address)
+        if len(kept) == len(names) and new_address == address:
+            return line
+        if not kept:
+            return None
+        body = line.rstrip(b"\r\n")
+        ending = line[len(body):]
+        hash_pos = body.find(b"#")
+        comment = b" " + body[hash_pos:] if hash_pos != -1 else b""
+        return new_address + b" " + b" ".join(kept) + comment + ending
+
+    def transform(self, blocks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pipeline stage applying the edits to blocks of complete lines, then appending new entries."""
+        last = b"\n"
+        edit_lines = bool(self._removed or self._remap)
+        for block in blocks:
+            if not block:
+                continue
+            last = block[-1:]
+            if not edit_lines:
+                yield block
+                continue
+            out = []
+            for line in block.splitlines(keepends=True):
+                edited = self._edit_line(line)
+                if edited is not None:
+                    out.append(edited)
+            if out:
+                yield b"".join(out)
+        if self._added:
+            lines = [address + b" " + b" ".join(names) + b"\n" for address, names in self._added]
+            yield (b"" if last == b"\n" else b"\n") + b"".join(lines)
+
+    def _base_chunks(self) -> Iterable[bytes]:
+        if self._base is not None:
+            return self._base()
+        if not HOSTS_PATH.exists() or os.access(HOSTS_PATH, os.R_OK):
+            return _iter_file(HOSTS_PATH) if HOSTS_PATH.exists() else [b""]
+        data = self.manager._read_hosts_via_helper()
+        if data is None:
+            raise RuntimeError("Hosts file is not readable")
+        return [data]
+
+    def commit(self) -> bool:
+        """Back up once and install the computed hosts with one write. Raises like apply().
+
+        write_lock is held throughout, so no other write lands between the
+        backup, reading the base and installing the result.
+        """
+        if self.is_empty():
+            return True
+        manager = self.manager
+        with manager.write_lock:
+            manager.backup_failed = not manager.backup("transaction")
+            if manager.backup_failed:
+                logger.warning("Failed to create hosts backup before transaction, proceeding anyway")
+            return manager._stage_and_apply(
+                self._base_chunks(),
+                "transaction",
+                self.transform,
+                source_error=f"Failed to read {self._base_name}",
+                merge=self._merge,
+            )
@@ -6,13 +6,18 @@ from app.utils.helpers import extract_update_line
 
 class HttpClient:
     _lock = threading.Lock()
-    _cache: dict[str, tuple[float, str]] = {}
+    _cache: dict[str, tuple[float, bytes]] = {}
     CACHE_TTL = 300.0
     REMOTE_CACHE_TTL = 60.0
     _remote_main_line_cache: dict[str, tuple[float, tuple[str, str]]] = {}
 
     @classmethod
     def fetch(cls, url: str, timeout: int = 10, bypass_cache: bool = False) -> str:
+        return cls.fetch_bytes(url, timeout, bypass_cache).decode("utf-8", errors="ignore")
+
+    @classmethod
+    def fetch_bytes(cls, url: str, timeout: int = 10, bypass_cache: bool = False) -> bytes:
+        """Like fetch() but returns the raw body, for callers that never need text."""
         now = _time.time()
         key = url
         with cls._lock:
@@ -26,13 +31,27 @@ class HttpClient:
                 headers={"User-Agent": "GoidaUnlocker/1.0"}
             )
             with urllib.request.urlopen(req, timeout=timeout) as resp:
-                data = resp.read().decode("utf-8", errors="ignore")
+                data = resp.read()
             with cls._lock:
                 cls._cache[key] = (now, data)
             return data
         except Exception as e:
             logger.error("HTTP fetch failed for %s: %s", url, e)
-            return ""
+            return b""
+
+    @classmethod
+    def iter_chunks(cls, url: str, timeout: int = 10, bypass_cache: bool = False, chunk_size: int = 1 << 16):
+        """Yield the response body in chunks as it arrives. Not cached; network errors propagate."""
+        req = urllib.request.Request(
+            f"{url}?t={int(_time.time())}" if bypass_cache else url,
+            headers={"User-Agent": "GoidaUnlocker/1.0"}
+        )
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            while True:
+                chunk = resp.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
 
     @classmethod
     def get_remote_main_line_cached(cls, provider: str = "dns.malw.link") -> tuple[str, str]:
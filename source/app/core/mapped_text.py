@@ -0,0 +1,189 @@
+import os
+import mmap
+import tempfile
+import threading
+import re as _re
+from array import array
+from pathlib import Path
+from typing import Callable, Optional
+from app.core.logger import logger
+from app.utils.file_ops import clone_file
+
+_NL_RE = _re.compile(rb"\n")
+
+
+class MappedTextFile:
+    """Read-only, line-addressable view of a file backed by mmap.
+
+    Only every STRIDE-th line offset is kept, so the index costs a few bytes
+    per 64 lines and memory stays flat regardless of file size. Reading
+    `count` lines from any position costs O(STRIDE + count).
+
+    build_index() is meant to run in a worker thread; lines() may be called
+    concurrently from the UI thread and sees the part indexed so far.
+    """
+
+    STRIDE = 64
+    PROGRESS_EVERY = 1 << 16
+
+    def __init__(self, path: str | Path, start: int = 0):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mm: Optional[mmap.mmap] = None
+        if self.size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._start = min(max(start, 0), self.size)
+        self._checkpoints = array("q", [self._start])
+        self._newlines = 0
+        self._complete = self._start >= self.size
+        self._building = False
+        self._cancelled = False
+        self._close_requested = False
+        self._owned_copy: Optional[str] = None
+
+    @classmethod
+    def snapshot(cls, path: str | Path, start: int = 0) -> "MappedTextFile":
+        """Map a private copy of path instead of the file itself.
+
+        For files that other code replaces or truncates while they are on
+        screen, such as the live hosts file: on Windows a mapping blocks both.
+        The copy is a reflink where the filesystem allows it and is deleted on close.
+        """
+        fd, copy = tempfile.mkstemp(prefix="goida-view-", suffix=".txt")
+        os.close(fd)
+        try:
+            clone_file(path, copy)
+            view = cls(copy, start=start)
+        except BaseException:
+            os.unlink(copy)
+            raise
+        view._owned_copy = copy
+        return view
+
+    # --- Index ---
+
+    def build_index(self, progress: Optional[Callable[[int], None]] = None) -> int:
+        """Scan the file for line starts. Returns the final line count."""
+        with self._lock:
+            if self._complete or self._cancelled or self._mm is None:
+                return self.line_count()
+            self._building = True
+        it = None
+        try:
+            stride = self.STRIDE
+            every = self.PROGRESS_EVERY
+            pending = []
+            n = 0
+            it = _NL_RE.finditer(self._mm, self._start)
+            for n, m in enumerate(it, 1):
+                if n % stride == 0:
+                    pending.append(m.end())
+                if n % every == 0:
+                    if self._cancelled:
+                        return 0
+                    with self._lock:
+                        self._checkpoints.extend(pending)
+                        self._newlines = n
+                    pending.clear()
+                    if progress:
+                        progress(self.line_count())
+            with self._lock:
+                self._checkpoints.extend(pending)
+                self._newlines = n
+                self._complete = True
+            return self.line_count()
+        except (ValueError, BufferError) as e:
+            logger.debug("Line index aborted for %s: %s", self.path, e)
+            return 0
+        finally:
+            del it
+            with self._lock:
+                self._building = False
+                release = self._close_requested
+            if release:
+                self._release()
+
+    def is_complete(self) -> bool:
+        return self._complete
+
+    def line_count(self) -> int:
+        """Number of lines indexed so far (final once is_complete())."""
+        if self._mm is None or self._start >= self.size:
+            return 0
+        count = self._newlines
+        if self._complete and self._mm[self.size - 1:self.size] != b"\n":
+            count += 1
+        return count
+
+    # --- Access ---
+
+    def lines(self, start: int, count: int) -> list[str]:
+        mm = self._mm
+        if mm is None or count <= 0 or start < 0:
+            return []
+        with self._lock:
+            total = self.line_count()
+            if start >= total:
+                return []
+            k = min(start // self.STRIDE, len(self._checkpoints) - 1)
+            pos = self._checkpoints[k]
+        skip = start - k * self.STRIDE
+        count = min(count, total - start)
+        try:
+            for _ in range(skip):
+                nl = mm.find(b"\n", pos)
+                if nl == -1:
+                    return []
+                pos = nl + 1
+            result = []
+            for _ in range(count):
+                nl = mm.find(b"\n", pos)
+                end = self.size if nl == -1 else nl
+                result.append(mm[pos:end].rstrip(b"\r").decode("utf-8", errors="replace"))
+                if nl == -1:
+                    break
+                pos = nl + 1
+            return result
+        except ValueError:
+            # Mapping was closed under us.
+            return []
+
+    def line(self, index: int) -> str:
+        found = self.lines(index, 1)
+        return found[0] if found else ""
+
+    # --- Lifetime ---
+
+    def close(self):
+        with self._lock:
+            self._cancelled = True
+            if self._building:
+                self._close_requested = True
+                return
+        self._release()
+
+    def _release(self):
+        mm, self._mm = self._mm, None
+        try:
+            if mm is not None:
+                mm.close()
+        except Exception as e:
+            logger.debug("Failed to unmap %s: %s", self.path, e)
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        if self._owned_copy is not None:
+            try:
+                os.unlink(self._owned_copy)
+            except OSError as e:
+                logger.debug("Failed to remove snapshot %s: %s", self._owned_copy, e)
+            self._owned_copy = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
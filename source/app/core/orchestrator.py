@@ -0,0 +1,162 @@
+import sys
+import subprocess
+import time as _time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Union
+from app.core.logger import logger
+
+_CREATIONFLAGS = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+
+@dataclass(frozen=True)
+class Step:
+    """One unit of work in a run_steps() graph.
+
+    action is an argv (run without a shell) or a callable returning True on
+    success. The step starts once every step named in `after` has finished;
+    with requires_success it is skipped unless they all succeeded. `timeout`
+    bounds a command (callables are expected to bound themselves).
+    """
+    name: str
+    action: Union[tuple[str, ...], list[str], Callable[[], bool]]
+    after: tuple[str, ...] = ()
+    timeout: float = 15.0
+    requires_success: bool = False
+
+
+@dataclass
+class StepResult:
+    name: str
+    ok: bool = False
+    returncode: Optional[int] = None
+    started: float = 0.0
+    elapsed: float = 0.0
+    skipped: bool = False
+    error: str = ""
+    stderr: bytes = b""
+
+
+@dataclass
+class RunReport:
+    """Per-step results in completion order, plus the wall time of the whole run."""
+    results: dict[str, StepResult] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def any_ok(self) -> bool:
+        return any(r.ok for r in self.results.values())
+
+    @property
+    def all_ok(self) -> bool:
+        return all(r.ok for r in self.results.values())
+
+    def __getitem__(self, name: str) -> StepResult:
+        return self.results[name]
+
+
+def _check_graph(steps: list[Step]) -> dict[str, Step]:
+    by_name: dict[str, Step] = {}
+    for step in steps:
+        if step.name in by_name:
+            raise ValueError(f"Duplicate step name: {step.name}")
+        by_name[step.name] = step
+    for step in steps:
+        for dep in step.after:
+            if dep not in by_name:
+                raise ValueError(f"Step {step.name} depends on unknown step {dep}")
+    # Kahn's algorithm: anything left over sits on a cycle.
+    indegree = {name: len(step.after) for name, step in by_name.items()}
+    ready = [name for name, n in indegree.items() if n == 0]
+    seen = 0
+    while ready:
+        name = ready.pop()
+        seen += 1
+        for other in by_name.values():
+            if name in other.after:
+                indegree[other.name] -= 1
+                if indegree[other.name] == 0:
+                    ready.append(other.name)
+    if seen != len(by_name):
+        raise ValueError("Step dependencies contain a cycle")
+    return by_name
+
+
+def _run_step(step: Step, timeout: float, origin: float) -> StepResult:
+    result = StepResult(step.name, started=_time.monotonic() - origin)
+    t0 = _time.monotonic()
+    try:
+        if callable(step.action):
+            result.ok = bool(step.action())
+        else:
+            r = subprocess.run(
+                list(step.action),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                timeout=timeout,
+                creationflags=_CREATIONFLAGS,
+            )
+            result.returncode = r.returncode
+            result.stderr = r.stderr or b""
+            result.ok = r.returncode == 0
+    except subprocess.TimeoutExpired:
+        result.error = f"timed out after {timeout:.1f}s"
+    except Exception as e:
+        result.error = str(e)
+    result.elapsed = _time.monotonic() - t0
+    return result
+
+
+def run_steps(steps: list[Step], deadline: Optional[float] = None, max_workers: int = 8) -> RunReport:
+    """Run a dependency graph of steps, independent ones concurrently.
+
+    Wall time is the longest dependency chain rather than the sum of all
+    steps. `deadline` (seconds) caps the whole run: running commands get at
+    most the remaining time and steps not yet started are skipped. Raises
+    ValueError for duplicate names, unknown dependencies or cycles.
+    """
+    pending = dict(_check_graph(steps))
+    report = RunReport()
+    if not pending:
+        return report
+    origin = _time.monotonic()
+    end = origin + deadline if deadline is not None else None
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending))), thread_name_prefix="orchestrator") as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, step in list(pending.items()):
+                    if not all(dep in report.results for dep in step.after):
+                        continue
+                    del pending[name]
+                    progressed = True
+                    remaining = None if end is None else end - _time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        report.results[name] = StepResult(name, skipped=True, error="deadline reached")
+                    elif step.requires_success and not all(report.results[dep].ok for dep in step.after):
+                        report.results[name] = StepResult(name, skipped=True, error="dependency failed")
+                    else:
+                        timeout = step.timeout if remaining is None else min(step.timeout, remaining)
+                        running[pool.submit(_run_step, step, timeout, origin)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                report.results[running.pop(future)] = result
+                if not result.ok:
+                    logger.debug(
+                        "Step %s failed (rc=%s%s): %s", result.name, result.returncode,
+                        f", {result.error}" if result.error else "",
+                        result.stderr.decode(errors="ignore")[:200],
+                    )
+
+    report.elapsed = _time.monotonic() - origin
+    logger.debug(
+        "Ran %d steps in %.2fs: %s", len(report.results), report.elapsed,
+        ", ".join(f"{r.name}={'ok' if r.ok else 'skip' if r.skipped else 'fail'}/{r.elapsed:.2f}s" for r in report.results.values()),
+    )
+    return report
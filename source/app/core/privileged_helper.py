@@ -0,0 +1,443 @@
+import os
+import sys
+import json
+import hmac
+import stat
+import time as _time
+import shutil
+import socket
+import struct
+import secrets
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Optional
+from app.core.logger import logger
+from app.core.constants import HOSTS_PATH
+from app.core.dns_flush import flush_dns
+from app.core.capabilities import get_capabilities
+from app.utils.file_ops import NormalizedDigest, normalized_file_digest, atomic_install
+from app.utils.helpers import safe_remove
+
+HELPER_FLAG = "--privileged-helper"
+
+# Protocol: every frame is a 4-byte big-endian length followed by a UTF-8
+# JSON object. Requests are {"token", "op", ...} with op one of ping, write,
+# flush, backup, shutdown; replies are {"ok", "error", ...}. A "write"
+# request carries {"size", "digest"} and is followed by `size` raw bytes; a
+# "backup" reply carries {"size"} and is followed by the hosts bytes.
+
+_HEADER = struct.Struct("!I")
+_MAX_MESSAGE = 1 << 16
+_DATA_CHUNK = 1 << 20
+_SOCKET_NAME = "helper.sock"
+_TOKEN_NAME = "token"
+
+
+class HelperError(RuntimeError):
+    pass
+
+
+# --- Framing ---
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), _DATA_CHUNK))
+        if not chunk:
+            raise HelperError("Connection closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def _send_message(sock: socket.socket, message: dict):
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_message(sock: socket.socket) -> dict:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if size > _MAX_MESSAGE:
+        raise HelperError("Message too large")
+    message = json.loads(_recv_exact(sock, size).decode("utf-8"))
+    if not isinstance(message, dict):
+        raise HelperError("Malformed message")
+    return message
+
+
+def _send_file(sock: socket.socket, path: str):
+    with open(path, "rb") as f:
+        sock.sendfile(f)
+
+
+# --- Helper side ---
+
+class _HelperServer:
+    """Serves hosts requests from the app on a Unix socket until the app exits.
+
+    The token arrives in a 0600 file inside the app's private 0700 directory,
+    the socket is created 0600 and handed to the app's user, and on Linux the
+    peer uid is checked too. That directory belongs to the user, so every
+    path operation goes through dir_fd and never follows symlinks: root must
+    not be tricked into chmod/chown of some other file. With a sandbox root
+    the server runs fine unprivileged.
+    """
+
+    def __init__(self, dir_fd: int, token: str, hosts_path: Path, owner_uid: int,
+                 parent_pid: int, flush_enabled: bool):
+        self.dir_fd = dir_fd
+        self.token = token
+        self.hosts_path = hosts_path
+        self.owner_uid = owner_uid
+        self.parent_pid = parent_pid
+        self.flush_enabled = flush_enabled
+        self._stop = threading.Event()
+
+    def serve(self):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        bound = False
+        try:
+            # bind() takes a path; binding relative to the verified directory
+            # keeps a swapped --dir from redirecting the socket. It fails if
+            # the name already exists, so it never writes through a symlink,
+            # and the umask gives the socket its final mode from the start.
+            os.fchdir(self.dir_fd)
+            old_umask = os.umask(0o177)
+            try:
+                server.bind(_SOCKET_NAME)
+            finally:
+                os.umask(old_umask)
+            bound = True
+            if self.owner_uid >= 0 and os.geteuid() == 0:
+                os.chown(_SOCKET_NAME, self.owner_uid, -1, dir_fd=self.dir_fd, follow_symlinks=False)
+            server.listen(4)
+            server.settimeout(1.0)
+            threading.Thread(target=self._watch_parent, daemon=True).start()
+            while not self._stop.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    conn.settimeout(30)
+                    try:
+                        self._handle(conn)
+                    except Exception as e:
+                        logger.debug("Privileged helper request failed: %s", e)
+        finally:
+            server.close()
+            if bound:
+                try:
+                    os.unlink(_SOCKET_NAME, dir_fd=self.dir_fd)
+                except OSError:
+                    pass
+
+    def _watch_parent(self):
+        while not self._stop.wait(2.0):
+            try:
+                os.kill(self.parent_pid, 0)
+            except ProcessLookupError:
+                self._stop.set()
+            except PermissionError:
+                pass
+
+    def _peer_allowed(self, conn: socket.socket) -> bool:
+        if not hasattr(socket, "SO_PEERCRED"):
+            return True
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        _pid, uid, _gid = struct.unpack("3i", creds)
+        return uid in (self.owner_uid, 0, os.getuid())
+
+    def _handle(self, conn: socket.socket):
+        if not self._peer_allowed(conn):
+            return
+        request = _recv_message(conn)
+        if not hmac.compare_digest(str(request.get("token", "")), self.token):
+            _send_message(conn, {"ok": False, "error": "unauthorized"})
+            return
+        op = request.get("op")
+        try:
+            if op == "ping":
+                _send_message(conn, {"ok": True, "pid": os.getpid()})
+            elif op == "write":
+                self._write(conn, int(request["size"]), str(request["digest"]))
+                _send_message(conn, {"ok": True})
+            elif op == "flush":
+                if self.flush_enabled:
+                    flush_dns()
+                _send_message(conn, {"ok": True})
+            elif op == "backup":
+                size = self.hosts_path.stat().st_size
+                _send_message(conn, {"ok": True, "size": size})
+                _send_file(conn, str(self.hosts_path))
+            elif op == "shutdown":
+                self._stop.set()
+                _send_message(conn, {"ok": True})
+            else:
+                _send_message(conn, {"ok": False, "error": f"unknown op {op!r}"})
+        except (OSError, HelperError, KeyError, ValueError) as e:
+            _send_message(conn, {"ok": False, "error": str(e)})
+
+    def _write(self, conn: socket.socket, size: int, digest: str):
+        # Stage in the hosts directory so the install is a same-filesystem rename.
+        fd, tmp = tempfile.mkstemp(dir=str(self.hosts_path.parent), prefix=".goida-hosts-", suffix=".tmp")
+        try:
+            hasher = NormalizedDigest()
+            with os.fdopen(fd, "wb") as out:
+                remaining = size
+                while remaining:
+                    chunk = conn.recv(min(remaining, _DATA_CHUNK))
+                    if not chunk:
+                        raise HelperError("Connection closed during write")
+                    out.write(chunk)
+                    hasher.update(chunk)
+                    remaining -= len(chunk)
+            if hasher.hexdigest() != digest:
+                raise HelperError("Digest mismatch in received content")
+            if not self.hosts_path.exists():
+                os.chmod(tmp, 0o644)
+            atomic_install(tmp, self.hosts_path)
+        finally:
+            safe_remove(tmp)
+        if normalized_file_digest(self.hosts_path) != digest:
+            raise HelperError("Verification failed after write")
+
+
+def _open_private_dir(path: str, uid: int) -> int:
+    """fd of path after checking it is a real directory owned by uid with mode 0700."""
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW)
+    try:
+        st = os.fstat(fd)
+        if not stat.S_ISDIR(st.st_mode):
+            raise HelperError(f"{path} is not a directory")
+        if st.st_uid != uid:
+            raise HelperError(f"{path} is owned by uid {st.st_uid}, expected {uid}")
+        if stat.S_IMODE(st.st_mode) != 0o700:
+            raise HelperError(f"{path} has mode {stat.S_IMODE(st.st_mode):o}, expected 700")
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def _take_token(dir_fd: int, uid: int) -> str:
+    """Read and delete the token file, refusing symlinks and files the user does not own."""
+    fd = os.open(_TOKEN_NAME, os.O_RDONLY | os.O_NOFOLLOW, dir_fd=dir_fd)
+    with os.fdopen(fd, "r", encoding="ascii") as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode) or st.st_uid != uid:
+            raise HelperError("token is not a regular file owned by the app user")
+        token = f.read(256).strip()
+    os.unlink(_TOKEN_NAME, dir_fd=dir_fd)
+    return token
+
+
+def run_helper(argv: list[str]) -> int:
+    """Entry point for `main.py --privileged-helper ...`."""
+    parser = argparse.ArgumentParser(prog=HELPER_FLAG)
+    parser.add_argument("--dir", required=True, help="private directory holding the token and socket")
+    parser.add_argument("--uid", type=int, default=-1, help="user allowed to connect")
+    parser.add_argument("--parent-pid", type=int, required=True, help="exit when this process is gone")
+    parser.add_argument("--root", help="operate on ROOT/etc/hosts and skip DNS flushing (testing)")
+    args = parser.parse_args(argv)
+
+    owner = args.uid if args.uid >= 0 else os.getuid()
+    try:
+        dir_fd = _open_private_dir(args.dir, owner)
+    except (OSError, HelperError) as e:
+        logger.error("Privileged helper: refusing directory %s: %s", args.dir, e)
+        return 2
+    try:
+        try:
+            token = _take_token(dir_fd, owner)
+        except (OSError, HelperError, UnicodeDecodeError) as e:
+            logger.error("Privileged helper: cannot read token: %s", e)
+            return 2
+        if not token:
+            return 2
+
+        if args.root:
+            hosts_path = Path(args.root).resolve() / HOSTS_PATH.relative_to(HOSTS_PATH.anchor)
+        else:
+            hosts_path = HOSTS_PATH.resolve()
+        try:
+            _HelperServer(
+                dir_fd, token, hosts_path, args.uid, args.parent_pid,
+                flush_enabled=not args.root,
+            ).serve()
+        except OSError as e:
+            logger.error("Privileged helper: cannot serve: %s", e)
+            return 2
+        return 0
+    finally:
+        os.close(dir_fd)
+
+
+def helper_command(*args: str) -> list[str]:
+    """argv that starts this application in helper mode."""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, HELPER_FLAG, *args]
+    main_py = Path(__file__).resolve().parents[2] / "main.py"
+    return [sys.executable, str(main_py), HELPER_FLAG, *args]
+
+
+# --- App side ---
+
+class PrivilegedHelperClient:
+    """App-side handle to the privileged helper.
+
+    start() elevates once (pkexec, or osascript on macOS) to launch the app
+    in helper mode; afterwards write/flush/backup requests go over the
+    socket without further prompts. With `root` set the helper is started
+    unprivileged against ROOT/etc/hosts, which is how it is exercised in
+    tests.
+    """
+
+    START_TIMEOUT = 120.0
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        self._dir: Optional[str] = None
+        self._token = ""
+        self._proc: Optional[subprocess.Popen] = None
+
+    @property
+    def socket_path(self) -> Optional[str]:
+        return os.path.join(self._dir, _SOCKET_NAME) if self._dir else None
+
+    def _launch_argv(self, command: list[str]) -> Optional[list[str]]:
+        if self.root:
+            # Sandbox mode: no elevation needed.
+            return command
+        caps = get_capabilities()
+        if sys.platform == "darwin":
+            osascript = caps.launcher("osascript")
+            if not osascript:
+                return None
+            shell = " ".join("'" + a.replace("'", "'\\''") + "'" for a in command)
+            shell = f"{shell} >/dev/null 2>&1 &"
+            quoted = shell.replace("\\", "\\\\").replace('"', '\\"')
+            return [osascript, "-e", f'do shell script "{quoted}" with administrator privileges']
+        pkexec = caps.launcher("pkexec")
+        if pkexec:
+            return [pkexec, *command]
+        return None
+
+    def start(self) -> bool:
+        """Start the helper (one elevation prompt) and wait until it answers."""
+        if self.is_running():
+            return True
+        self.stop()
+        self._dir = tempfile.mkdtemp(prefix="goida-helper-")
+        self._token = secrets.token_hex(32)
+        token_path = os.path.join(self._dir, _TOKEN_NAME)
+        fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="ascii") as f:
+            f.write(self._token)
+
+        args = ["--dir", self._dir, "--uid", str(os.getuid()), "--parent-pid", str(os.getpid())]
+        if self.root:
+            args += ["--root", self.root]
+        argv = self._launch_argv(helper_command(*args))
+        if argv is None:
+            logger.info("No launcher available for the privileged helper")
+            self._cleanup_dir()
+            return False
+        try:
+            self._proc = subprocess.Popen(
+                argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.warning("Failed to launch privileged helper: %s", e)
+            self._cleanup_dir()
+            return False
+
+        deadline = _time.monotonic() + self.START_TIMEOUT
+        delay = 0.05
+        while _time.monotonic() < deadline:
+            if self.is_running():
+                return True
+            if self._proc.poll() not in (None, 0):
+                # pkexec exits non-zero when authentication is cancelled.
+                break
+            _time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        logger.warning("Privileged helper did not start")
+        self.stop()
+        return False
+
+    def _request(self, message: dict) -> socket.socket:
+        if not self._dir:
+            raise HelperError("Helper not started")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(30)
+            sock.connect(self.socket_path)
+            _send_message(sock, dict(message, token=self._token))
+        except OSError as e:
+            sock.close()
+            raise HelperError(str(e)) from e
+        return sock
+
+    def _call(self, message: dict, payload_path: Optional[str] = None) -> dict:
+        sock = self._request(message)
+        with sock:
+            try:
+                if payload_path is not None:
+                    _send_file(sock, payload_path)
+                reply = _recv_message(sock)
+            except OSError as e:
+                raise HelperError(str(e)) from e
+        if not reply.get("ok"):
+            raise HelperError(reply.get("error") or "Helper request failed")
+        return reply
+
+    def is_running(self) -> bool:
+        if not self._dir or not os.path.exists(self.socket_path):
+            return False
+        try:
+            self._call({"op": "ping"})
+            return True
+        except HelperError:
+            return False
+
+    def write(self, source_path: str, expected_digest: str):
+        """Install source_path as hosts through the helper. Raises HelperError."""
+        size = os.path.getsize(source_path)
+        self._call({"op": "write", "size": size, "digest": expected_digest}, payload_path=source_path)
+
+    def flush(self):
+        self._call({"op": "flush"})
+
+    def read_hosts(self) -> bytes:
+        """Current hosts bytes as read by the helper (for backups of unreadable hosts)."""
+        sock = self._request({"op": "backup"})
+        with sock:
+            try:
+                reply = _recv_message(sock)
+                if not reply.get("ok"):
+                    raise HelperError(reply.get("error") or "Helper request failed")
+                return _recv_exact(sock, int(reply["size"]))
+            except OSError as e:
+                raise HelperError(str(e)) from e
+
+    def stop(self):
+        if self._dir:
+            try:
+                self._call({"op": "shutdown"})
+            except HelperError:
+                pass
+        if self._proc is not None:
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            self._proc = None
+        self._cleanup_dir()
+
+    def _cleanup_dir(self):
+        if self._dir:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
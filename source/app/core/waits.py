@@ -0,0 +1,86 @@
+import threading
+import time as _time
+from dataclasses import dataclass
+from typing import Callable
+from app.core.logger import logger
+
+
+@dataclass
+class WaitStat:
+    """Accumulated waits for one stage."""
+    count: int = 0
+    succeeded: int = 0
+    polls: int = 0
+    total: float = 0.0
+    last: float = 0.0
+    worst: float = 0.0
+
+
+class WaitMetrics:
+    """Per-stage wait times, so slow fallbacks show up in logs and diagnostics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, WaitStat] = {}
+
+    def record(self, stage: str, waited: float, polls: int, ok: bool):
+        with self._lock:
+            stat = self._stats.setdefault(stage, WaitStat())
+            stat.count += 1
+            stat.succeeded += int(ok)
+            stat.polls += polls
+            stat.total += waited
+            stat.last = waited
+            stat.worst = max(stat.worst, waited)
+        logger.debug("Wait %s: %.3fs, %d polls, %s", stage, waited, polls, "ok" if ok else "timed out")
+
+    def snapshot(self) -> dict[str, WaitStat]:
+        with self._lock:
+            return {k: WaitStat(**vars(v)) for k, v in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+wait_metrics = WaitMetrics()
+
+
+def wait_until(
+    predicate: Callable[[], bool],
+    timeout: float,
+    stage: str,
+    initial: float = 0.01,
+    factor: float = 2.0,
+    max_interval: float = 0.25,
+) -> bool:
+    """Poll predicate until it returns True or `timeout` seconds have passed.
+
+    The first check happens immediately, so an operation that already
+    completed costs no wait at all; after that the interval starts at
+    `initial` and grows by `factor` up to `max_interval`, never sleeping past
+    the deadline. The time spent is recorded in wait_metrics under `stage`.
+    An exception from predicate ends the wait (recorded as failed) and
+    propagates, which is how callers give up early on errors retrying
+    cannot fix.
+    """
+    start = _time.monotonic()
+    deadline = start + timeout
+    interval = initial
+    polls = 0
+    while True:
+        polls += 1
+        try:
+            done = predicate()
+        except BaseException:
+            wait_metrics.record(stage, _time.monotonic() - start, polls, False)
+            raise
+        if done:
+            wait_metrics.record(stage, _time.monotonic() - start, polls, True)
+            return True
+        remaining = deadline - _time.monotonic()
+        if remaining <= 0:
+            wait_metrics.record(stage, _time.monotonic() - start, polls, False)
+            return False
+        _time.sleep(min(interval, remaining))
+        interval = min(interval * factor, max_interval)
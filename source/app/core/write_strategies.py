@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+from app.core.logger import logger
+from app.core.settings import get_setting, set_setting
+
+
+@dataclass(frozen=True)
+class WriteStrategy:
+    """One way of getting content into hosts.
+
+    run() returns True once hosts verifiably holds the new content, and False
+    (or raises) when this method did not work on this machine.
+    """
+    name: str
+    run: Callable[[], bool]
+
+
+class StrategyMemory:
+    """Remembers which strategy last worked so the next write tries it first.
+
+    The record lives in settings as {"name": ..., "failures": n}. Each time the
+    remembered strategy fails its counter goes up, and after `max_failures`
+    misses in a row it is forgotten so the default order applies again.
+    `load`/`store` default to the settings file and can be swapped out.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        max_failures: int = 2,
+        load: Callable[[str], object] = get_setting,
+        store: Callable[[str, object], None] = set_setting,
+    ):
+        self.key = key
+        self.max_failures = max_failures
+        self._load = load
+        self._store = store
+
+    def _record(self) -> Optional[dict]:
+        record = self._load(self.key)
+        if isinstance(record, dict) and isinstance(record.get("name"), str):
+            return record
+        return None
+
+    def preferred(self) -> Optional[str]:
+        record = self._record()
+        return record["name"] if record else None
+
+    def order(self, strategies: Iterable[WriteStrategy]) -> list[WriteStrategy]:
+        """The given strategies with the remembered one (if still offered) moved to the front."""
+        strategies = list(strategies)
+        name = self.preferred()
+        first = [s for s in strategies if s.name == name]
+        return first + [s for s in strategies if s.name != name]
+
+    def record_success(self, name: str):
+        record = self._record()
+        if record and record["name"] == name and not record.get("failures"):
+            return
+        self._store(self.key, {"name": name, "failures": 0})
+
+    def record_failure(self, name: str):
+        record = self._record()
+        if not record or record["name"] != name:
+            return
+        failures = int(record.get("failures", 0)) + 1
+        if failures >= self.max_failures:
+            logger.info("Forgetting hosts write strategy %s after %d failures", name, failures)
+            self._store(self.key, None)
+        else:
+            self._store(self.key, {"name": name, "failures": failures})
+
+
+def run_strategies(
+    strategies: Iterable[WriteStrategy],
+    memory: StrategyMemory,
+    record_failures: bool = True,
+) -> Optional[str]:
+    """Try strategies, remembered one first, until one succeeds. Returns its name or None.
+
+    Exceptions from a strategy count as a failure of that strategy only; the
+    chain moves on to the next one. With record_failures=False (background
+    runs that skip prompting methods and so fail where a normal write would
+    not) failures leave the memory alone; successes are still recorded.
+    """
+    for strategy in memory.order(strategies):
+        try:
+            ok = strategy.run()
+        except Exception as e:
+            logger.debug("Write strategy %s raised: %s", strategy.name, e)
+            ok = False
+        if ok:
+            logger.debug("Hosts written via %s", strategy.name)
+            memory.record_success(strategy.name)
+            return strategy.name
+        logger.debug("Write strategy %s failed", strategy.name)
+        if record_failures:
+            memory.record_failure(strategy.name)
+    return None
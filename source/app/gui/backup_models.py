@@ -0,0 +1,140 @@
+import time as _time
+from typing import Optional
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel
+from app.core.hosts_manager import BackupInfo
+
+
+class BackupListModel(QAbstractListModel):
+    """List model over backup entries, newest first, that exposes rows on demand.
+
+    Entries arrive unsorted in batches from BackupScanWorker and are merged
+    into place; the view only pulls FETCH_BATCH rows at a time through
+    canFetchMore()/fetchMore(). An entry that sorts into the rows already
+    shown is inserted there, so the page fills while the scan is still running.
+    """
+
+    BackupInfoRole = Qt.ItemDataRole.UserRole + 1
+    FETCH_BATCH = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries: list[BackupInfo] = []
+        self._visible = 0
+        self._actions: set[str] = set()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._visible
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._visible:
+            return None
+        info = self._entries[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            date_str = _time.strftime("%Y-%m-%d %H:%M:%S", _time.localtime(info.timestamp))
+            return f"{date_str}  ·  {info.action}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return str(info.path)
+        if role == self.BackupInfoRole:
+            return info
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._visible < len(self._entries)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH, len(self._entries) - self._visible)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._visible, self._visible + count - 1)
+        self._visible += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def entry(self, row: int) -> Optional[BackupInfo]:
+        if 0 <= row < len(self._entries):
+            return self._entries[row]
+        return None
+
+    def _insert_pos(self, key: tuple[float, str], lo: int = 0) -> int:
+        """Index after every entry sorting at or above key (the list is descending)."""
+        hi = len(self._entries)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entries[mid].sort_key >= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def append_entries(self, entries: list[BackupInfo]):
+        pos = 0
+        # Newest first, so each insertion point is at or after the previous one.
+        for info in sorted(entries, key=lambda e: e.sort_key, reverse=True):
+            pos = self._insert_pos(info.sort_key, pos)
+            if pos < self._visible:
+                self.beginInsertRows(QModelIndex(), pos, pos)
+                self._entries.insert(pos, info)
+                self._visible += 1
+                self.endInsertRows()
+            else:
+                self._entries.insert(pos, info)
+            pos += 1
+        self._actions.update(e.action for e in entries)
+        if self._visible == 0:
+            self.fetchMore()
+
+    def actions(self) -> list[str]:
+        return sorted(self._actions)
+
+    def total_count(self) -> int:
+        return len(self._entries)
+
+
+class BackupFilterProxyModel(QSortFilterProxyModel):
+    """Filters backup rows by action tag, an inclusive [start, end) time range
+    and optionally a set of backup paths (search results)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._action: Optional[str] = None
+        self._start: Optional[float] = None
+        self._end: Optional[float] = None
+        self._paths: Optional[set[str]] = None
+
+    def set_action(self, action: Optional[str]):
+        self._action = action or None
+        self.invalidateFilter()
+
+    def set_date_range(self, start: Optional[float], end: Optional[float]):
+        self._start, self._end = start, end
+        self.invalidateFilter()
+
+    def set_paths(self, paths: Optional[set[str]]):
+        """Only accept backups whose path is in `paths`; None disables the restriction."""
+        self._paths = paths
+        self.invalidateFilter()
+
+    def has_filter(self) -> bool:
+        return (
+            self._action is not None or self._start is not None
+            or self._end is not None or self._paths is not None
+        )
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        info = self.sourceModel().entry(source_row)
+        if info is None:
+            return False
+        if self._action is not None and info.action != self._action:
+            return False
+        if self._start is not None and info.timestamp < self._start:
+            return False
+        if self._end is not None and info.timestamp >= self._end:
+            return False
+        if self._paths is not None and str(info.path) not in self._paths:
+            return False
+        return True
@@ -2,3 +2,4 @@ from app.gui.components.title_bar import DraggableTitleBar
 from app.gui.components.page_navigator import PageNavigator
 from app.gui.components.card import build_card
 from app.gui.components.language_popup import LanguagePopup
+from app.gui.components.backup_browser import BackupBrowser
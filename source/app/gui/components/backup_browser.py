@@ -0,0 +1,379 @@
+import time as _time
+from functools import partial
+from typing import Optional
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QDateEdit,
+    QListView, QSpinBox, QPushButton, QAbstractItemView, QLineEdit
+)
+from PySide6.QtCore import Qt, QDate, QDateTime, QTime, QModelIndex, QThreadPool, Slot
+from app.core.hosts_manager import HostsManager, BackupInfo
+from app.core.backup_index import HostSightings
+from app.core.mapped_text import MappedTextFile
+from app.core.hosts_diff import HostsDiff, UnifiedDiffRows, SideBySideDiffRows
+from app.core.constants import HOSTS_PATH
+from app.gui.localization import tr
+from app.gui.backup_models import BackupListModel, BackupFilterProxyModel
+from app.gui.workers import BackupScanWorker, LineIndexWorker, DiffWorker, BackupSearchWorker
+from app.gui.components.paged_text_view import PagedTextView
+
+_NO_DATE = QDate(2000, 1, 1)
+
+
+def _close_sources(sources: list, *_args):
+    while sources:
+        sources.pop().close()
+
+
+def _list_stylesheet(dark_theme: bool) -> str:
+    if dark_theme:
+        return (
+            "QListView {"
+            "  background: #1a1e24; color: #e6edf3;"
+            "  border: 1.5px solid #3c434d; border-radius: 10px;"
+            "  padding: 6px; font-size: 13px;"
+            "}"
+            "QListView::item:selected { background: #264f78; color: #ffffff; border-radius: 6px; }"
+        )
+    return (
+        "QListView {"
+        "  background: #fafbfc; color: #1a1a1a;"
+        "  border: 1.5px solid #cfd4db; border-radius: 10px;"
+        "  padding: 6px; font-size: 13px;"
+        "}"
+        "QListView::item:selected { background: #add6ff; color: #1a1a1a; border-radius: 6px; }"
+    )
+
+
+def _field_stylesheet(dark_theme: bool) -> str:
+    if dark_theme:
+        return "QDateEdit, QSpinBox, QLineEdit { background: #2d333b; color: #e6edf3; border: 1.5px solid #3c434d; border-radius: 8px; padding: 4px 8px; }"
+    return "QDateEdit, QSpinBox, QLineEdit { background: #f3f4f7; color: #1a1a1a; border: 1.5px solid #cfd4db; border-radius: 8px; padding: 4px 8px; }"
+
+
+class BackupBrowser(QWidget):
+    """Backup list with action/date filters and a read-only content viewer.
+
+    The list is populated asynchronously by BackupScanWorker and exposed to the
+    view lazily by BackupListModel, so the page opens without touching the
+    backup files. The selected backup is memory-mapped and shown through
+    PagedTextView while its line index is built in the background. Compare
+    mode diffs backups in DiffWorker and renders the result lazily too.
+    Hostname search goes through the backup search index in BackupSearchWorker
+    and narrows the list to the snapshots that contain the host.
+    """
+
+    def __init__(self, hosts_manager: HostsManager, styles: dict, dark_theme: bool, parent=None):
+        super().__init__(parent)
+        self.hosts_manager = hosts_manager
+        self.styles = styles
+        self.dark_theme = dark_theme
+        # Open mappings (files or diffs); closed on selection change and when the widget is destroyed.
+        self._sources: list = []
+        self.destroyed.connect(partial(_close_sources, self._sources))
+        self._diff: Optional[HostsDiff] = None
+        self._diff_request = 0
+        self._search_request = 0
+
+        self.model = BackupListModel(self)
+        self.proxy = BackupFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+
+        self._build_ui()
+        self._start_scan()
+
+    def _inline_label(self, text: str) -> QLabel:
+        lbl = QLabel(text)
+        lbl.setObjectName("inline_label")
+        lbl.setStyleSheet(
+            f"font-size: 13px; color: {'#e6edf3' if self.dark_theme else '#1a1a1a'}; background: transparent;"
+        )
+        return lbl
+
+    def _make_date_edit(self) -> QDateEdit:
+        edit = QDateEdit()
+        edit.setCalendarPopup(True)
+        edit.setDisplayFormat("yyyy-MM-dd")
+        edit.setMinimumDate(_NO_DATE)
+        edit.setSpecialValueText(tr("hosts_backup_filter_any_date"))
+        edit.setDate(_NO_DATE)
+        edit.setStyleSheet(_field_stylesheet(self.dark_theme))
+        edit.dateChanged.connect(self._apply_filters)
+        return edit
+
+    def _build_ui(self):
+        vbox = QVBoxLayout(self)
+        vbox.setContentsMargins(0, 0, 0, 0)
+        vbox.setSpacing(8)
+
+        # Filters
+        filter_hbox = QHBoxLayout()
+        filter_hbox.setSpacing(8)
+        filter_hbox.addWidget(self._inline_label(tr("hosts_backup_filter_action")))
+        action_combo = QComboBox()
+        action_combo.setStyleSheet(self.styles["combo"])
+        action_combo.setCursor(Qt.CursorShape.PointingHandCursor)
+        action_combo.addItem(tr("hosts_backup_filter_all"), "")
+        action_combo.currentIndexChanged.connect(self._apply_filters)
+        filter_hbox.addWidget(action_combo, 1)
+        self.action_combo = action_combo
+
+        filter_hbox.addWidget(self._inline_label(tr("hosts_backup_filter_from")))
+        self.from_edit = self._make_date_edit()
+        filter_hbox.addWidget(self.from_edit)
+        filter_hbox.addWidget(self._inline_label(tr("hosts_backup_filter_to")))
+        self.to_edit = self._make_date_edit()
+        filter_hbox.addWidget(self.to_edit)
+        vbox.addLayout(filter_hbox)
+
+        search_hbox = QHBoxLayout()
+        search_hbox.setSpacing(8)
+        search_edit = QLineEdit()
+        search_edit.setPlaceholderText(tr("hosts_backup_search_placeholder"))
+        search_edit.setClearButtonEnabled(True)
+        search_edit.setStyleSheet(_field_stylesheet(self.dark_theme))
+        search_edit.returnPressed.connect(self.search_host)
+        search_edit.textChanged.connect(self._on_search_text_changed)
+        search_hbox.addWidget(search_edit, 1)
+        self.search_edit = search_edit
+        search_btn = QPushButton(tr("hosts_backup_search"))
+        search_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        search_btn.setProperty("style_role", "theme")
+        search_btn.setStyleSheet(self.styles["theme"])
+        search_btn.clicked.connect(self.search_host)
+        search_hbox.addWidget(search_btn)
+        vbox.addLayout(search_hbox)
+
+        # Backup list
+        list_view = QListView()
+        list_view.setModel(self.proxy)
+        list_view.setUniformItemSizes(True)
+        list_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        list_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        list_view.setStyleSheet(_list_stylesheet(self.dark_theme))
+        list_view.setMinimumHeight(110)
+        list_view.setMaximumHeight(160)
+        list_view.selectionModel().currentChanged.connect(self._on_current_changed)
+        vbox.addWidget(list_view)
+        self.list_view = list_view
+
+        status_hbox = QHBoxLayout()
+        status_hbox.setSpacing(8)
+        self.status_label = self._inline_label(tr("hosts_backup_loading"))
+        status_hbox.addWidget(self.status_label, 1)
+        status_hbox.addWidget(self._inline_label(tr("hosts_viewer_goto_line")))
+        line_spin = QSpinBox()
+        line_spin.setRange(1, 1)
+        line_spin.setKeyboardTracking(False)
+        line_spin.setStyleSheet(_field_stylesheet(self.dark_theme))
+        line_spin.valueChanged.connect(self._on_goto_line)
+        status_hbox.addWidget(line_spin)
+        self.line_spin = line_spin
+        vbox.addLayout(status_hbox)
+
+        # Compare controls
+        compare_hbox = QHBoxLayout()
+        compare_hbox.setSpacing(8)
+        compare_btn = QPushButton(tr("hosts_diff_compare"))
+        compare_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        compare_btn.setProperty("style_role", "theme")
+        compare_btn.setStyleSheet(self.styles["theme"])
+        compare_btn.setToolTip(tr("hosts_diff_hint"))
+        compare_btn.clicked.connect(self.compare_selected)
+        compare_hbox.addWidget(compare_btn)
+        diff_mode_combo = QComboBox()
+        diff_mode_combo.setStyleSheet(self.styles["combo"])
+        diff_mode_combo.setCursor(Qt.CursorShape.PointingHandCursor)
+        diff_mode_combo.addItem(tr("hosts_diff_mode_unified"), "unified")
+        diff_mode_combo.addItem(tr("hosts_diff_mode_side"), "side")
+        diff_mode_combo.currentIndexChanged.connect(self._show_diff)
+        compare_hbox.addWidget(diff_mode_combo, 1)
+        self.diff_mode_combo = diff_mode_combo
+        vbox.addLayout(compare_hbox)
+
+        # Paged read-only viewer: only the visible lines are decoded and drawn
+        viewer = PagedTextView(self.dark_theme)
+        viewer.set_placeholder(tr("hosts_backup_loading"))
+        vbox.addWidget(viewer, 1)
+        self.viewer = viewer
+
+    # --- Population ---
+
+    def _start_scan(self):
+        worker = BackupScanWorker(self.hosts_manager)
+        worker.signals.backups_batch.connect(self._on_backups_batch, Qt.ConnectionType.QueuedConnection)
+        worker.signals.backups_done.connect(self._on_backups_done, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(list)
+    def _on_backups_batch(self, entries: list):
+        first_batch = self.model.total_count() == 0
+        known = set(self.model.actions())
+        self.model.append_entries(entries)
+        for action in self.model.actions():
+            if action not in known:
+                self.action_combo.addItem(action, action)
+        if self.proxy.has_filter():
+            self.model.fetch_all()
+        if first_batch and self.proxy.rowCount() > 0:
+            self.list_view.setCurrentIndex(self.proxy.index(0, 0))
+
+    @Slot(int)
+    def _on_backups_done(self, total: int):
+        if total == 0:
+            self.status_label.setText(tr("hosts_backup_none"))
+            self.viewer.set_placeholder(tr("hosts_backup_none_info"))
+        else:
+            self.status_label.setText(tr("hosts_backup_count", count=total))
+
+    # --- Filters ---
+
+    @staticmethod
+    def _date_to_epoch(date: QDate) -> float:
+        return float(QDateTime(date, QTime(0, 0)).toSecsSinceEpoch())
+
+    def _apply_filters(self, *_args):
+        start = None if self.from_edit.date() == _NO_DATE else self._date_to_epoch(self.from_edit.date())
+        end = None if self.to_edit.date() == _NO_DATE else self._date_to_epoch(self.to_edit.date().addDays(1))
+        self.proxy.set_action(self.action_combo.currentData())
+        self.proxy.set_date_range(start, end)
+        if self.proxy.has_filter():
+            # Filtering needs every row the proxy might accept, not just the fetched page.
+            self.model.fetch_all()
+
+    # --- Search ---
+
+    def search_host(self):
+        """Show only the backups that map the hostname typed in the search field."""
+        host = self.search_edit.text().strip()
+        self._search_request += 1
+        if not host:
+            self.proxy.set_paths(None)
+            return
+        self.status_label.setText(tr("hosts_backup_searching"))
+        worker = BackupSearchWorker(self._search_request, self.hosts_manager, host)
+        worker.signals.search_done.connect(self._on_search_done, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_search_text_changed(self, text: str):
+        if not text.strip():
+            self.search_host()
+
+    @Slot(int, object, object)
+    def _on_search_done(self, request_id: int, paths: set, sightings: HostSightings):
+        if request_id != self._search_request:
+            return
+        self.model.fetch_all()
+        self.proxy.set_paths(paths)
+        if not sightings.count:
+            self.status_label.setText(tr("hosts_backup_search_none", host=sightings.host))
+            return
+        fmt = "%Y-%m-%d %H:%M:%S"
+        self.status_label.setText(tr(
+            "hosts_backup_search_result",
+            host=sightings.host,
+            count=sightings.count,
+            first=_time.strftime(fmt, _time.localtime(sightings.first_seen)),
+            last=_time.strftime(fmt, _time.localtime(sightings.last_seen)),
+        ))
+
+    # --- Content ---
+
+    def selected_backup(self) -> Optional[BackupInfo]:
+        index = self.list_view.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(BackupListModel.BackupInfoRole)
+
+    def _on_current_changed(self, current: QModelIndex, _previous: QModelIndex):
+        info = current.data(BackupListModel.BackupInfoRole) if current.isValid() else None
+        if info is None:
+            return
+        self._close_source()
+        self._diff = None
+        self._diff_request += 1
+        try:
+            source = MappedTextFile(info.path, start=self.hosts_manager.backup_content_offset(info.path))
+        except OSError as e:
+            self.viewer.set_placeholder(tr("hosts_backup_open_error", hint=str(e)))
+            return
+        self._sources.append(source)
+        self.viewer.set_source(source)
+        self.line_spin.setRange(1, 1)
+
+        worker = LineIndexWorker(source)
+        worker.signals.index_progress.connect(self._on_index_progress, Qt.ConnectionType.QueuedConnection)
+        worker.signals.index_done.connect(self._on_index_progress, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(int)
+    def _on_index_progress(self, line_count: int):
+        source = self.viewer.source()
+        if source is None:
+            return
+        self.viewer.refresh()
+        self.line_spin.setRange(1, max(1, source.line_count()))
+
+    # --- Compare ---
+
+    def compare_selected(self):
+        """Diff the two selected backups, or the selected backup against the live hosts file."""
+        rows = self.list_view.selectionModel().selectedRows()
+        infos = [r.data(BackupListModel.BackupInfoRole) for r in rows]
+        infos = sorted((i for i in infos if i is not None), key=lambda i: i.timestamp)
+        if not infos:
+            self.status_label.setText(tr("hosts_diff_hint"))
+            return
+        old = infos[-2] if len(infos) >= 2 else infos[-1]
+        old_path, old_start = str(old.path), self.hosts_manager.backup_content_offset(old.path)
+        if len(infos) >= 2:
+            new = infos[-1]
+            new_path, new_start = str(new.path), self.hosts_manager.backup_content_offset(new.path)
+        else:
+            new_path, new_start = str(HOSTS_PATH), 0
+
+        self._diff_request += 1
+        self.status_label.setText(tr("hosts_diff_running"))
+        # The live hosts file is diffed from a copy: a mapping held while the
+        # diff is on screen would block replacing it on Windows.
+        worker = DiffWorker(
+            self._diff_request, old_path, old_start, new_path, new_start, new_snapshot=len(infos) < 2,
+        )
+        worker.signals.diff_ready.connect(self._on_diff_ready, Qt.ConnectionType.QueuedConnection)
+        worker.signals.diff_failed.connect(self._on_diff_failed, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(int, object)
+    def _on_diff_ready(self, request_id: int, diff: HostsDiff):
+        if request_id != self._diff_request:
+            diff.close()
+            return
+        self._close_source()
+        self._sources.append(diff)
+        self._diff = diff
+        if diff.is_identical():
+            self.status_label.setText(tr("hosts_diff_identical"))
+        else:
+            self.status_label.setText(tr("hosts_diff_summary", added=diff.added, removed=diff.removed))
+        self._show_diff()
+
+    @Slot(int, str)
+    def _on_diff_failed(self, request_id: int, error: str):
+        if request_id == self._diff_request:
+            self.status_label.setText(tr("hosts_diff_error", hint=error))
+
+    def _show_diff(self, *_args):
+        if self._diff is None:
+            return
+        if self.diff_mode_combo.currentData() == "side":
+            rows = SideBySideDiffRows(self._diff)
+        else:
+            rows = UnifiedDiffRows(self._diff)
+        self.viewer.set_source(rows)
+        self.line_spin.setRange(1, max(1, rows.line_count()))
+
+    def _on_goto_line(self, line: int):
+        self.viewer.jump_to_line(line)
+
+    def _close_source(self):
+        while self._sources:
+            self._sources.pop().close()
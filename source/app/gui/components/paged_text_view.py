@@ -0,0 +1,180 @@
+from PySide6.QtWidgets import QAbstractScrollArea, QSizePolicy
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QFont, QFontMetrics, QPainter, QColor
+
+
+def _view_stylesheet(dark_theme: bool) -> str:
+    if dark_theme:
+        return (
+            "QAbstractScrollArea {"
+            "  background: #1a1e24;"
+            "  border: 1.5px solid #3c434d; border-radius: 10px;"
+            "}"
+        )
+    return (
+        "QAbstractScrollArea {"
+        "  background: #fafbfc;"
+        "  border: 1.5px solid #cfd4db; border-radius: 10px;"
+        "}"
+    )
+
+
+class PagedTextView(QAbstractScrollArea):
+    """Read-only text view that only lays out the lines currently on screen.
+
+    The source is any object with line_count() and lines(start, count), such
+    as MappedTextFile. Scrolling and jump_to_line() fetch just the visible
+    window, so cost does not depend on the total number of lines.
+
+    Sources may also provide line_kinds(start, count) returning diff markers
+    ("+", "-", "~", "@") to tint rows, and line_numbers = False to hide the
+    gutter.
+    """
+
+    PADDING = 8
+
+    def __init__(self, dark_theme: bool, show_line_numbers: bool = True, parent=None):
+        super().__init__(parent)
+        self.dark_theme = dark_theme
+        self.show_line_numbers = show_line_numbers
+        self._source = None
+        self._placeholder = ""
+        self._max_chars = 0
+
+        font = QFont("Consolas", 11)
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        self.setFont(font)
+        self.setStyleSheet(_view_stylesheet(dark_theme))
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+
+        self._bg = QColor("#1a1e24" if dark_theme else "#fafbfc")
+        self._fg = QColor("#e6edf3" if dark_theme else "#1a1a1a")
+        self._gutter_fg = QColor("#8b949e" if dark_theme else "#666666")
+        if dark_theme:
+            self._kind_bg = {"+": QColor("#1f3d2b"), "-": QColor("#4b2a2e"), "~": QColor("#3d3620"), "@": QColor("#26303d")}
+        else:
+            self._kind_bg = {"+": QColor("#e6ffec"), "-": QColor("#ffebe9"), "~": QColor("#fff8c5"), "@": QColor("#ddf4ff")}
+
+    # --- Public API ---
+
+    def set_source(self, source):
+        self._source = source
+        self._max_chars = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.refresh()
+
+    def source(self):
+        return self._source
+
+    def set_placeholder(self, text: str):
+        """Show text instead of a source (e.g. "no backups")."""
+        self._source = None
+        self._placeholder = text
+        self.refresh()
+
+    def refresh(self):
+        """Re-read line_count() from the source, e.g. while its index is growing."""
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def jump_to_line(self, line: int):
+        """Scroll so that 1-based line is at the top."""
+        self.verticalScrollBar().setValue(max(0, line - 1))
+
+    def first_visible_line(self) -> int:
+        return self.verticalScrollBar().value() + 1
+
+    # --- Geometry ---
+
+    def _line_height(self) -> int:
+        return QFontMetrics(self.font()).lineSpacing()
+
+    def _char_width(self) -> int:
+        return max(1, QFontMetrics(self.font()).horizontalAdvance("0"))
+
+    def _visible_rows(self) -> int:
+        return max(1, (self.viewport().height() - self.PADDING) // self._line_height())
+
+    def _shows_line_numbers(self) -> bool:
+        return self.show_line_numbers and getattr(self._source, "line_numbers", True)
+
+    def _gutter_width(self, total: int) -> int:
+        if not self._shows_line_numbers():
+            return self.PADDING
+        return self.PADDING * 2 + self._char_width() * len(str(max(total, 1)))
+
+    def _update_scrollbars(self):
+        total = self._source.line_count() if self._source is not None else 0
+        rows = self._visible_rows()
+        vsb = self.verticalScrollBar()
+        vsb.setRange(0, max(0, total - rows))
+        vsb.setPageStep(rows)
+        vsb.setSingleStep(1)
+
+        content_width = self._gutter_width(total) + self._max_chars * self._char_width() + self.PADDING
+        hsb = self.horizontalScrollBar()
+        hsb.setRange(0, max(0, content_width - self.viewport().width()))
+        hsb.setPageStep(self.viewport().width())
+        hsb.setSingleStep(self._char_width() * 4)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        self.viewport().update()
+
+    # --- Painting ---
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), self._bg)
+        painter.setFont(self.font())
+        metrics = QFontMetrics(self.font())
+        lh = metrics.lineSpacing()
+        ascent = metrics.ascent()
+
+        if self._source is None:
+            if self._placeholder:
+                painter.setPen(self._gutter_fg)
+                rect = self.viewport().rect().adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+                flags = (Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop).value | Qt.TextFlag.TextWordWrap.value
+                painter.drawText(rect, flags, self._placeholder)
+            return
+
+        total = self._source.line_count()
+        first = self.verticalScrollBar().value()
+        rows = self._visible_rows() + 1
+        lines = self._source.lines(first, rows)
+        kinds_fn = getattr(self._source, "line_kinds", None)
+        kinds = kinds_fn(first, rows) if kinds_fn else []
+        numbers = self._shows_line_numbers()
+        gutter = self._gutter_width(total)
+        x_text = gutter - self.horizontalScrollBar().value()
+        digits = len(str(max(total, 1)))
+        width = self.viewport().width()
+
+        longest = self._max_chars
+        for i, text in enumerate(lines):
+            text = text.expandtabs(4)
+            longest = max(longest, len(text))
+            top = self.PADDING // 2 + i * lh
+            y = top + ascent
+            color = self._kind_bg.get(kinds[i]) if i < len(kinds) else None
+            if color is not None:
+                painter.fillRect(0, top, width, lh, color)
+            painter.setClipRect(gutter, 0, max(0, width - gutter), self.viewport().height())
+            painter.setPen(self._fg)
+            painter.drawText(x_text, y, text)
+            painter.setClipping(False)
+            if numbers:
+                painter.setPen(self._gutter_fg)
+                painter.drawText(self.PADDING, y, str(first + i + 1).rjust(digits))
+
+        if longest > self._max_chars:
+            # Grow the horizontal range lazily as wider lines scroll into view.
+            self._max_chars = longest
+            QTimer.singleShot(0, self._update_scrollbars)
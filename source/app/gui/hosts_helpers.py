@@ -1,12 +1,12 @@
 import os
 import sys
-import shutil
 import subprocess
 from PySide6.QtWidgets import QApplication, QMessageBox, QLabel
 from PySide6.QtCore import Qt, QTimer
 from app.core.logger import logger
 from app.core.constants import HOSTS_PATH, HOSTS_BACKUP_DIR
 from app.core.hosts_manager import HostsManager
+from app.core.capabilities import get_capabilities
 from app.utils.helpers import open_target
 from app.gui.localization import tr, normalize_language, CURRENT_LANGUAGE
 
@@ -42,27 +42,22 @@ def _open_hosts_file_windows_as_admin() -> tuple[bool, str | None]:
         return False, str(e)
 
 def _open_hosts_file_linux_as_admin(wait=False) -> tuple[bool, str | None]:
-    editors = (
-        "gnome-text-editor", "gedit", "xed", "pluma", "mousepad",
-        "geany", "kate", "kwrite", "featherpad", "leafpad",
-    )
+    caps = get_capabilities()
     display_env = [
         f"{k}={v}" for k, v in os.environ.items()
         if k in ("DISPLAY", "XAUTHORITY", "WAYLAND_DISPLAY", "XDG_RUNTIME_DIR", "DBUS_SESSION_BUS_ADDRESS")
     ]
 
     if os.geteuid() == 0:
-        for editor in editors:
-            ep = shutil.which(editor)
-            if ep:
-                try:
-                    if wait:
-                        subprocess.run([ep, str(HOSTS_PATH)], check=True)
-                    else:
-                        subprocess.Popen([ep, str(HOSTS_PATH)], start_new_session=True)
-                    return True, None
-                except Exception:
-                    continue
+        for _name, ep in caps.editors:
+            try:
+                if wait:
+                    subprocess.run([ep, str(HOSTS_PATH)], check=True)
+                else:
+                    subprocess.Popen([ep, str(HOSTS_PATH)], start_new_session=True)
+                return True, None
+            except Exception:
+                continue
         try:
             open_target(str(HOSTS_PATH))
             return True, None
@@ -70,21 +65,14 @@ def _open_hosts_file_linux_as_admin(wait=False) -> tuple[bool, str | None]:
             logger.error("Open error: %s", e)
             return False, str(e)
 
-    launchers = []
-    if shutil.which("pkexec"):
-        launchers.append("pkexec")
-    for su in ("gksudo", "kdesudo"):
-        if shutil.which(su):
-            launchers.append(su)
+    # Graphical launchers only: sudo would prompt on a terminal nobody sees.
+    launchers = [(name, path) for name, path in caps.launchers if name in ("pkexec", "gksudo", "kdesudo")]
 
-    for editor in editors:
-        ep = shutil.which(editor)
-        if not ep:
-            continue
-        for launcher in launchers:
+    for _editor, ep in caps.editors:
+        for name, launcher in launchers:
             try:
-                if launcher == "pkexec":
-                    cmd = ["pkexec"]
+                if name == "pkexec":
+                    cmd = [launcher]
                     if display_env:
                         cmd.extend(["env", *display_env])
                     cmd.extend([ep, str(HOSTS_PATH)])
@@ -108,9 +96,11 @@ def _open_hosts_file_macos_as_admin(wait=False) -> tuple[bool, str | None]:
     target = str(HOSTS_PATH).replace("'", "'\\''")
     applescript = f"do shell script \"open -e '{target}'\" with administrator privileges"
 
-    if shutil.which("osascript"):
+    caps = get_capabilities()
+    osascript = caps.launcher("osascript")
+    if osascript:
         try:
-            cmd = ["osascript", "-e", applescript]
+            cmd = [osascript, "-e", applescript]
             if wait:
                 res = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
                 if res.returncode != 0:
@@ -123,9 +113,10 @@ def _open_hosts_file_macos_as_admin(wait=False) -> tuple[bool, str | None]:
             logger.error("macOS admin open error: %s", e)
             return False, str(e)
 
-    if shutil.which("sudo"):
+    sudo = caps.launcher("sudo")
+    if sudo:
         try:
-            cmd = ["sudo", "open", "-e", str(HOSTS_PATH)]
+            cmd = [sudo, "open", "-e", str(HOSTS_PATH)]
             if wait:
                 subprocess.run(cmd, check=True, timeout=60)
             else:
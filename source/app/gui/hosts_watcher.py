@@ -0,0 +1,90 @@
+import os
+from typing import Optional
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, QThreadPool, Qt, Signal, Slot
+from app.core.constants import HOSTS_PATH
+from app.core.hosts_manager import HostsManager
+from app.core.logger import logger
+from app.gui.workers import ExternalChangeWorker
+
+
+class HostsWatcher(QObject):
+    """Watches the hosts file and reports changes, debounced.
+
+    QFileSystemWatcher (inotify, kqueue or ReadDirectoryChangesW underneath)
+    loses track of a file that is replaced by rename, which is how this app
+    and most editors write hosts, so the parent directory is watched as well
+    and the file watch is re-armed after every event. Directory events for
+    other files are filtered out by comparing the hosts file's stat.
+
+    hosts_changed(external) fires once per burst of events, after the
+    manager's cache was invalidated; `external` is False when the file holds
+    exactly what the app itself last wrote. Telling the two apart reads the
+    file, so it runs on the thread pool and only the newest burst reports.
+    """
+
+    hosts_changed = Signal(bool)
+
+    DEBOUNCE_MS = 300
+
+    def __init__(self, manager: HostsManager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self._check_request = 0
+        self._path = str(HOSTS_PATH)
+        self._signature = self._stat_signature()
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_event)
+        self._watcher.directoryChanged.connect(self._on_event)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._emit_change)
+        self._arm()
+        manager.set_watched(bool(self._watcher.files() or self._watcher.directories()))
+
+    def _stat_signature(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _arm(self):
+        directory = os.path.dirname(self._path)
+        if directory not in self._watcher.directories() and os.path.isdir(directory):
+            if not self._watcher.addPath(directory):
+                logger.debug("Cannot watch %s", directory)
+        if self._path not in self._watcher.files() and os.path.exists(self._path):
+            if not self._watcher.addPath(self._path):
+                logger.debug("Cannot watch %s", self._path)
+
+    def _on_event(self, _path: str):
+        # Drop the cache right away so reads in the debounce window are fresh;
+        # only the signal waits for the burst to settle.
+        self.manager.invalidate_cache()
+        self._arm()
+        self._timer.start()
+
+    def _emit_change(self):
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+        self._signature = signature
+        self.manager.invalidate_cache()
+        self._check_request += 1
+        worker = ExternalChangeWorker(self._check_request, self.manager)
+        worker.signals.change_checked.connect(self._on_change_checked, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(int, bool)
+    def _on_change_checked(self, request_id: int, external: bool):
+        if request_id == self._check_request:
+            self.hosts_changed.emit(external)
+
+    def stop(self):
+        self._timer.stop()
+        self._check_request += 1
+        paths = self._watcher.files() + self._watcher.directories()
+        if paths:
+            self._watcher.removePaths(paths)
+        self.manager.set_watched(False)
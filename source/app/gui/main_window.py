@@ -9,10 +9,14 @@ from PySide6.QtGui import QIcon
 
 from app.core.constants import resource_path
 from app.core.hosts_manager import HostsManager, HostsStatusResult
+from app.core.logger import logger
+from app.core.hosts_guard import HostsGuard, GuardResult
+from app.core.settings import get_setting
 from app.gui.localization import tr, set_current_language
 from app.gui.styles import get_stylesheet, get_about_toolbutton_style, clear_stylesheet_cache, is_system_dark_theme
 from app.gui.icons import get_icon, refresh_icons
-from app.gui.workers import HostsWorker, VersionWorker, AppUpdateWorker
+from app.gui.workers import HostsWorker, VersionWorker, AppUpdateWorker, HostsGuardWorker, JournalRecoveryWorker
+from app.gui.hosts_watcher import HostsWatcher
 from app.gui.components.title_bar import DraggableTitleBar
 from app.gui.components.page_navigator import PageNavigator
 from app.gui.pages.home_page import HomePage
@@ -28,6 +32,8 @@ from app.gui.pages.hosts_editor_page import build_hosts_editor_page, build_hosts
 
 
 class MainWindow(QMainWindow):
+    GUARD_DELAY_MS = 2000
+
     def __init__(self):
         super().__init__()
         self.is_animating = False
@@ -74,6 +80,20 @@ class MainWindow(QMainWindow):
         self._setup_ui()
         self._apply_main_texts()
         self.check_version_status()
+        self._recover_journal()
+
+        self.hosts_watcher = HostsWatcher(self.hosts_manager, self)
+        self.hosts_watcher.hosts_changed.connect(self._on_hosts_file_changed)
+
+        # Opt-in: put the provider list back when something reverts hosts.
+        self.hosts_guard: Optional[HostsGuard] = None
+        self._guard_running = False
+        self._guard_timer = QTimer(self)
+        self._guard_timer.setSingleShot(True)
+        self._guard_timer.setInterval(self.GUARD_DELAY_MS)
+        self._guard_timer.timeout.connect(self._run_hosts_guard)
+        if get_setting("hosts_guard", False):
+            self.hosts_guard = HostsGuard(self.hosts_manager)
 
     def _setup_ui(self):
         main_container = QWidget()
@@ -116,7 +136,10 @@ class MainWindow(QMainWindow):
         self.title_label = title_label
 
         # Home page
-        home_page = HomePage(self.hosts_manager, self.styles, self.dark_theme, self.current_provider)
+        home_page = HomePage(
+            self.hosts_manager, self.styles, self.dark_theme, self.current_provider,
+            guard_enabled=get_setting("hosts_guard", False),
+        )
         self.home_page = home_page
 
         # Footer with language/theme buttons
@@ -186,6 +209,7 @@ class MainWindow(QMainWindow):
         home_page.provider_changed.connect(self._on_provider_changed)
         home_page.open_hosts_requested.connect(self.show_hosts_editor)
         home_page.view_backups_requested.connect(self.show_hosts_backup_viewer)
+        home_page.guard_toggled.connect(self._set_hosts_guard)
 
     # --- Window helpers ---
 
@@ -227,14 +251,19 @@ class MainWindow(QMainWindow):
 
     # --- Pages ---
 
-    def show_message(self, msg: str, success: bool = True, word_wrap: bool = False):
+    def show_message(self, msg: str, success: bool = True, word_wrap: bool = False, undo: bool = False):
         widget = build_message_page(
             msg, success, word_wrap, self.styles, self.dark_theme,
             fix_size_fn=self._fix_widget_size,
             ok_callback=lambda: self._return_to_main(widget),
+            undo_callback=(lambda: self._undo_from(widget)) if undo else None,
         )
         self._add_and_switch(widget)
 
+    def _undo_from(self, widget: QWidget):
+        self._return_to_main(widget)
+        self.start_installation("undo")
+
     def show_processing(self, action: str) -> QWidget:
         widget = build_processing_page(
             action, self.styles, self.dark_theme,
@@ -275,10 +304,11 @@ class MainWindow(QMainWindow):
         self._add_and_switch(widget)
 
     def show_hosts_editor(self):
-        def _on_save(content: str):
+        def _on_save(content: str, base: str):
             self._processing_widget = self.show_processing("save")
             worker = HostsWorker("save", self.hosts_manager, self.current_provider, self)
             worker.save_content = content
+            worker.save_base = base
             worker.signals.finished.connect(self._on_hosts_save_finished, Qt.ConnectionType.QueuedConnection)
             QThreadPool.globalInstance().start(worker)
 
@@ -287,6 +317,7 @@ class MainWindow(QMainWindow):
             return_callback=lambda: self._return_to_main(widget),
             save_callback=_on_save,
             fix_size_fn=self._fix_widget_size,
+            hosts_changed=self.hosts_watcher.hosts_changed,
         )
         self._add_and_switch(widget)
 
@@ -306,7 +337,8 @@ class MainWindow(QMainWindow):
             QTimer.singleShot(400, lambda: self._remove_widget(proc))
 
         if ok:
-            self.show_message(tr("hosts_editor_save_success"), success=True, word_wrap=True)
+            self.show_message(tr("hosts_editor_save_success") + self._merge_note(), success=True, word_wrap=True,
+                              undo=self.hosts_manager.can_undo())
         else:
             hint = self._get_error_hint(error)
             self.show_message(tr("hosts_editor_save_error", hint=hint), success=False, word_wrap=True)
@@ -314,6 +346,15 @@ class MainWindow(QMainWindow):
         self.home_page.update_status_label()
         self.check_version_status()
 
+    def _merge_note(self) -> str:
+        """Extra message text when the last write had to merge edits made outside the app."""
+        manager = self.hosts_manager
+        if manager.last_merge_conflicts:
+            return "\n\n" + tr("hosts_merge_conflicts", count=len(manager.last_merge_conflicts))
+        if manager.last_merge_kept:
+            return "\n\n" + tr("hosts_merge_kept", count=manager.last_merge_kept)
+        return ""
+
     def _get_error_hint(self, error: str) -> str:
         """Determine the error hint to show based on the actual error and privileges."""
         import os
@@ -351,16 +392,21 @@ class MainWindow(QMainWindow):
 
     @Slot(str, bool, str, bool)
     def on_hosts_finished(self, action: str, ok: bool, error: str, backup_failed: bool = False):
+        if ok and self.hosts_guard is not None:
+            self.hosts_guard.reset()
         if ok:
             if action == "install":
                 msg = tr("install_success")
             elif action == "update":
                 msg = tr("update_success")
+            elif action == "undo":
+                msg = tr("undo_success")
             else:
                 msg = tr("uninstall_success")
             if backup_failed:
                 msg += "\n\n" + tr("backup_warning")
-            self.show_message(msg, success=True, word_wrap=True)
+            msg += self._merge_note()
+            self.show_message(msg, success=True, word_wrap=True, undo=self.hosts_manager.can_undo())
         else:
             hint = self._get_error_hint(error)
 
@@ -368,6 +414,8 @@ class MainWindow(QMainWindow):
                 msg = tr("install_error", hint=hint)
             elif action == "update":
                 msg = tr("update_error", hint=hint)
+            elif action == "undo":
+                msg = tr("undo_error", hint=hint)
             else:
                 msg = tr("uninstall_error", hint=hint)
             self.show_message(msg, success=False, word_wrap=True)
@@ -380,6 +428,55 @@ class MainWindow(QMainWindow):
         self.home_page.update_status_label()
         self.check_version_status()
 
+    @Slot(bool)
+    def _on_hosts_file_changed(self, external: bool):
+        if external:
+            logger.info("Hosts file changed outside the app")
+            if self.hosts_guard is not None:
+                # Give whatever rewrote hosts time to finish before checking.
+                self._guard_timer.start()
+        self.home_page.update_status_label()
+        self.check_version_status()
+
+    @Slot(bool)
+    def _set_hosts_guard(self, enabled: bool):
+        from app.core.settings import set_setting
+        set_setting("hosts_guard", enabled)
+        if enabled and self.hosts_guard is None:
+            self.hosts_guard = HostsGuard(self.hosts_manager)
+        elif not enabled:
+            self.hosts_guard = None
+            self._guard_timer.stop()
+
+    def _run_hosts_guard(self):
+        if self._guard_running or self.hosts_guard is None:
+            return
+        self._guard_running = True
+        worker = HostsGuardWorker(self.hosts_guard, self)
+        worker.signals.guard_done.connect(self._on_hosts_guard_done, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(object)
+    def _on_hosts_guard_done(self, result: GuardResult):
+        self._guard_running = False
+        if result.status == "healed":
+            logger.info("Hosts guard re-applied the provider list: %s", result.detail)
+        elif result.status == "gave_up" and result.detail:
+            self.show_message(tr("hosts_guard_gave_up"), success=False, word_wrap=True)
+        elif result.status in ("throttled", "busy"):
+            self._guard_timer.start()
+
+    def _recover_journal(self):
+        """Finish or roll back a hosts write that a crash interrupted, off the UI thread."""
+        worker = JournalRecoveryWorker(self.hosts_manager, self)
+        worker.signals.journal_recovered.connect(self._on_journal_recovered, Qt.ConnectionType.QueuedConnection)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(int)
+    def _on_journal_recovered(self, resolved: int):
+        if resolved:
+            self.check_version_status()
+
     # --- Version status ---
 
     def check_version_status(self):
@@ -399,10 +496,7 @@ class MainWindow(QMainWindow):
         self.home_page.apply_hosts_version_status(status)
 
     def _detect_installed_provider(self) -> str:
-        content = self.hosts_manager.read()
-        if "dns.geohide.ru" in content:
-            return "geohide"
-        return "dns.malw.link"
+        return self.hosts_manager.detect_provider()
 
     def _on_provider_changed(self, provider: str):
         self.current_provider = provider
@@ -582,7 +676,7 @@ class MainWindow(QMainWindow):
                     child.setStyleSheet(self.styles["message_label"])
                 elif name == "message_block_label":
                     child.setStyleSheet(self.styles["message_block_label"])
-                elif name == "message_emoji":
+                elif name in ("message_emoji", "inline_label"):
                     continue
                 else:
                     child.setStyleSheet(self.styles["label"])
@@ -1,6 +1,6 @@
 from typing import Optional
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QCheckBox
 )
 from PySide6.QtCore import Qt, Signal, QSize
 from app.core.hosts_manager import HostsManager, HostsStatusResult
@@ -20,13 +20,16 @@ class HomePage(QWidget):
     provider_changed = Signal(str)        # provider id
     open_hosts_requested = Signal()       # open built-in hosts editor
     view_backups_requested = Signal()     # open built-in backup viewer
+    guard_toggled = Signal(bool)          # keep hosts protected on/off
 
-    def __init__(self, hosts_manager: HostsManager, styles: dict, dark_theme: bool, current_provider: str):
+    def __init__(self, hosts_manager: HostsManager, styles: dict, dark_theme: bool, current_provider: str,
+                 guard_enabled: bool = False):
         super().__init__()
         self.hosts_manager = hosts_manager
         self.styles = styles
         self.dark_theme = dark_theme
         self.current_provider = current_provider
+        self.guard_enabled = guard_enabled
 
         # UI references
         self.app_title_label: Optional[QLabel] = None
@@ -43,6 +46,7 @@ class HomePage(QWidget):
         self.backup_hosts_button: Optional[QPushButton] = None
         self.provider_combo: Optional[QComboBox] = None
         self.provider_repo_button: Optional[QPushButton] = None
+        self.guard_checkbox: Optional[QCheckBox] = None
 
         self._build_ui()
 
@@ -91,6 +95,14 @@ class HomePage(QWidget):
         )
         self.update_date_label = update_date_label
 
+        guard_checkbox = QCheckBox(tr("hosts_guard_toggle"))
+        guard_checkbox.setChecked(self.guard_enabled)
+        guard_checkbox.setToolTip(tr("hosts_guard_tooltip"))
+        guard_checkbox.setCursor(Qt.CursorShape.PointingHandCursor)
+        guard_checkbox.setStyleSheet(self._guard_checkbox_style())
+        guard_checkbox.toggled.connect(self.guard_toggled.emit)
+        self.guard_checkbox = guard_checkbox
+
         # Provider combo
         provider_combo = QComboBox()
         provider_combo.addItem(tr("provider_malw"), "dns.malw.link")
@@ -131,6 +143,7 @@ class HomePage(QWidget):
         status_vbox.addWidget(textinformer)
         status_vbox.addWidget(version_label)
         status_vbox.addWidget(update_date_label)
+        status_vbox.addWidget(guard_checkbox, alignment=Qt.AlignmentFlag.AlignCenter)
         self.status_container = status_container
         self.refresh_status_container_style()
         layout.addWidget(status_container)
@@ -283,6 +296,8 @@ class HomePage(QWidget):
         self.update_button.setText(tr("update_button"))
         self.open_hosts_button.setText(tr("open_hosts_button"))
         self.backup_hosts_button.setText(tr("backup_hosts_button"))
+        self.guard_checkbox.setText(tr("hosts_guard_toggle"))
+        self.guard_checkbox.setToolTip(tr("hosts_guard_tooltip"))
 
     def apply_theme_styles(self):
         self.app_title_label.setStyleSheet(self.styles["about_title_style"])
@@ -301,6 +316,7 @@ class HomePage(QWidget):
         self.backup_hosts_button.setStyleSheet(self.styles["theme"])
         self.update_button.setStyleSheet(self.styles["theme"])
         self.about_button.setStyleSheet(self.styles["theme"])
+        self.guard_checkbox.setStyleSheet(self._guard_checkbox_style())
         self.refresh_status_container_style()
 
     def refresh_status_container_style(self):
@@ -310,6 +326,10 @@ class HomePage(QWidget):
 
     # --- Private ---
 
+    def _guard_checkbox_style(self) -> str:
+        text_color = "#ffffff" if self.dark_theme else "#1a1a1a"
+        return f"QCheckBox {{ font-size: 13px; color: {text_color}; background: transparent; border: none; }}"
+
     def _on_provider_changed(self):
         selected_provider = self.provider_combo.currentData()
         if selected_provider:
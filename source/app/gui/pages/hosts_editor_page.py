@@ -1,15 +1,15 @@
 from typing import Callable, Optional
-from pathlib import Path
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QPlainTextEdit, QComboBox, QSizePolicy
+    QPlainTextEdit, QSizePolicy
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, SignalInstance
 from PySide6.QtGui import QFont
 from app.core.hosts_manager import HostsManager
 from app.core.constants import HOSTS_PATH
 from app.gui.localization import tr
 from app.gui.icons import create_icon_label
+from app.gui.components.backup_browser import BackupBrowser
 
 
 def _editor_stylesheet(dark_theme: bool) -> str:
@@ -39,8 +39,9 @@ def build_hosts_editor_page(
     styles: dict,
     dark_theme: bool,
     return_callback: Callable[[], None],
-    save_callback: Optional[Callable[[str], None]] = None,
+    save_callback: Optional[Callable[[str, str], None]] = None,
     fix_size_fn: Optional[Callable[[QWidget], None]] = None,
+    hosts_changed: Optional[SignalInstance] = None,
 ) -> QWidget:
     """Build the in-app hosts file editor page.
 
@@ -49,8 +50,11 @@ def build_hosts_editor_page(
         styles: Current stylesheet dict.
         dark_theme: Whether dark theme is active.
         return_callback: Called when user clicks "Back".
-        save_callback: Called with new content on save (runs in worker).
+        save_callback: Called with the new content and the content it was
+            loaded from on save (runs in worker).
         fix_size_fn: Optional size constraint function.
+        hosts_changed: HostsWatcher.hosts_changed; shows a notice when hosts
+            changes on disk while the editor is open.
 
     Returns:
         The editor page QWidget.
@@ -85,7 +89,8 @@ def build_hosts_editor_page(
 
     # Text editor
     editor = QPlainTextEdit()
-    editor.setPlainText(hosts_manager.read())
+    loaded = hosts_manager.read()
+    editor.setPlainText(loaded)
     editor.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
     editor.setStyleSheet(_editor_stylesheet(dark_theme))
     font = QFont("Consolas", 11)
@@ -94,6 +99,22 @@ def build_hosts_editor_page(
     editor.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
     vbox.addWidget(editor, 1)
 
+    notice = QLabel(tr("hosts_editor_changed_on_disk"))
+    notice.setWordWrap(True)
+    notice.setStyleSheet(
+        f"font-size: 12px; color: {'#e3b341' if dark_theme else '#9a6700'}; background: transparent;"
+    )
+    notice.hide()
+    vbox.addWidget(notice)
+
+    if hosts_changed is not None:
+        def _on_hosts_changed(external: bool):
+            if external:
+                notice.show()
+
+        hosts_changed.connect(_on_hosts_changed)
+        page.destroyed.connect(lambda: hosts_changed.disconnect(_on_hosts_changed))
+
     # Buttons
     btn_hbox = QHBoxLayout()
     btn_hbox.setSpacing(12)
@@ -119,7 +140,7 @@ def build_hosts_editor_page(
     def _on_save():
         content = editor.toPlainText()
         if save_callback:
-            save_callback(content)
+            save_callback(content, loaded)
 
     save_btn.clicked.connect(_on_save)
 
@@ -167,33 +188,9 @@ def build_hosts_backup_viewer_page(
     header_hbox.addStretch()
     vbox.addLayout(header_hbox)
 
-    # Backup selector
-    selector_hbox = QHBoxLayout()
-    selector_hbox.setSpacing(8)
-
-    selector_label = QLabel(tr("hosts_backup_select"))
-    selector_label.setStyleSheet(
-        f"font-size: 13px; color: {'#e6edf3' if dark_theme else '#1a1a1a'}; background: transparent;"
-    )
-    selector_hbox.addWidget(selector_label)
-
-    combo = QComboBox()
-    combo.setStyleSheet(styles["combo"])
-    combo.setCursor(Qt.CursorShape.PointingHandCursor)
-    combo.setMinimumWidth(300)
-    selector_hbox.addWidget(combo, 1)
-    vbox.addLayout(selector_hbox)
-
-    # Text viewer (read-only)
-    viewer = QPlainTextEdit()
-    viewer.setReadOnly(True)
-    viewer.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
-    viewer.setStyleSheet(_editor_stylesheet(dark_theme))
-    font = QFont("Consolas", 11)
-    font.setStyleHint(QFont.StyleHint.Monospace)
-    viewer.setFont(font)
-    viewer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-    vbox.addWidget(viewer, 1)
+    # Backup list + viewer
+    browser = BackupBrowser(hosts_manager, styles, dark_theme)
+    vbox.addWidget(browser, 1)
 
     # Buttons
     btn_hbox = QHBoxLayout()
@@ -209,35 +206,4 @@ def build_hosts_backup_viewer_page(
     btn_hbox.addStretch()
     vbox.addLayout(btn_hbox)
 
-    # Populate backups
-    backups: list[Path] = hosts_manager.get_backups_list()
-
-    if not backups:
-        combo.addItem(tr("hosts_backup_none"), None)
-        viewer.setPlainText(tr("hosts_backup_none_info"))
-    else:
-        for bp in backups:
-            try:
-                mtime = bp.stat().st_mtime
-                import time as _time
-                date_str = _time.strftime("%Y-%m-%d %H:%M:%S", _time.localtime(mtime))
-            except Exception:
-                date_str = bp.name
-            combo.addItem(f"{date_str}  ({bp.name})", str(bp))
-
-        # Load first backup
-        def _load_backup(index: int):
-            path_str = combo.itemData(index)
-            if not path_str:
-                viewer.setPlainText(tr("hosts_backup_none_info"))
-                return
-            try:
-                content = Path(path_str).read_text(encoding="utf-8", errors="ignore")
-                viewer.setPlainText(content)
-            except Exception as e:
-                viewer.setPlainText(f"Error: {e}")
-
-        combo.currentIndexChanged.connect(_load_backup)
-        _load_backup(0)
-
     return page
@@ -14,9 +14,12 @@ def build_message_page(
     dark_theme: bool,
     fix_size_fn: Callable[[QWidget], None] | None = None,
     ok_callback: Callable[[], None] | None = None,
+    undo_callback: Callable[[], None] | None = None,
 ) -> QWidget:
     """Build a message result page (success or error).
 
+    With undo_callback an extra button offers to undo the change just made.
+
     Returns:
         The message page QWidget.
     """
@@ -55,6 +58,12 @@ def build_message_page(
     if ok_callback:
         ok_btn.clicked.connect(ok_callback)
 
+    if undo_callback:
+        undo_btn = QPushButton(tr("undo_button"))
+        undo_btn.setProperty("style_role", "button1")
+        card_layout.addWidget(undo_btn)
+        undo_btn.clicked.connect(undo_callback)
+
     return widget
 
 
@@ -77,6 +86,8 @@ def build_processing_page(
         msg = tr("processing_save")
     elif action == "open":
         msg = tr("processing_open")
+    elif action == "undo":
+        msg = tr("processing_undo")
     else:
         msg = tr("processing_uninstall")
 
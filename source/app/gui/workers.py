@@ -3,6 +3,10 @@ from PySide6.QtCore import QObject, Signal, QRunnable
 from app.core.logger import logger
 from app.core.hosts_manager import HostsManager
 from app.core.http_client import HttpClient
+from app.core.mapped_text import MappedTextFile
+from app.core.hosts_diff import compute_diff
+from app.core.hosts_guard import GuardResult
+from app.core.backup_index import HostSightings
 from app.core.constants import APP_VERSION, GITHUB_RELEASES_API_URL, GITHUB_RELEASES_PAGE_URL
 from app.gui.localization import tr
 
@@ -12,6 +16,16 @@ class WorkerSignals(QObject):
     update_ready = Signal(str, str, str)
     no_update = Signal(str, str)
     message = Signal(str, bool, bool)
+    backups_batch = Signal(list)
+    backups_done = Signal(int)
+    index_progress = Signal(int)
+    index_done = Signal(int)
+    diff_ready = Signal(int, object)
+    diff_failed = Signal(int, str)
+    search_done = Signal(int, object, object)
+    guard_done = Signal(object)
+    change_checked = Signal(int, bool)
+    journal_recovered = Signal(int)
 
     def __init__(self, parent=None):
         super().__init__(None)
@@ -24,17 +38,24 @@ class HostsWorker(QRunnable):
         self.provider = provider
         self.signals = WorkerSignals()
         self.save_content: str = ""
+        self.save_base: str | None = None
+
+    def _run_action(self) -> bool:
+        if self.action in ("install", "update"):
+            return self.manager.update(self.provider)
+        if self.action == "uninstall":
+            return self.manager.restore()
+        if self.action == "save":
+            return self.manager.apply(self.save_content, "save", base=self.save_base)
+        if self.action == "undo":
+            return self.manager.undo_last_change()
+        return False
 
     def run(self):
         try:
-            if self.action in ("install", "update"):
-                result = self.manager.update(self.provider)
-            elif self.action == "uninstall":
-                result = self.manager.restore()
-            elif self.action == "save":
-                result = self.manager.apply(self.save_content)
-            else:
-                result = False
+            # One hosts write at a time; the guard backs off while this is held.
+            with self.manager.write_lock:
+                result = self._run_action()
             self.signals.finished.emit(self.action, result, "", self.manager.backup_failed)
         except (PermissionError, RuntimeError) as e:
             logger.exception("Hosts operation failed")
@@ -54,6 +75,110 @@ class VersionWorker(QRunnable):
         status = self.manager.check_status(self.provider)
         self.signals.status_ready.emit(status)
 
+class BackupScanWorker(QRunnable):
+    BATCH_SIZE = 500
+
+    def __init__(self, manager: HostsManager, parent=None):
+        super().__init__()
+        self.manager = manager
+        self.signals = WorkerSignals()
+
+    def run(self):
+        # Batches go out as the directories are read; BackupListModel sorts them in.
+        total = 0
+        batch: list = []
+        try:
+            for info in self.manager.iter_backups():
+                batch.append(info)
+                if len(batch) >= self.BATCH_SIZE:
+                    self.signals.backups_batch.emit(batch)
+                    total += len(batch)
+                    batch = []
+        except Exception:
+            logger.exception("Backup scan failed")
+        if batch:
+            self.signals.backups_batch.emit(batch)
+            total += len(batch)
+        self.signals.backups_done.emit(total)
+
+class LineIndexWorker(QRunnable):
+    """Builds the line index of a MappedTextFile off the UI thread."""
+
+    def __init__(self, source, parent=None):
+        super().__init__()
+        self.source = source
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            total = self.source.build_index(progress=self.signals.index_progress.emit)
+        except Exception:
+            logger.exception("Line index build failed")
+            total = 0
+        self.signals.index_done.emit(total)
+
+class DiffWorker(QRunnable):
+    """Computes a line diff between two files; the result keeps both files mapped for rendering.
+
+    With new_snapshot the new side is diffed from a private copy (the live
+    hosts file), so the file itself stays free to be replaced while shown.
+    """
+
+    def __init__(self, request_id: int, old_path: str, old_start: int, new_path: str, new_start: int,
+                 new_snapshot: bool = False, parent=None):
+        super().__init__()
+        self.request_id = request_id
+        self.old_path = old_path
+        self.old_start = old_start
+        self.new_path = new_path
+        self.new_start = new_start
+        self.new_snapshot = new_snapshot
+        self.signals = WorkerSignals()
+
+    def run(self):
+        old = new = None
+        try:
+            old = MappedTextFile(self.old_path, start=self.old_start)
+            if self.new_snapshot:
+                new = MappedTextFile.snapshot(self.new_path, start=self.new_start)
+            else:
+                new = MappedTextFile(self.new_path, start=self.new_start)
+            old.build_index()
+            new.build_index()
+            diff = compute_diff(
+                self.old_path, new.path, self.old_start, self.new_start,
+                old_source=old, new_source=new,
+            )
+        except Exception as e:
+            logger.exception("Diff failed")
+            for source in (old, new):
+                if source is not None:
+                    source.close()
+            self.signals.diff_failed.emit(self.request_id, str(e))
+            return
+        self.signals.diff_ready.emit(self.request_id, diff)
+
+class BackupSearchWorker(QRunnable):
+    """Brings the backup search index up to date and looks up one hostname."""
+
+    def __init__(self, request_id: int, manager: HostsManager, host: str, parent=None):
+        super().__init__()
+        self.request_id = request_id
+        self.manager = manager
+        self.host = host
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            self.manager.sync_backup_index()
+            index = self.manager.backup_index
+            paths = {path for path, _action, _ts in index.find(self.host)}
+            sightings = index.sightings(self.host)
+        except Exception:
+            logger.exception("Backup search failed")
+            paths, sightings = set(), HostSightings(self.host, 0, None, None)
+        self.signals.search_done.emit(self.request_id, paths, sightings)
+
 class AppUpdateWorker(QRunnable):
     def __init__(self, parent=None):
         super().__init__()
@@ -81,3 +206,51 @@ class AppUpdateWorker(QRunnable):
         except Exception as e:
             err = f"{tr('updates_check_failed')}\n{e}"
             self.signals.message.emit(err, False, True)
+
+class HostsGuardWorker(QRunnable):
+    def __init__(self, guard, parent=None):
+        super().__init__()
+        self.guard = guard
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.guard.check()
+        except Exception as e:
+            logger.exception("Hosts guard check failed")
+            result = GuardResult("failed", str(e))
+        self.signals.guard_done.emit(result)
+
+class JournalRecoveryWorker(QRunnable):
+    """Finishes or rolls back hosts writes that a crash interrupted; reads and may rewrite hosts."""
+
+    def __init__(self, manager: HostsManager, parent=None):
+        super().__init__()
+        self.manager = manager
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            with self.manager.write_lock:
+                resolved = self.manager.recover_journal()
+        except Exception:
+            logger.exception("Hosts journal recovery failed")
+            resolved = 0
+        self.signals.journal_recovered.emit(resolved)
+
+class ExternalChangeWorker(QRunnable):
+    """Tells whether hosts changed outside the app; fingerprinting reads the whole file."""
+
+    def __init__(self, request_id: int, manager: HostsManager, parent=None):
+        super().__init__()
+        self.request_id = request_id
+        self.manager = manager
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            external = self.manager.is_external_change()
+        except Exception:
+            logger.exception("External change check failed")
+            external = True
+        self.signals.change_checked.emit(self.request_id, external)
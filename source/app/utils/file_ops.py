@@ -0,0 +1,231 @@
+import os
+import sys
+import stat
+import errno
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional
+from app.core.logger import logger
+from app.utils.helpers import safe_remove
+
+# ioctl request number for FICLONE (linux/fs.h): _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+_COPY_CHUNK = 1 << 30
+_READ_CHUNK = 1 << 20
+
+# os.replace() onto these targets fails but an in-place rewrite works:
+# EBUSY/EXDEV for a bind-mounted file (containers), EACCES/EPERM for a file
+# another process holds open without delete sharing (Windows).
+_REPLACE_FALLBACK_ERRNOS = {errno.EBUSY, errno.EXDEV, errno.EACCES, errno.EPERM}
+
+
+def _try_macos_clonefile(src: str, dst: str) -> bool:
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        clonefile = libc.clonefile
+        clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+        clonefile.restype = ctypes.c_int
+        return clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+    except Exception as e:
+        logger.debug("clonefile unavailable: %s", e)
+        return False
+
+
+def clone_file(src: str | Path, dst: str | Path) -> str:
+    """Copy src to a new file dst without pulling the data through Python.
+
+    Tries, in order: a copy-on-write clone (FICLONE on btrfs/XFS, clonefile on
+    APFS), a kernel-side copy_file_range, and finally shutil.copyfile, which
+    itself uses sendfile/fcopyfile where available.
+
+    Returns:
+        The name of the method that produced dst.
+    """
+    src, dst = str(src), str(dst)
+
+    if sys.platform == "darwin" and not os.path.exists(dst) and _try_macos_clonefile(src, dst):
+        return "clonefile"
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if sys.platform.startswith("linux"):
+            try:
+                import fcntl
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                return "reflink"
+            except OSError as e:
+                logger.debug("Reflink not supported for %s: %s", dst, e)
+
+        if hasattr(os, "copy_file_range"):
+            try:
+                size = os.fstat(fsrc.fileno()).st_size
+                copied = 0
+                while True:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), _COPY_CHUNK)
+                    if n == 0:
+                        break
+                    copied += n
+                if copied >= size:
+                    return "copy_file_range"
+                logger.debug("copy_file_range stopped short for %s (%d/%d)", dst, copied, size)
+            except OSError as e:
+                logger.debug("copy_file_range failed for %s: %s", dst, e)
+
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+class NormalizedDigest:
+    """SHA-256 over text normalized the way hosts content is compared.
+
+    CRLF and lone CR become LF and trailing whitespace at the very end is
+    ignored, so "a\r\nb \n" and "a\nb" hash the same. Data may be fed in
+    chunks of any size: a CR at a chunk boundary and the trailing whitespace
+    run are carried over to the next update() instead of being decided early.
+    """
+
+    def __init__(self, data: bytes = b""):
+        self._hash = hashlib.sha256()
+        self._cr_pending = False
+        self._ws_pending = b""
+        if data:
+            self.update(data)
+
+    def update(self, chunk: bytes):
+        if not chunk:
+            return
+        chunk = bytes(chunk)
+        if self._cr_pending and chunk[:1] == b"\n":
+            chunk = chunk[1:]
+        self._cr_pending = False
+        if not chunk:
+            return
+        self._cr_pending = chunk[-1:] == b"\r"
+        chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        stripped = chunk.rstrip()
+        if stripped:
+            self._hash.update(self._ws_pending)
+            self._hash.update(stripped)
+            self._ws_pending = chunk[len(stripped):]
+        else:
+            self._ws_pending += chunk
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def normalized_file_digest(path: str | Path) -> str:
+    """NormalizedDigest of a file, read in fixed-size chunks with constant memory."""
+    digest = NormalizedDigest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fsync_dir(path: str):
+    if sys.platform == "win32":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _copy_in_place(src: str, path: str):
+    with open(src, "rb") as fsrc, open(path, "r+b" if os.path.exists(path) else "wb") as fdst:
+        shutil.copyfileobj(fsrc, fdst, _READ_CHUNK)
+        fdst.truncate()
+        fdst.flush()
+        os.fsync(fdst.fileno())
+
+
+def _commit_staged(tmp: str, path: str, st: Optional[os.stat_result]) -> str:
+    """Give tmp the target's mode/owner (0644 for a new file), fsync it and rename it over path."""
+    if st is None:
+        # mkstemp creates 0600; a new hosts file must stay world-readable.
+        os.chmod(tmp, 0o644)
+    else:
+        os.chmod(tmp, stat.S_IMODE(st.st_mode))
+        if hasattr(os, "chown"):
+            try:
+                os.chown(tmp, st.st_uid, st.st_gid)
+            except PermissionError:
+                pass
+    fd = os.open(tmp, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    try:
+        os.replace(tmp, path)
+    except OSError as e:
+        if e.errno not in _REPLACE_FALLBACK_ERRNOS:
+            raise
+        logger.debug("Atomic replace of %s refused (%s), rewriting in place", path, e)
+        _copy_in_place(tmp, path)
+        return "in-place"
+    _fsync_dir(os.path.dirname(path) or ".")
+    return "replace"
+
+
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write(path: str | Path, data: bytes) -> str:
+    """Replace path with data so readers see either the old or the new file.
+
+    The staging file is created in the same directory (so the final rename
+    never crosses filesystems), fsynced, given the target's mode and owner,
+    and renamed over the target with os.replace(); the directory is fsynced
+    afterwards. If the rename is refused (bind-mounted or locked target),
+    the data is rewritten in place instead.
+
+    Returns:
+        "replace" or "in-place".
+    Raises:
+        OSError if the directory is not writable or both strategies fail.
+    """
+    path = str(path)
+    st = _stat_or_none(path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".goida-hosts-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return _commit_staged(tmp, path, st)
+    finally:
+        safe_remove(tmp)
+
+
+def atomic_install(src: str | Path, path: str | Path) -> str:
+    """Like atomic_write(), but the content comes from the file src.
+
+    A src that already lives in the target directory is renamed into place
+    directly (and thus consumed); otherwise it is cloned next to the target
+    first, so the data never passes through Python.
+    """
+    src, path = str(src), str(path)
+    st = _stat_or_none(path)
+    directory = os.path.dirname(path) or "."
+    if os.path.dirname(os.path.abspath(src)) == os.path.abspath(directory):
+        return _commit_staged(src, path, st)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".goida-hosts-", suffix=".tmp")
+    os.close(fd)
+    try:
+        clone_file(src, tmp)
+        return _commit_staged(tmp, path, st)
+    finally:
+        safe_remove(tmp)
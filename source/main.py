@@ -1,11 +1,18 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from app.gui.localization import detect_system_language, set_current_language
-from app.gui.main_window import MainWindow
-from app.core.settings import get_setting
+from multiprocessing import freeze_support
+from app.core.privileged_helper import HELPER_FLAG, run_helper
 
 def main():
+    # Qt is imported here, not at module level: parser worker processes
+    # (spawn) re-import this module and must not load the GUI.
+    from PySide6.QtWidgets import QApplication
+    from app.gui.localization import detect_system_language, set_current_language
+    from app.gui.main_window import MainWindow
+    from app.core.settings import get_setting
+    from app.core.capabilities import start_background_probe
+
     app = QApplication(sys.argv)
+    start_background_probe()
     app.setStyleSheet("QPushButton:focus { outline: none; }")
 
     # Detect/Load language
@@ -17,7 +24,13 @@ def main():
 
     main_window = MainWindow()
     main_window.show()
+    app.aboutToQuit.connect(main_window.hosts_manager.shutdown_helper)
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Frozen builds re-launch this executable for parser worker processes.
+    freeze_support()
+    if sys.argv[1:2] == [HELPER_FLAG]:
+        # Started elevated by PrivilegedHelperClient: serve hosts requests, no GUI.
+        sys.exit(run_helper(sys.argv[2:]))
     main()
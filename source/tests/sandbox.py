@@ -0,0 +1,47 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import app.core.hosts_guard as hosts_guard
+import app.core.hosts_manager as hosts_manager
+import app.core.hosts_transaction as hosts_transaction
+from app.core.hosts_fingerprint import FingerprintStore
+from app.core.hosts_journal import HostsJournal
+from app.core.write_strategies import StrategyMemory
+
+_MODULES_WITH_HOSTS_PATH = (hosts_manager, hosts_guard, hosts_transaction)
+
+
+class HostsSandbox(unittest.TestCase):
+    """A HostsManager whose hosts file, backups, journal and settings live in a temp dir.
+
+    DNS flushing is a no-op; the remembered write strategy is kept in
+    self.settings instead of the settings file.
+    """
+
+    initial_hosts = b"127.0.0.1 localhost\n"
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.hosts = self.tmp / "etc" / "hosts"
+        self.hosts.parent.mkdir()
+        self.hosts.write_bytes(self.initial_hosts)
+        for module in _MODULES_WITH_HOSTS_PATH:
+            patcher = mock.patch.object(module, "HOSTS_PATH", self.hosts)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.settings: dict = {}
+        manager = hosts_manager.HostsManager()
+        manager._flush_dns = lambda: None
+        manager._get_backup_dirs = lambda: [self.tmp / "backups"]
+        manager.backup_index = hosts_manager.BackupSearchIndex(self.tmp / "index.db")
+        manager.journal = HostsJournal(self.tmp / "journal")
+        manager.fingerprints = FingerprintStore(self.tmp / "fingerprint.json")
+        manager.write_strategy_memory = StrategyMemory(
+            "hosts_write_strategy", load=self.settings.get, store=self.settings.__setitem__,
+        )
+        self.manager = manager
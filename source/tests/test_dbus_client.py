@@ -0,0 +1,127 @@
+import sys
+import shutil
+import struct
+import tempfile
+import threading
+import subprocess
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.dbus_client import (
+    ERROR, FIELD_DESTINATION, FIELD_ERROR_NAME, FIELD_INTERFACE, FIELD_PATH, FIELD_REPLY_SERIAL,
+    FIELD_SENDER, METHOD_CALL,
+    DBusConnection, DBusError, DBusMessage, _Reader,
+)
+from app.core.dns_flush import (
+    RESOLVED_BUS_NAME, RESOLVED_MANAGER_INTERFACE, RESOLVED_OBJECT_PATH, resolved_flush_caches,
+)
+
+_BUS_CONFIG = """<!DOCTYPE busconfig PUBLIC "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:path={path}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+class StandInResolved(threading.Thread):
+    """Owns org.freedesktop.resolve1 on the bus and answers FlushCaches calls."""
+
+    def __init__(self, address: str, error: str = ""):
+        super().__init__(daemon=True)
+        self.bus = DBusConnection(address, timeout=10)
+        self.bus.call(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+            "RequestName", "su", (RESOLVED_BUS_NAME, 0),
+        )
+        self.error = error
+        self.calls: list[DBusMessage] = []
+
+    def run(self):
+        try:
+            while True:
+                msg = self.bus.receive()
+                if msg.type != METHOD_CALL or msg.member != "FlushCaches":
+                    continue
+                self.calls.append(msg)
+                if self.error:
+                    self.bus.send(DBusMessage(ERROR, fields={
+                        FIELD_ERROR_NAME: self.error,
+                        FIELD_REPLY_SERIAL: msg.serial,
+                        FIELD_DESTINATION: msg.fields.get(FIELD_SENDER, ""),
+                    }, signature="s", args=("refused by the stand-in",)))
+                else:
+                    self.bus.reply(msg)
+        except (OSError, DBusError):
+            pass  # Bus went away at tear-down.
+
+
+@unittest.skipUnless(shutil.which("dbus-daemon") and sys.platform != "win32", "needs dbus-daemon")
+class PrivateBusTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        config = self.tmp / "bus.conf"
+        config.write_text(_BUS_CONFIG.format(path=self.tmp / "bus"), encoding="utf-8")
+        self.daemon = subprocess.Popen(
+            ["dbus-daemon", f"--config-file={config}", "--nofork", "--print-address"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        self.addCleanup(self.daemon.wait, 5)
+        self.addCleanup(self.daemon.terminate)
+        self.address = self.daemon.stdout.readline().strip()
+        self.assertTrue(self.address, "dbus-daemon did not start")
+
+    def start_service(self, error: str = "") -> StandInResolved:
+        service = StandInResolved(self.address, error)
+        self.addCleanup(service.bus.close)
+        service.start()
+        return service
+
+    def test_hello_assigns_a_unique_name(self):
+        with DBusConnection(self.address) as bus:
+            self.assertTrue(bus.unique_name.startswith(":"))
+
+    def test_flush_caches_reaches_the_service(self):
+        service = self.start_service()
+        self.assertTrue(resolved_flush_caches(self.address))
+        self.assertEqual(len(service.calls), 1)
+        call = service.calls[0]
+        self.assertEqual(call.fields.get(FIELD_PATH), RESOLVED_OBJECT_PATH)
+        self.assertEqual(call.fields.get(FIELD_INTERFACE), RESOLVED_MANAGER_INTERFACE)
+
+    def test_error_reply_is_reported_as_failure(self):
+        service = self.start_service(error="org.freedesktop.DBus.Error.AccessDenied")
+        self.assertFalse(resolved_flush_caches(self.address))
+        self.assertEqual(len(service.calls), 1)
+
+    def test_missing_service_fails_without_activation(self):
+        with DBusConnection(self.address) as bus:
+            with self.assertRaises(DBusError) as ctx:
+                bus.call(RESOLVED_BUS_NAME, RESOLVED_OBJECT_PATH, RESOLVED_MANAGER_INTERFACE, "FlushCaches")
+        self.assertIn("NameHasNoOwner", str(ctx.exception))
+        self.assertFalse(resolved_flush_caches(self.address))
+
+    def test_missing_bus_fails(self):
+        self.assertFalse(resolved_flush_caches(f"unix:path={self.tmp / 'nobus'}"))
+
+
+class ReaderTests(unittest.TestCase):
+    def test_big_endian_values(self):
+        data = struct.pack(">I", 5) + b"hello\0" + b"\0\0" + struct.pack(">I", 7)
+        reader = _Reader(data, 0, ">")
+        self.assertEqual(reader.value("s"), "hello")
+        self.assertEqual(reader.value("u"), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import stat
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.file_ops import atomic_install, atomic_write
+
+
+@unittest.skipIf(sys.platform == "win32", "POSIX modes")
+class AtomicWriteModeTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.hosts = self.tmp / "hosts"
+
+    def mode(self) -> int:
+        return stat.S_IMODE(os.stat(self.hosts).st_mode)
+
+    def test_new_file_is_world_readable(self):
+        atomic_write(self.hosts, b"127.0.0.1 localhost\n")
+        self.assertEqual(self.mode(), 0o644)
+
+    def test_new_file_from_staged_source_is_world_readable(self):
+        fd, staged = tempfile.mkstemp(dir=self.tmp)
+        os.write(fd, b"127.0.0.1 localhost\n")
+        os.close(fd)
+        atomic_install(staged, self.hosts)
+        self.assertEqual(self.mode(), 0o644)
+        self.assertEqual(self.hosts.read_bytes(), b"127.0.0.1 localhost\n")
+
+    def test_existing_mode_is_kept(self):
+        self.hosts.write_bytes(b"old\n")
+        os.chmod(self.hosts, 0o640)
+        atomic_write(self.hosts, b"new\n")
+        self.assertEqual(self.mode(), 0o640)
+        self.assertEqual(self.hosts.read_bytes(), b"new\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.hosts_detect import MarkerScan, ProviderSignature, SignatureRegistry, _trie_pattern
+
+
+def registry(*signatures: tuple[str, tuple[bytes, ...]], single_pass: bool) -> SignatureRegistry:
+    reg = SignatureRegistry(ProviderSignature(name, markers) for name, markers in signatures)
+    if single_pass:
+        reg.FIND_LIMIT = 0
+    return reg
+
+
+def hits(reg: SignatureRegistry, data: bytes) -> list[tuple[int, bytes]]:
+    return sorted(reg._occurrences(data))
+
+
+# Markers sharing prefixes and overlapping each other inside the data.
+OVERLAPPING = (
+    ("short", (b"dns.a",)),
+    ("long", (b"dns.ab",)),
+    ("tail", (b"s.abc",)),
+    ("repeat", (b"xx",)),
+)
+
+
+class TriePatternTests(unittest.TestCase):
+    def test_matches_exactly_the_markers(self):
+        pattern = re.compile(_trie_pattern([b"ab", b"abc", b"b.d", b"x"]) + b"$")
+        for text in (b"ab", b"abc", b"b.d", b"x"):
+            self.assertTrue(pattern.match(text), text)
+        for text in (b"a", b"abd", b"bxd", b"b"):
+            self.assertFalse(pattern.match(text), text)
+
+
+class SignatureRegistryTests(unittest.TestCase):
+    def test_trie_path_reports_prefixed_and_overlapping_markers(self):
+        data = b"0.0.0.0 x # dns.abc\nxxx\n"
+        reg = registry(*OVERLAPPING, single_pass=True)
+        self.assertEqual(hits(reg, data), [
+            (12, b"dns.a"),
+            (12, b"dns.ab"),
+            (14, b"s.abc"),
+            (20, b"xx"),
+            (21, b"xx"),
+        ])
+
+    def test_both_paths_agree(self):
+        data = (b"# dns.ab list\n" + b"0.0.0.0 s.abc.example\n" * 3 + b"xxxx dns.a\n") * 2
+        find = registry(*OVERLAPPING, single_pass=False)
+        trie = registry(*OVERLAPPING, single_pass=True)
+        self.assertEqual(hits(find, data), hits(trie, data))
+        self.assertEqual(find.scan(data), trie.scan(data))
+
+    def test_many_providers_use_the_trie(self):
+        signatures = [(f"p{i}", (f"dns.p{i}.example".encode(),)) for i in range(20)]
+        reg = registry(*signatures, single_pass=False)
+        self.assertGreater(len(reg.owners()), reg.FIND_LIMIT)
+        data = b"1.1.1.1 dns.p13.example\n2.2.2.2 dns.p1.example\n"
+        report = reg.scan(data)
+        self.assertEqual(report.providers, ["p1", "p13"])
+        self.assertEqual(report.matches["p13"].first_line, 1)
+        self.assertEqual(report.matches["p1"].first_line, 2)
+
+    def test_shared_marker_counts_for_every_owner(self):
+        for single_pass in (False, True):
+            reg = registry(("a", (b"shared", b"only-a")), ("b", (b"shared",)), single_pass=single_pass)
+            report = reg.scan(b"shared\nonly-a\n")
+            self.assertEqual(report.matches["a"].hits, 2)
+            self.assertEqual(report.matches["b"].hits, 1)
+
+    def test_line_spans_and_conflicts(self):
+        data = b"# first\nA\nB\nA\n\nC\n"
+        for single_pass in (False, True):
+            reg = registry(("a", (b"A",)), ("b", (b"B",)), ("c", (b"C",)), single_pass=single_pass)
+            report = reg.scan(data)
+            self.assertEqual((report.matches["a"].first_line, report.matches["a"].last_line), (2, 4))
+            self.assertEqual(report.matches["c"].first_line, 6)
+            self.assertEqual(report.conflicts, [("a", "b")])
+            self.assertEqual(report.primary, "a")
+
+    def test_registration_changes_generation(self):
+        reg = SignatureRegistry()
+        reg.register("a", b"A")
+        generation = reg.generation
+        reg.unregister("a")
+        self.assertGreater(reg.generation, generation)
+        self.assertEqual(reg.scan(b"A").matches, {})
+        with self.assertRaises(ValueError):
+            reg.register("empty", b"")
+
+
+class MarkerScanTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.reg = registry(("top", (b"dns.top",)), ("other", (b"dns.other",)), single_pass=False)
+
+    def scan(self, content: bytes) -> MarkerScan:
+        path = self.tmp / "hosts"
+        path.write_bytes(content)
+        scan = MarkerScan(path, self.reg)
+        self.addCleanup(scan.close)
+        return scan
+
+    def test_header_hit_answers_without_full_report(self):
+        scan = self.scan(b"# dns.top\n" + b"0.0.0.0 dns.other\n")
+        self.assertEqual(scan.provider(), "top")
+        self.assertIsNone(scan.memo.report)
+
+    def test_lower_priority_provider_needs_full_report(self):
+        scan = self.scan(b"0.0.0.0 dns.other\n")
+        self.assertEqual(scan.provider(), "other")
+        self.assertIsNotNone(scan.memo.report)
+        self.assertEqual(scan.memo.found, {b"dns.top": False, b"dns.other": True})
+
+    def test_empty_file(self):
+        scan = self.scan(b"")
+        self.assertIsNone(scan.provider())
+        self.assertFalse(scan.any_provider())
+
+
+if __name__ == "__main__":
+    unittest.main()
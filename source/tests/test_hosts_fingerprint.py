@@ -0,0 +1,78 @@
+import sys
+import random
+import threading
+import tempfile
+import shutil
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.hosts_fingerprint import MAX_CHUNK, FingerprintStore, _chunk_data, fingerprint_file
+
+
+def _blocks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class ChunkDataTests(unittest.TestCase):
+    def test_chunks_do_not_depend_on_read_blocks(self):
+        rng = random.Random(7)
+        data = b"".join(b"0.0.0.0 host%d.example\n" % rng.randrange(10 ** 9) for _ in range(60000))
+        whole = list(_chunk_data([data]))
+        self.assertEqual(b"".join(whole), data)
+        for size in (1 << 20, 4096, 1000):
+            self.assertEqual(list(_chunk_data(_blocks(data, size))), whole)
+
+    def test_input_without_newlines_is_cut_at_max_chunk(self):
+        data = b"x" * (3 * MAX_CHUNK + 5)
+        chunks = list(_chunk_data(_blocks(data, 4096)))
+        self.assertEqual([len(c) for c in chunks], [MAX_CHUNK] * 3 + [5])
+
+    def test_long_line_never_exceeds_max_chunk(self):
+        data = b"a" * (MAX_CHUNK - 3) + b"b" * 10 + b"\n" + b"short\n" * 10
+        chunks = list(_chunk_data(_blocks(data, 1000)))
+        self.assertEqual(b"".join(chunks), data)
+        self.assertTrue(all(len(c) <= MAX_CHUNK for c in chunks))
+
+
+class FingerprintStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.hosts = self.tmp / "hosts"
+        self.hosts.write_bytes(b"127.0.0.1 localhost\n")
+        self.store = FingerprintStore(self.tmp / "fp.json")
+
+    def test_save_from_before_forget_is_dropped(self):
+        generation = self.store.forget()
+        stale = fingerprint_file(self.hosts)
+        self.store.forget()
+        self.assertFalse(self.store.save(stale, generation))
+        self.assertIsNone(self.store.load())
+
+    def test_concurrent_forget_and_save(self):
+        fp = fingerprint_file(self.hosts)
+        errors = []
+
+        def hammer(fn):
+            try:
+                for _ in range(200):
+                    fn()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=hammer, args=(self.store.forget,)),
+            threading.Thread(target=hammer, args=(lambda: self.store.save(fp),)),
+            threading.Thread(target=hammer, args=(lambda: self.store.changes(self.hosts),)),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
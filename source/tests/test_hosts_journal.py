@@ -0,0 +1,73 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tests.sandbox import HostsSandbox
+
+FIRST = b"127.0.0.1 localhost\n0.0.0.0 a.com\n"
+SECOND = b"127.0.0.1 localhost\n0.0.0.0 b.com\n"
+
+
+@unittest.skipIf(sys.platform == "win32", "POSIX direct writes")
+class JournalCopyTests(HostsSandbox):
+    def journal_copies(self) -> list[str]:
+        return sorted(p.name for p in self.manager.journal.directory.glob("prev-*"))
+
+    def test_write_after_backup_reuses_the_backup(self):
+        backup = self.manager.backup("install")
+        self.assertTrue(self.manager.apply(FIRST, "install"))
+
+        entry = self.manager.journal.last_committed()
+        self.assertEqual(Path(entry.prev_copy), backup)
+        self.assertFalse(entry.owns_prev_copy)
+        self.assertEqual(self.journal_copies(), [])
+
+    def test_write_without_backup_clones_once(self):
+        self.assertTrue(self.manager.apply(FIRST, "save"))
+        entry = self.manager.journal.last_committed()
+        self.assertTrue(entry.owns_prev_copy)
+        self.assertEqual(self.journal_copies(), [Path(entry.prev_copy).name])
+
+    def test_backup_is_not_reused_after_hosts_changed(self):
+        self.manager.backup("install")
+        self.hosts.write_bytes(FIRST)
+        self.assertTrue(self.manager.apply(SECOND, "install"))
+        entry = self.manager.journal.last_committed()
+        self.assertTrue(entry.owns_prev_copy)
+        self.assertEqual(Path(entry.prev_copy).read_bytes(), FIRST)
+
+    def test_history_never_deletes_backups(self):
+        self.manager.journal.keep = 2
+        backups = []
+        for i in range(4):
+            backups.append(self.manager.backup("install"))
+            self.assertTrue(self.manager.apply(b"127.0.0.1 localhost\n0.0.0.0 %d.com\n" % i, "install"))
+        self.assertTrue(all(b.exists() for b in backups))
+        self.assertEqual(self.journal_copies(), [])
+
+    def test_undo_through_a_reused_backup(self):
+        self.assertTrue(self.manager.apply(FIRST, "save"))
+        backup = self.manager.backup("install")
+        self.assertTrue(self.manager.apply(SECOND, "install"))
+        self.assertTrue(self.manager.undo_last_change())
+        self.assertEqual(self.hosts.read_bytes(), FIRST)
+        self.assertTrue(backup.exists())
+        self.assertTrue(self.manager.undo_last_change())
+        self.assertEqual(self.hosts.read_bytes(), self.initial_hosts)
+        self.assertEqual(self.journal_copies(), [])
+        self.assertFalse(self.manager.can_undo())
+
+    def test_recover_rolls_back_an_interrupted_write(self):
+        backup = self.manager.backup("install")
+        entry = self.manager.journal.begin("install", self.hosts, "digest-of-new", backup=backup)
+        self.hosts.write_bytes(b"half written")
+        self.assertEqual(self.manager.recover_journal(), 1)
+        self.assertEqual(self.hosts.read_bytes(), self.initial_hosts)
+        self.assertEqual(self.manager.journal.pending(), [])
+        self.assertTrue(Path(entry.prev_copy).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.hosts_pipeline import convert_newlines, stream_to_file
+from app.utils.file_ops import NormalizedDigest
+
+
+class ConvertNewlinesTests(unittest.TestCase):
+    def test_to_crlf(self):
+        self.assertEqual(convert_newlines(b"a\nb\r\nc", b"\r\n"), b"a\r\nb\r\nc")
+
+    def test_to_lf(self):
+        self.assertEqual(convert_newlines(b"a\r\nb\nc\r\n", b"\n"), b"a\nb\nc\n")
+
+    def test_unchanged_data_is_not_copied(self):
+        lf = b"a\nb\n"
+        crlf = b"a\r\nb\r\n"
+        self.assertIs(convert_newlines(lf, b"\n"), lf)
+        self.assertIs(convert_newlines(crlf, b"\r\n"), crlf)
+
+
+class StreamToFileTests(unittest.TestCase):
+    def stream(self, chunks, **kwargs):
+        out = io.BytesIO()
+        return stream_to_file(iter(chunks), out, **kwargs), out.getvalue()
+
+    def test_newline_stage_converts_across_chunk_boundaries(self):
+        chunks = [b"127.0.0.1 localhost\r", b"\n0.0.0.0 a.com\n0.0", b".0.0 b.com"]
+        report, data = self.stream(chunks, newline=b"\r\n")
+        self.assertEqual(data, b"127.0.0.1 localhost\r\n0.0.0.0 a.com\r\n0.0.0.0 b.com")
+        self.assertTrue(report.valid)
+        self.assertEqual(report.size, len(data))
+        self.assertEqual(report.digest, NormalizedDigest(b"".join(chunks)).hexdigest())
+
+    def test_without_newline_bytes_pass_through(self):
+        chunks = [b"127.0.0.1 localhost\r\n", b"0.0.0.0 a.com\n"]
+        _, data = self.stream(chunks)
+        self.assertEqual(data, b"".join(chunks))
+
+    def test_transform_runs_before_validation(self):
+        def drop_all(blocks):
+            for _ in blocks:
+                yield b"# nothing\n"
+
+        report, data = self.stream([b"127.0.0.1 localhost\n"], transform=drop_all)
+        self.assertFalse(report.valid)
+        self.assertEqual(data, b"# nothing\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app.core.hosts_table as hosts_table
+from app.core.hosts_table import HostnameInterner, HostsTable
+
+HOSTS = b"""# provider list
+127.0.0.1 localhost
+::1 localhost
+0.0.0.0 ads.example tracker.example
+0.0.0.0 ads.example
+10.0.0.1 chat.example  # proxy
+10.0.0.2 chat.example api.example
+::ffff:10.0.0.1 cdn.example
+not-an-ip broken.example
+"""
+
+
+@unittest.skipIf(hosts_table.np is None, "numpy is not installed")
+class HostsTableTests(unittest.TestCase):
+    def setUp(self):
+        self.table = HostsTable.from_bytes(HOSTS)
+
+    def test_rows_and_skipped_lines(self):
+        # One row per (address, hostname); the non-IP line is dropped.
+        self.assertEqual(len(self.table), 9)
+        self.assertNotIn("broken.example", self.table.interner.names)
+        self.assertEqual(self.table.line.tolist(), [1, 2, 3, 3, 4, 5, 6, 6, 7])
+
+    def test_entries_per_address(self):
+        self.assertEqual(self.table.entries_per_address(), {
+            "0.0.0.0": 3,
+            "10.0.0.1": 2,
+            "10.0.0.2": 2,
+            "::1": 1,
+            "127.0.0.1": 1,
+        })
+
+    def test_ipv4_mapped_address_groups_with_ipv4(self):
+        self.assertEqual(self.table.entries_per_address()["10.0.0.1"], 2)
+
+    def test_address_share(self):
+        share = self.table.address_share()
+        self.assertAlmostEqual(share["0.0.0.0"], 3 / 9)
+        self.assertAlmostEqual(sum(share.values()), 1.0)
+
+    def test_duplicate_hostnames(self):
+        self.assertEqual(self.table.duplicate_hostnames(), {
+            "localhost": 2,
+            "ads.example": 2,
+            "chat.example": 2,
+        })
+
+    def test_conflicting_mappings(self):
+        self.assertEqual(self.table.conflicting_mappings(), {
+            # Addresses in numeric order, with IPv4 in its ::ffff: mapped range.
+            "localhost": ["::1", "127.0.0.1"],
+            "chat.example": ["10.0.0.1", "10.0.0.2"],
+        })
+
+    def test_same_address_twice_is_not_a_conflict(self):
+        self.assertNotIn("ads.example", self.table.conflicting_mappings())
+
+    def test_hostnames_are_case_insensitive(self):
+        table = HostsTable.from_bytes(b"0.0.0.0 Ads.Example\n0.0.0.0 ads.example\n")
+        self.assertEqual(table.duplicate_hostnames(), {"ads.example": 2})
+
+    def test_difference(self):
+        a, b = HostsTable.compare(
+            b"0.0.0.0 a.example shared.example\n",
+            b"10.0.0.1 shared.example b.example\n10.0.0.1 c.example\n",
+        )
+        self.assertEqual(a.difference(b), (["a.example"], ["b.example", "c.example"]))
+        self.assertEqual(b.difference(a), (["b.example", "c.example"], ["a.example"]))
+
+    def test_difference_needs_a_shared_interner(self):
+        with self.assertRaises(ValueError):
+            HostsTable.from_bytes(b"0.0.0.0 a\n").difference(HostsTable.from_bytes(b"0.0.0.0 b\n"))
+
+    def test_empty_table(self):
+        table = HostsTable.from_bytes(b"# nothing\n")
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.entries_per_address(), {})
+        self.assertEqual(table.duplicate_hostnames(), {})
+        self.assertEqual(table.conflicting_mappings(), {})
+
+    def test_str_lines(self):
+        table = HostsTable.from_lines(["10.0.0.1 chat.example", "10.0.0.2 chat.example"], HostnameInterner())
+        self.assertEqual(table.conflicting_mappings(), {"chat.example": ["10.0.0.1", "10.0.0.2"]})
+
+
+class MissingNumpyTests(unittest.TestCase):
+    def test_clear_error_without_numpy(self):
+        with mock.patch.object(hosts_table, "np", None):
+            with self.assertRaisesRegex(ImportError, "optional dependency"):
+                HostsTable.from_bytes(HOSTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tests.sandbox import HostsSandbox
+
+
+@unittest.skipIf(sys.platform == "win32", "POSIX direct writes")
+class HostsTransactionTests(HostsSandbox):
+    initial_hosts = (
+        b"# local\n"
+        b"127.0.0.1 localhost\n"
+        b"0.0.0.0 ads.example tracker.example # blocked\n"
+        b"10.0.0.1 nas.lan\n"
+    )
+
+    def test_edits_apply_in_one_write_with_one_backup(self):
+        txn = (self.manager.transaction()
+               .add_entry("127.0.0.1", "dev.local")
+               .remove_host("ADS.example")
+               .remap_address("10.0.0.1", "10.0.0.2"))
+        self.assertTrue(txn.commit())
+        self.assertEqual(self.hosts.read_bytes(), (
+            b"# local\n"
+            b"127.0.0.1 localhost\n"
+            b"0.0.0.0 tracker.example # blocked\n"
+            b"10.0.0.2 nas.lan\n"
+            b"127.0.0.1 dev.local\n"
+        ))
+        self.assertEqual(len(self.manager.list_backups()), 1)
+        self.assertEqual(self.manager.journal.last_committed().action, "transaction")
+
+    def test_added_entry_replaces_existing_mapping(self):
+        self.manager.transaction().add_entry("192.168.1.5", "nas.lan").commit()
+        data = self.hosts.read_bytes()
+        self.assertNotIn(b"10.0.0.1", data)
+        self.assertTrue(data.endswith(b"192.168.1.5 nas.lan\n"))
+
+    def test_line_without_hostnames_left_is_dropped(self):
+        self.manager.transaction().remove_host("ads.example", "tracker.example").commit()
+        self.assertNotIn(b"0.0.0.0", self.hosts.read_bytes())
+
+    def test_remove_cancels_an_earlier_add(self):
+        txn = self.manager.transaction().add_entry("1.2.3.4", "a.test", "b.test").remove_host("a.test")
+        txn.commit()
+        self.assertTrue(self.hosts.read_bytes().endswith(b"1.2.3.4 b.test\n"))
+
+    def test_restore_backup_as_base(self):
+        backup = self.manager.backup("manual")
+        self.hosts.write_bytes(b"127.0.0.1 localhost\n")
+        self.manager.transaction().restore_backup(backup).add_entry("127.0.0.1", "dev.local").commit()
+        self.assertEqual(self.hosts.read_bytes(), self.initial_hosts + b"127.0.0.1 dev.local\n")
+
+    def test_only_one_base(self):
+        txn = self.manager.transaction().restore_original()
+        with self.assertRaises(ValueError):
+            txn.use_provider("geohide")
+
+    def test_empty_transaction_does_nothing(self):
+        self.assertTrue(self.manager.transaction().commit())
+        self.assertEqual(self.manager.list_backups(), [])
+
+    def test_write_lock_held_from_backup_to_install(self):
+        held = []
+
+        def probe():
+            # Another thread must not get the lock while the transaction runs.
+            def try_lock():
+                if self.manager.write_lock.acquire(blocking=False):
+                    self.manager.write_lock.release()
+                    held.append(False)
+                else:
+                    held.append(True)
+
+            t = threading.Thread(target=try_lock)
+            t.start()
+            t.join()
+
+        original_backup = self.manager.backup
+        original_stage = self.manager._stage_and_apply
+
+        def backup_probe(action):
+            probe()
+            return original_backup(action)
+
+        def stage_probe(*args, **kwargs):
+            probe()
+            return original_stage(*args, **kwargs)
+
+        self.manager.backup = backup_probe
+        self.manager._stage_and_apply = stage_probe
+        self.assertTrue(self.manager.transaction().add_entry("127.0.0.1", "dev.local").commit())
+        self.assertEqual(held, [True, True])
+        self.assertTrue(self.manager.write_lock.acquire(blocking=False))
+        self.manager.write_lock.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app.core.hosts_manager as hosts_manager
+from tests.sandbox import HostsSandbox
+
+try:
+    from PySide6.QtCore import QCoreApplication
+except ImportError:
+    QCoreApplication = None
+
+
+class ReadCacheTests(HostsSandbox):
+    def test_watched_cache_is_served_without_stat(self):
+        self.manager.set_watched(True)
+        self.assertEqual(self.manager.read(), self.initial_hosts.decode())
+        self.hosts.write_bytes(b"changed\n")
+        # No watcher event yet, so the cached text is still served.
+        self.assertEqual(self.manager.read(), self.initial_hosts.decode())
+        self.manager.invalidate_cache()
+        self.assertEqual(self.manager.read(), "changed\n")
+
+    def test_read_racing_an_invalidation_is_not_cached(self):
+        self.manager.set_watched(True)
+        manager, hosts = self.manager, self.hosts
+
+        class RacingPath(type(hosts)):
+            def read_text(self, *args, **kwargs):
+                # The file changes, and the watcher fires, after this read got its bytes.
+                content = super().read_text(*args, **kwargs)
+                hosts.write_bytes(b"changed\n")
+                manager.invalidate_cache()
+                return content
+
+        with mock.patch.object(hosts_manager, "HOSTS_PATH", RacingPath(hosts)):
+            self.assertEqual(self.manager.read(), self.initial_hosts.decode())
+        self.assertEqual(self.manager.read(), "changed\n")
+
+
+@unittest.skipIf(QCoreApplication is None, "PySide6 is not installed")
+class HostsWatcherTests(HostsSandbox):
+    def setUp(self):
+        super().setUp()
+        import app.gui.hosts_watcher as hosts_watcher
+        self.app = QCoreApplication.instance() or QCoreApplication([])
+        patcher = mock.patch.object(hosts_watcher, "HOSTS_PATH", self.hosts)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.watcher = hosts_watcher.HostsWatcher(self.manager)
+        self.addCleanup(self.watcher.stop)
+        self.changes = []
+        self.watcher.hosts_changed.connect(self.changes.append)
+
+    def wait_for(self, condition, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def replace_hosts(self, content: bytes):
+        staged = self.hosts.with_name("hosts.tmp")
+        staged.write_bytes(content)
+        os.replace(staged, self.hosts)
+
+    def test_rename_replace_rearms_the_file_watch(self):
+        watched = str(self.hosts)
+        self.assertIn(watched, self.watcher._watcher.files())
+        for i in range(3):
+            self.manager.read()
+            self.replace_hosts(b"127.0.0.1 localhost\n0.0.0.0 r%d.example\n" % i)
+            self.assertTrue(self.wait_for(lambda: len(self.changes) == i + 1), f"replace {i} not reported")
+            self.assertTrue(self.changes[-1])
+            self.assertIn(watched, self.watcher._watcher.files())
+            self.assertIn(f"r{i}.example", self.manager.read())
+
+    def test_in_place_write_after_replace_is_seen(self):
+        self.replace_hosts(b"127.0.0.1 localhost\n0.0.0.0 a.example\n")
+        self.assertTrue(self.wait_for(lambda: len(self.changes) == 1))
+        self.manager.read()
+        with open(self.hosts, "ab") as f:
+            f.write(b"0.0.0.0 b.example\n")
+        self.assertTrue(self.wait_for(lambda: len(self.changes) == 2))
+        self.assertIn("b.example", self.manager.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
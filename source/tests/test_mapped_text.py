@@ -0,0 +1,45 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.mapped_text import MappedTextFile
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.live = self.tmp / "hosts"
+        self.live.write_bytes(b"# header\n127.0.0.1 localhost\n0.0.0.0 a.com\n")
+
+    def test_live_file_can_be_replaced_and_truncated_while_shown(self):
+        view = MappedTextFile.snapshot(self.live, start=9)
+        self.addCleanup(view.close)
+        view.build_index()
+        self.assertNotEqual(view.path, self.live)
+
+        replacement = self.tmp / "hosts.new"
+        replacement.write_bytes(b"127.0.0.1 localhost\n")
+        os.replace(replacement, self.live)
+        with open(self.live, "r+b") as f:
+            f.truncate(0)
+
+        self.assertEqual(view.line_count(), 2)
+        self.assertEqual(list(view.lines(0, 2)), ["127.0.0.1 localhost", "0.0.0.0 a.com"])
+
+    def test_copy_is_removed_on_close(self):
+        view = MappedTextFile.snapshot(self.live)
+        copy = view.path
+        self.assertTrue(copy.exists())
+        view.close()
+        self.assertFalse(copy.exists())
+        self.assertTrue(self.live.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
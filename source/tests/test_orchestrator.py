@@ -0,0 +1,154 @@
+import os
+import sys
+import stat
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.orchestrator import Step, run_steps
+from tests.sandbox import HostsSandbox
+
+
+def py(code: str) -> list[str]:
+    """A stub command: the current interpreter running `code`."""
+    return [sys.executable, "-c", code]
+
+
+def sleeper(seconds: float, rc: int = 0) -> list[str]:
+    return py(f"import time, sys; time.sleep({seconds}); sys.exit({rc})")
+
+
+class RunStepsTests(unittest.TestCase):
+    def test_independent_steps_run_concurrently(self):
+        report = run_steps([Step(name, sleeper(0.4)) for name in ("a", "b", "c")])
+        self.assertTrue(report.all_ok)
+        self.assertLess(report.elapsed, 1.0)
+
+    def test_dependencies_wait_for_their_steps(self):
+        report = run_steps([
+            Step("first", sleeper(0.2)),
+            Step("second", sleeper(0.1), after=("first",)),
+        ])
+        self.assertGreaterEqual(report["second"].started, report["first"].started + report["first"].elapsed)
+
+    def test_exit_status_and_stderr_are_collected(self):
+        report = run_steps([Step("fails", py("import sys; sys.stderr.write('nope'); sys.exit(3)"))])
+        result = report["fails"]
+        self.assertFalse(result.ok)
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stderr, b"nope")
+
+    def test_failed_dependency_skips_requiring_step_only(self):
+        report = run_steps([
+            Step("fails", sleeper(0, rc=1)),
+            Step("needs_it", sleeper(0), after=("fails",), requires_success=True),
+            Step("runs_anyway", sleeper(0), after=("fails",)),
+        ])
+        self.assertTrue(report["needs_it"].skipped)
+        self.assertEqual(report["needs_it"].error, "dependency failed")
+        self.assertTrue(report["runs_anyway"].ok)
+        self.assertTrue(report.any_ok)
+        self.assertFalse(report.all_ok)
+
+    def test_callables_and_exceptions(self):
+        def boom():
+            raise RuntimeError("broken")
+
+        report = run_steps([Step("ok", lambda: True), Step("boom", boom)])
+        self.assertTrue(report["ok"].ok)
+        self.assertFalse(report["boom"].ok)
+        self.assertEqual(report["boom"].error, "broken")
+
+    def test_step_timeout(self):
+        report = run_steps([Step("slow", sleeper(5), timeout=0.2)])
+        self.assertFalse(report["slow"].ok)
+        self.assertIn("timed out", report["slow"].error)
+        self.assertLess(report.elapsed, 2)
+
+    def test_deadline_bounds_the_run_and_skips_later_steps(self):
+        report = run_steps([
+            Step("slow", sleeper(5)),
+            Step("later", sleeper(0), after=("slow",)),
+        ], deadline=0.3)
+        self.assertIn("timed out", report["slow"].error)
+        self.assertTrue(report["later"].skipped)
+        self.assertEqual(report["later"].error, "deadline reached")
+        self.assertLess(report.elapsed, 2)
+
+    def test_invalid_graphs_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            run_steps([Step("a", sleeper(0), after=("b",)), Step("b", sleeper(0), after=("a",))])
+        with self.assertRaisesRegex(ValueError, "unknown"):
+            run_steps([Step("a", sleeper(0), after=("missing",))])
+        with self.assertRaisesRegex(ValueError, "Duplicate"):
+            run_steps([Step("a", sleeper(0)), Step("a", sleeper(0))])
+
+    def test_empty_graph(self):
+        self.assertEqual(run_steps([]).results, {})
+
+
+_STUB = """#!{python}
+import os, sys, time
+name = os.path.basename(sys.argv[0])
+start = time.monotonic()
+time.sleep({delay})
+with open({log!r}, "a") as f:
+    f.write(f"{{name}} {{start}} {{time.monotonic()}} {{' '.join(sys.argv[1:])}}\\n")
+sys.exit(int(os.environ.get("STUB_RC_" + name.upper(), "0")))
+"""
+
+
+@unittest.skipIf(sys.platform == "win32", "stub commands are POSIX scripts")
+class UnlockHostsStubTests(HostsSandbox):
+    """_unlock_hosts_windows() against stand-ins for net, takeown, icacls, attrib and powershell."""
+
+    def setUp(self):
+        super().setUp()
+        bin_dir = self.tmp / "bin"
+        bin_dir.mkdir()
+        self.log = self.tmp / "calls.log"
+        for name in ("net", "takeown", "icacls", "attrib", "powershell"):
+            script = bin_dir / name
+            script.write_text(_STUB.format(python=sys.executable, delay=0.3, log=str(self.log)), encoding="utf-8")
+            os.chmod(script, stat.S_IRWXU)
+        patcher = mock.patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def calls(self) -> dict[str, list[tuple[float, float, str]]]:
+        calls: dict = {}
+        for line in self.log.read_text(encoding="utf-8").splitlines():
+            name, start, end, args = (line.split(" ", 3) + [""])[:4]
+            calls.setdefault(name, []).append((float(start), float(end), args))
+        return calls
+
+    def test_acl_steps_chain_after_takeown_others_run_at_once(self):
+        self.assertTrue(self.manager._unlock_hosts_windows())
+        calls = self.calls()
+        self.assertEqual(sorted(calls), ["attrib", "icacls", "net", "powershell", "takeown"])
+        (takeown_start, takeown_end, _), = calls["takeown"]
+        icacls = sorted(calls["icacls"])
+        self.assertEqual(len(icacls), 2)
+        self.assertIn("*S-1-5-32-544:F", icacls[0][2])
+        self.assertIn("*S-1-1-0:F", icacls[1][2])
+        self.assertGreaterEqual(icacls[0][0], takeown_end)
+        self.assertGreaterEqual(icacls[1][0], icacls[0][1])
+        # net, takeown, attrib and powershell do not wait for each other.
+        independent = [calls[name][0][0] for name in ("net", "takeown", "attrib", "powershell")]
+        self.assertLess(max(independent) - min(independent), 0.3)
+
+    def test_failed_takeown_still_runs_the_acl_chain(self):
+        with mock.patch.dict(os.environ, {"STUB_RC_TAKEOWN": "1"}):
+            self.assertTrue(self.manager._unlock_hosts_windows())
+        self.assertEqual(len(self.calls()["icacls"]), 2)
+
+    def test_all_failing_reports_failure(self):
+        failing = {f"STUB_RC_{name.upper()}": "1" for name in ("net", "takeown", "icacls", "attrib", "powershell")}
+        with mock.patch.dict(os.environ, failing):
+            self.assertFalse(self.manager._unlock_hosts_windows())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import stat
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.privileged_helper import PrivilegedHelperClient, run_helper
+from app.utils.file_ops import normalized_file_digest
+
+
+@unittest.skipUnless(hasattr(os, "O_NOFOLLOW") and sys.platform != "win32", "POSIX helper")
+class HelperDirectoryTests(unittest.TestCase):
+    def setUp(self):
+        # The helper chdirs into its directory; it normally owns its process.
+        self.addCleanup(os.chdir, os.getcwd())
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.dir = self.tmp / "private"
+        self.dir.mkdir(mode=0o700)
+        os.chmod(self.dir, 0o700)
+        (self.dir / "token").write_text("secret", encoding="ascii")
+        self.victim = self.tmp / "victim"
+        self.victim.write_text("do not touch")
+        os.chmod(self.victim, 0o644)
+
+    def run_helper(self, directory: Path) -> int:
+        return run_helper([
+            "--dir", str(directory), "--uid", str(os.getuid()),
+            "--parent-pid", str(os.getpid()), "--root", str(self.tmp),
+        ])
+
+    def assert_victim_untouched(self):
+        st = os.stat(self.victim)
+        self.assertEqual(stat.S_IMODE(st.st_mode), 0o644)
+        self.assertEqual(self.victim.read_text(), "do not touch")
+
+    def test_symlinked_socket_path_is_refused(self):
+        os.symlink(self.victim, self.dir / "helper.sock")
+        self.assertEqual(self.run_helper(self.dir), 2)
+        self.assertTrue(os.path.islink(self.dir / "helper.sock"))
+        self.assert_victim_untouched()
+
+    def test_symlinked_token_is_refused(self):
+        os.remove(self.dir / "token")
+        os.symlink(self.victim, self.dir / "token")
+        self.assertEqual(self.run_helper(self.dir), 2)
+        self.assert_victim_untouched()
+
+    def test_symlinked_directory_is_refused(self):
+        link = self.tmp / "link"
+        os.symlink(self.dir, link)
+        self.assertEqual(self.run_helper(link), 2)
+        self.assertTrue((self.dir / "token").exists())
+
+    def test_group_readable_directory_is_refused(self):
+        os.chmod(self.dir, 0o750)
+        self.assertEqual(self.run_helper(self.dir), 2)
+        self.assertTrue((self.dir / "token").exists())
+
+
+@unittest.skipUnless(hasattr(os, "O_NOFOLLOW") and sys.platform != "win32", "POSIX helper")
+class HelperRoundTripTests(unittest.TestCase):
+    def test_write_through_sandboxed_helper(self):
+        root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, root, True)
+        hosts = root / "etc" / "hosts"
+        hosts.parent.mkdir()
+        hosts.write_text("127.0.0.1 localhost\n")
+        source = root / "new"
+        source.write_text("127.0.0.1 localhost\n0.0.0.0 example.com\n")
+
+        client = PrivilegedHelperClient(root=str(root))
+        self.addCleanup(client.stop)
+        self.assertTrue(client.start())
+        sock = client.socket_path
+        self.assertEqual(stat.S_IMODE(os.lstat(sock).st_mode), 0o600)
+        client.write(str(source), normalized_file_digest(source))
+        self.assertEqual(hosts.read_text(), source.read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
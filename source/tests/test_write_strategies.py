@@ -0,0 +1,131 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.write_strategies import StrategyMemory, WriteStrategy, run_strategies
+from tests.sandbox import HostsSandbox
+
+
+class FakeBackend:
+    """A strategy whose outcome is scripted; records how often it ran."""
+
+    def __init__(self, name: str, ok: bool = False, error: Exception | None = None):
+        self.name = name
+        self.ok = ok
+        self.error = error
+        self.calls = 0
+
+    def run(self) -> bool:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.ok
+
+
+class StrategyChainTests(unittest.TestCase):
+    def setUp(self):
+        self.settings: dict = {}
+        self.memory = StrategyMemory("strategy", load=self.settings.get, store=self.settings.__setitem__)
+
+    def run_chain(self, *backends: FakeBackend, **kwargs):
+        order = []
+
+        def tracked(backend):
+            def run():
+                order.append(backend.name)
+                return backend.run()
+            return WriteStrategy(backend.name, run)
+
+        return run_strategies([tracked(b) for b in backends], self.memory, **kwargs), order
+
+    def test_default_order_until_first_success(self):
+        name, order = self.run_chain(FakeBackend("a"), FakeBackend("b", ok=True), FakeBackend("c", ok=True))
+        self.assertEqual(name, "b")
+        self.assertEqual(order, ["a", "b"])
+
+    def test_success_is_remembered_and_tried_first(self):
+        self.run_chain(FakeBackend("a"), FakeBackend("b", ok=True))
+        self.assertEqual(self.memory.preferred(), "b")
+        name, order = self.run_chain(FakeBackend("a", ok=True), FakeBackend("b", ok=True))
+        self.assertEqual((name, order), ("b", ["b"]))
+
+    def test_forgotten_after_two_failures(self):
+        self.settings["strategy"] = {"name": "b", "failures": 0}
+        _, order = self.run_chain(FakeBackend("a"), FakeBackend("b"), FakeBackend("c"))
+        self.assertEqual(order, ["b", "a", "c"])
+        self.assertEqual(self.settings["strategy"], {"name": "b", "failures": 1})
+        self.run_chain(FakeBackend("a"), FakeBackend("b"), FakeBackend("c"))
+        self.assertIsNone(self.memory.preferred())
+        _, order = self.run_chain(FakeBackend("a"), FakeBackend("b"), FakeBackend("c"))
+        self.assertEqual(order, ["a", "b", "c"])
+
+    def test_success_resets_failure_count(self):
+        self.settings["strategy"] = {"name": "b", "failures": 1}
+        self.run_chain(FakeBackend("a"), FakeBackend("b", ok=True))
+        self.assertEqual(self.settings["strategy"], {"name": "b", "failures": 0})
+
+    def test_exception_counts_as_failure_and_chain_continues(self):
+        self.settings["strategy"] = {"name": "a", "failures": 0}
+        name, order = self.run_chain(FakeBackend("a", error=OSError("locked")), FakeBackend("b", ok=True))
+        self.assertEqual((name, order), ("b", ["a", "b"]))
+        self.assertEqual(self.memory.preferred(), "b")
+
+    def test_unoffered_preference_keeps_default_order(self):
+        self.settings["strategy"] = {"name": "elevated", "failures": 0}
+        _, order = self.run_chain(FakeBackend("a"), FakeBackend("b", ok=True))
+        self.assertEqual(order, ["a", "b"])
+
+    def test_failures_not_recorded_when_disabled(self):
+        self.settings["strategy"] = {"name": "b", "failures": 1}
+        name, _ = self.run_chain(FakeBackend("a"), FakeBackend("b"), record_failures=False)
+        self.assertIsNone(name)
+        self.assertEqual(self.settings["strategy"], {"name": "b", "failures": 1})
+
+
+@unittest.skipIf(sys.platform == "win32", "POSIX strategy chain")
+class ManagerStrategyTests(HostsSandbox):
+    def mock_backends(self, direct: bool, helper: bool, elevated: bool = False):
+        calls = []
+
+        def record(name, ok):
+            def run(*_args, **kwargs):
+                calls.append((name, kwargs.get("start", True)))
+                if not ok:
+                    raise PermissionError(f"{name} denied")
+                return ok
+            return run
+
+        def direct_write(write, expected_digest, timeout=1.5):
+            calls.append(("direct", True))
+            if not direct:
+                raise PermissionError("direct denied")
+            write()
+            return self.manager._verify_applied_digest(expected_digest)
+
+        self.manager._try_direct_write = direct_write
+        self.manager._apply_via_helper = record("helper", helper)
+        self.manager._strategy_elevated = record("elevated", elevated)
+        return calls
+
+    def test_remembered_helper_goes_first(self):
+        self.settings["hosts_write_strategy"] = {"name": "helper", "failures": 0}
+        calls = self.mock_backends(direct=False, helper=False, elevated=True)
+        self.assertTrue(self.manager.apply(b"127.0.0.1 localhost\n0.0.0.0 a.com\n", "install"))
+        self.assertEqual([name for name, _ in calls], ["helper", "direct", "elevated"])
+        self.assertEqual(self.settings["hosts_write_strategy"], {"name": "elevated", "failures": 0})
+
+    def test_non_interactive_run_does_not_count_failures(self):
+        self.manager.apply(b"127.0.0.1 localhost\n0.0.0.0 a.com\n", "install")
+        self.settings["hosts_write_strategy"] = {"name": "helper", "failures": 1}
+        calls = self.mock_backends(direct=False, helper=False, elevated=True)
+        with self.assertRaises(PermissionError):
+            self.manager.reapply_last("guard", interactive=False)
+        # Only non-prompting methods ran, the helper without being started.
+        self.assertEqual(calls, [("helper", False), ("direct", True)])
+        self.assertEqual(self.settings["hosts_write_strategy"], {"name": "helper", "failures": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()